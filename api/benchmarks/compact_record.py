@@ -0,0 +1,77 @@
+"""
+Cost of one full record response with each in-memory MARC record.
+
+"pymarc" parses fullrecord into a pymarc.Record with the etree parser, which
+has an object per field and subfield. "compact" parses it into a
+CompactRecord, a few arrays and one string buffer that FieldRuleset reads
+directly. Both build a Record from the parsed record and serialize it with
+the full schema. Peak is the most memory tracemalloc saw allocated during
+the request, and MARC peak while only parsing the record and building its
+MARC display fields. Retained is what the parsed record holds once it's made.
+
+    poetry run python -m benchmarks.compact_record
+"""
+
+import tracemalloc
+from catalog_api import schemas
+from catalog_api.main import serialize_record
+from catalog_api.marc import parse_marcxml_with_compact, parse_marcxml_with_etree
+from catalog_api.record import MARC, Record
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+from benchmarks.vernacular import MARC_FIELDS
+
+PARSERS = {"pymarc": parse_marcxml_with_etree, "compact": parse_marcxml_with_compact}
+
+
+def respond(doc, parse):
+    return serialize_record(
+        Record(doc, record=parse(doc["fullrecord"])), schemas.Record
+    )
+
+
+def marc_fields(doc, parse):
+    marc = MARC(parse(doc["fullrecord"]))
+    return [getattr(marc, name) for name in MARC_FIELDS if name != "id"]
+
+
+def peak_kb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def retained_kb(doc, parse) -> float:
+    tracemalloc.start()
+    record = parse(doc["fullrecord"])
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del record
+    return size / 1024
+
+
+def main():
+    docs = {
+        "land_birds": (corpus.land_birds(), 50),
+        "cjk": (corpus.vernacular("cjk"), 20),
+        "large_serial": (corpus.large_serial(), 3),
+    }
+    print(
+        f"{'document':<14}{'record':<10}{'time':>10}{'peak':>12}"
+        f"{'MARC peak':>12}{'retained':>12}"
+    )
+    for name, (doc, number) in docs.items():
+        for record, parse in PARSERS.items():
+            ms = per_call_ms(lambda: respond(doc, parse), number)
+            print(
+                f"{name:<14}{record:<10}{ms:>8.2f}ms"
+                f"{peak_kb(lambda: respond(doc, parse)):>10.0f}KB"
+                f"{peak_kb(lambda: marc_fields(doc, parse)):>10.0f}KB"
+                f"{retained_kb(doc, parse):>10.0f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Bandwidth and CPU of each content coding on full record responses: the
+size of the compressed body against the JSON, and the milliseconds to
+compress it (paid once per cache entry, or per response when it isn't
+cached) and to decompress it (paid by the client, and by the shared cache
+on a hit in another coding). br and zstd are only measured if brotli and
+zstandard are installed.
+
+    poetry run python -m benchmarks.compression
+"""
+
+from catalog_api import schemas
+from catalog_api.compression import CODINGS
+from catalog_api.main import serialize_record
+from catalog_api.record import Record
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+
+def main():
+    docs = {
+        "land_birds": (corpus.land_birds(), 200),
+        "cjk": (corpus.vernacular("cjk"), 50),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(
+        f"{'document':<14}{'coding':<8}{'KB':>8}{'ratio':>8}"
+        f"{'compress':>12}{'decompress':>12}"
+    )
+    for name, (doc, number) in docs.items():
+        body = serialize_record(Record(doc), schemas.Record)
+        print(f"{name:<14}{'json':<8}{len(body) / 1024:>8.1f}")
+        for coding, (compress, decompress) in CODINGS.items():
+            compressed = compress(body)
+            print(
+                f"{'':<14}{coding:<8}{len(compressed) / 1024:>8.1f}"
+                f"{len(compressed) / len(body):>8.3f}"
+                f"{per_call_ms(lambda: compress(body), number):>10.2f}ms"
+                f"{per_call_ms(lambda: decompress(compressed), number):>10.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Solr documents used by the benchmarks. land_birds is the fixture the tests
+use. large_serial is built from it and has the shape of a long-running serial:
+hundreds of notes, linking entries and title changes, and thousands of
+physical and HathiTrust items.
+"""
+
+import copy
+import json
+import pathlib
+import pymarc
+from catalog_api.marc import parse_marcxml
+
+FIXTURES = pathlib.Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def land_birds() -> dict:
+    with open(FIXTURES / "land_birds_solr.json") as data:
+        return json.load(data)["response"]["docs"][0]
+
+
+def alma_record() -> dict:
+    with open(FIXTURES / "alma_record.json") as data:
+        return json.load(data)
+
+
+def _datafield(tag, subfields, ind1=" ", ind2=" "):
+    return pymarc.Field(
+        tag=tag,
+        indicators=pymarc.Indicators(ind1, ind2),
+        subfields=[
+            pymarc.Subfield(code=code, value=value) for code, value in subfields
+        ],
+    )
+
+
+def large_serial(volumes: int = 400) -> dict:
+    doc = land_birds()
+    record = parse_marcxml(doc["fullrecord"])
+    for v in range(volumes):
+        record.add_field(_datafield("362", [("a", f"Vol. {v + 1} ({1900 + v})-")], "0"))
+        record.add_field(_datafield("500", [("a", f"Issue note for volume {v + 1}.")]))
+        record.add_field(
+            _datafield(
+                "866", [("8", str(v)), ("a", f"v.{v + 1} ({1900 + v})")], "4", "1"
+            )
+        )
+    for v in range(volumes // 10):
+        record.add_field(
+            _datafield(
+                "780",
+                [
+                    ("t", f"Earlier title {v}"),
+                    ("x", f"0000-{v:04d}"),
+                    ("w", f"(OCoLC){v}"),
+                ],
+                "0",
+                "0",
+            )
+        )
+        record.add_field(
+            _datafield(
+                "785",
+                [("t", f"Later title {v}"), ("x", f"1111-{v:04d}")],
+                "0",
+                "0",
+            )
+        )
+        record.add_field(
+            _datafield("700", [("a", f"Editor, Number {v},"), ("e", "editor.")], "1")
+        )
+    doc["fullrecord"] = pymarc.record_to_xml(record).decode("utf-8")
+
+    holdings = json.loads(doc["hol"])
+    holding = holdings[0]
+    item = holding["items"][0]
+    holding["items"] = []
+    for v in range(volumes):
+        volume = copy.deepcopy(item)
+        volume["barcode"] = f"39015{v:09d}"
+        volume["item_id"] = f"23{v:013d}6381"
+        volume["description"] = f"v.{v + 1} ({1900 + v})"
+        volume["can_reserve"] = v % 4 == 0
+        holding["items"].append(volume)
+    holdings.append(
+        {
+            "library": "HathiTrust Digital Library",
+            "items": [
+                {
+                    "id": f"mdp.39015{v:09d}",
+                    "rights": "pd",
+                    "description": f"v.{v + 1} ({1900 + v})",
+                    "collection_code": "MIU",
+                    "access": True,
+                    "source": "University of Michigan",
+                    "status": "Full text",
+                }
+                for v in range(volumes)
+            ],
+        }
+    )
+    doc["hol"] = json.dumps(holdings)
+    return doc
+
+
+SCRIPTS = {
+    "cjk": ("$1", "東京大学出版会の鳥類図鑑"),
+    "arabic": ("(3/r", "دليل الطيور البرية في المنطقة"),
+    "cyrillic": ("(N", "Справочник наземных птиц региона"),
+}
+
+
+def vernacular(script: str, pairs: int = 60) -> dict:
+    """
+    land_birds with pairs romanized fields, each linked to an 880 with the
+    same field in script: titles, names, notes, subjects and series.
+    """
+    code, text = SCRIPTS[script]
+    doc = land_birds()
+    record = parse_marcxml(doc["fullrecord"])
+    tags = ["246", "700", "500", "650", "490", "710", "505", "830"]
+    for n in range(pairs):
+        tag = tags[n % len(tags)]
+        occurrence = f"{n + 1:02d}"
+        record.add_field(
+            _datafield(
+                tag,
+                [("6", f"880-{occurrence}"), ("a", f"Romanized {tag} {n}")],
+                "1",
+                "0",
+            )
+        )
+        record.add_field(
+            _datafield(
+                "880",
+                [("6", f"{tag}-{occurrence}/{code}"), ("a", f"{text} {n}")],
+                "1",
+                "0",
+            )
+        )
+    doc["fullrecord"] = pymarc.record_to_xml(record).decode("utf-8")
+    return doc
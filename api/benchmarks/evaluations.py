@@ -0,0 +1,50 @@
+"""
+How many rulesets one response runs against the record, and how long the
+response takes, for the full schema and for a response of only citation.
+Each MARC display field runs its rulesets on the record's processor, as do
+the citations and the Aeon fields of reservable items, so a ruleset
+equivalent to one already run reuses its result and isn't counted again.
+
+    poetry run python -m benchmarks.evaluations
+"""
+
+from catalog_api import schemas
+from catalog_api.main import serialize_record
+from catalog_api.record import Record
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+SCHEMAS = {
+    "full": schemas.Record,
+    "citation": schemas.partial_record(frozenset(["id", "citation"])),
+}
+
+
+def evaluations(doc, schema) -> int:
+    record = Record(doc, sections=frozenset(schema.model_fields))
+    serialize_record(record, schema)
+    return record.processor.evaluations
+
+
+def main():
+    docs = {
+        "land_birds": (corpus.land_birds(), 200),
+        "cjk": (corpus.vernacular("cjk"), 50),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(f"{'document':<14}{'response':<10}{'evaluations':>12}{'time':>10}")
+    for name, (doc, number) in docs.items():
+        for response, schema in SCHEMAS.items():
+
+            def respond():
+                record = Record(doc, sections=frozenset(schema.model_fields))
+                return serialize_record(record, schema)
+
+            print(
+                f"{name:<14}{response:<10}{evaluations(doc, schema):>12}"
+                f"{per_call_ms(respond, number):>8.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-request cost of building the holdings of a record.
+
+"before" builds the Aeon bib fields for every reservable item, which is
+what each ReservableItem used to do. "after" is the current Holdings, where
+the reservable items of a record share one AeonRecord.
+
+"with marc" parses fullrecord and builds the holdings, which every holdings
+lookup used to do. "hol only" is the holdings fast path: fullrecord is only
+parsed when an item can be reserved, so land_birds never parses it.
+
+    poetry run python -m benchmarks.holdings
+"""
+
+from catalog_api import schemas
+from catalog_api.holdings import AeonRecord
+from catalog_api.marc import parse_marcxml
+from catalog_api.record import Record
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+
+def holdings(doc: dict, record):
+    return schemas.Holdings.model_validate(
+        Record(doc, record=record).holdings, from_attributes=True
+    )
+
+
+def unshared_aeon_fields(doc: dict, record):
+    subject = Record(doc, record=record).holdings
+    for holding in subject.physical:
+        for item in holding.items:
+            item.aeon_record = AeonRecord(record)
+    return schemas.Holdings.model_validate(subject, from_attributes=True)
+
+
+def with_marc(doc: dict):
+    return holdings(doc, parse_marcxml(doc["fullrecord"]))
+
+
+def hol_only(doc: dict):
+    return schemas.Holdings.model_validate(Record(doc).holdings, from_attributes=True)
+
+
+def main():
+    docs = {
+        "land_birds": (corpus.land_birds(), 200),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(f"{'document':<14}{'before':>10}{'after':>10}")
+    for name, (doc, number) in docs.items():
+        record = parse_marcxml(doc["fullrecord"])
+        before = per_call_ms(lambda: unshared_aeon_fields(doc, record), number)
+        after = per_call_ms(lambda: holdings(doc, record), number)
+        print(f"{name:<14}{before:>8.2f}ms{after:>8.2f}ms")
+
+    print()
+    print(f"{'document':<14}{'with marc':>12}{'hol only':>12}")
+    for name, (doc, number) in docs.items():
+        marc = per_call_ms(lambda: with_marc(doc), number)
+        hol = per_call_ms(lambda: hol_only(doc), number)
+        print(f"{name:<14}{marc:>10.2f}ms{hol:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cost of reading a few tags of a record: the Aeon fields of a reservable
+item, and two MARC display fields.
+
+"whole" parses all of fullrecord, which is what every request used to do.
+"lazy" is a LazyRecord, which scans fullrecord for where its fields are and
+only parses the tags that are read. Peak is the most memory tracemalloc saw
+allocated while reading the fields once.
+
+    poetry run python -m benchmarks.lazy_record
+"""
+
+import tracemalloc
+from catalog_api.holdings import AeonRecord
+from catalog_api.marc import LazyRecord, Processor, parse_marcxml
+from catalog_api.record import MARC
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+
+def aeon_fields(record):
+    aeon = AeonRecord(record)
+    return (aeon.title, aeon.author, aeon.date, aeon.publisher, aeon.isbn)
+
+
+def two_sections(record):
+    marc = MARC(record)
+    marc.processor = Processor(record)
+    return (marc.contributors, marc.series)
+
+
+def peak_kb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    docs = {
+        "land_birds": (corpus.land_birds(), 100),
+        "cjk": (corpus.vernacular("cjk"), 50),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(
+        f"{'document':<14}{'reads':<14}{'whole':>10}{'lazy':>10}"
+        f"{'whole peak':>14}{'lazy peak':>12}"
+    )
+    for name, (doc, number) in docs.items():
+        xml = doc["fullrecord"]
+        for reads in (aeon_fields, two_sections):
+
+            def whole():
+                return reads(parse_marcxml(xml))
+
+            def lazy():
+                return reads(LazyRecord(xml))
+
+            print(
+                f"{name:<14}{reads.__name__:<14}"
+                f"{per_call_ms(whole, number):>8.2f}ms{per_call_ms(lazy, number):>8.2f}ms"
+                f"{peak_kb(whole):>12.0f}KB{peak_kb(lazy):>10.0f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
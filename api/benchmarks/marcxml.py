@@ -0,0 +1,45 @@
+"""
+Throughput of the MARCXML parsers in records per second.
+
+"pymarc" is pymarc.parse_xml_to_array, a SAX handler over a StringIO copy
+of fullrecord, which is what parse_marcxml used to do. "etree" and "lxml"
+build the same pymarc.Record from an ElementTree made straight from the
+string. "compact" fills a CompactRecord straight from the ElementTree
+parser's events. lxml is only timed if it's installed.
+
+    poetry run python -m benchmarks.marcxml
+"""
+
+import timeit
+from catalog_api.marc import MARC_PARSERS, lxml_etree
+from benchmarks import corpus
+
+
+def records_per_second(parse, xml: str, number: int) -> float:
+    seconds = min(timeit.repeat(lambda: parse(xml), number=number, repeat=5))
+    return number / seconds
+
+
+def main():
+    parsers = {
+        name: parse
+        for name, parse in MARC_PARSERS.items()
+        if name != "lxml" or lxml_etree is not None
+    }
+    docs = {
+        "land_birds": (corpus.land_birds(), 200),
+        "alma_record": (corpus.alma_record(), 200),
+        "cjk": (corpus.vernacular("cjk"), 50),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(f"{'document':<14}{'KB':>6}" + "".join(f"{name:>12}" for name in parsers))
+    for name, (doc, number) in docs.items():
+        xml = doc["fullrecord"]
+        line = f"{name:<14}{len(xml.encode('utf-8')) / 1024:>6.0f}"
+        for parse in parsers.values():
+            line += f"{records_per_second(parse, xml, number):>10.0f}/s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
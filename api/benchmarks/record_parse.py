@@ -0,0 +1,38 @@
+"""
+Per-request cost of parsing fullrecord and building a Record's MARC.
+
+"before" parses fullrecord twice, which is what Record and BaseRecord used to
+do between them. "after" is the current Record, which parses once and shares
+the result. Record parses lazily, so both read the record's marc to make it
+parse; that builds the MARC-in-JSON as well, the same on both sides.
+
+    poetry run python -m benchmarks.record_parse
+"""
+
+import timeit
+from catalog_api.marc import parse_marcxml
+from catalog_api.record import Record
+from benchmarks import corpus
+
+
+def per_call_ms(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    docs = {
+        "land_birds": (corpus.land_birds(), 200),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(f"{'document':<14}{'parse':>10}{'before':>10}{'after':>10}")
+    for name, (doc, number) in docs.items():
+        parse = per_call_ms(lambda: parse_marcxml(doc["fullrecord"]), number)
+        before = per_call_ms(
+            lambda: (parse_marcxml(doc["fullrecord"]), Record(doc).marc), number
+        )
+        after = per_call_ms(lambda: Record(doc).marc, number)
+        print(f"{name:<14}{parse:>8.2f}ms{before:>8.2f}ms{after:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Per-ruleset cost of turning a record's fields into FieldElements.
+
+"before" makes the ruleset on every call, joins a field's subfields once per
+code string it needs, and dedupes unpaired values with a scan of the values
+so far, which is what FieldRuleset and Processor used to do. "after" is the
+current FieldRuleset, made once with its codes compiled, which collects a
+field's values in one walk of its subfields.
+
+    poetry run python -m benchmarks.rulesets
+"""
+
+import dataclasses
+from catalog_api.holdings import AeonRecord
+from catalog_api.marc import FieldRuleset, Processor, parse_marcxml
+from catalog_api.record import CSL, MARC
+from catalog_api.entities import FieldElement, SearchField
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+
+class StringFieldRuleset(FieldRuleset):
+    def has_any_subfields(self, field) -> bool:
+        return bool(self._get_subfields(field, self.text_sfs))
+
+    def value_for(self, field):
+        result = {
+            "text": self._get_subfields(field, self.text_sfs).strip(),
+            "tag": field.tag,
+        }
+        if self.search:
+            result["search"] = []
+            for s in self.search:
+                value = self._get_subfields(field, s["subfields"])
+                if value:
+                    result["search"].append(
+                        SearchField(
+                            field=s["field"],
+                            value=self._get_subfields(field, s["subfields"]),
+                        )
+                    )
+        if self.browse_sfs:
+            result["browse"] = self._get_subfields(field, self.browse_sfs)
+        return FieldElement(**result)
+
+    def _get_subfields(self, field, subfields):
+        return " ".join(field.get_subfields(*tuple(subfields)))
+
+
+class ScanningProcessor(Processor):
+    def generate_unpaired_fields(self, rulesets: tuple) -> list:
+        result = []
+        for ruleset in rulesets:
+            for field in self.get_fields(ruleset.tags):
+                if ruleset.accepts(field) and ruleset.has_any_subfields(field):
+                    value = ruleset.value_for(field)
+                    if value not in result:
+                        result.append(value)
+        return result
+
+
+def rulesets_of(*classes) -> dict:
+    return {
+        f"{cls.__name__}.{name.removesuffix('_RULESETS').lower()}": value
+        for cls in classes
+        for name, value in vars(cls).items()
+        if name.endswith("_RULESETS")
+    }
+
+
+def before(processor, rulesets):
+    processor.results.clear()
+    rulesets = tuple(
+        StringFieldRuleset(
+            **{f.name: getattr(r, f.name) for f in dataclasses.fields(r)}
+        )
+        for r in rulesets
+    )
+    processor.generate_paired_fields(rulesets)
+    processor.generate_unpaired_fields(rulesets)
+
+
+def after(processor, rulesets):
+    # What the processor kept from the last call is dropped, so the rulesets
+    # are evaluated every time
+    processor.results.clear()
+    processor.generate_paired_fields(rulesets)
+    processor.generate_unpaired_fields(rulesets)
+
+
+def main():
+    records = {
+        "land_birds": parse_marcxml(corpus.land_birds()["fullrecord"]),
+        "cjk": parse_marcxml(corpus.vernacular("cjk")["fullrecord"]),
+    }
+    # The field indexes are built once, so only the rulesets are timed
+    processors = {
+        name: (ScanningProcessor(record), Processor(record))
+        for name, record in records.items()
+    }
+    header = f"{'ruleset':<36}"
+    for name in records:
+        header += f"{name + ' before':>20}{'after':>10}"
+    print(header)
+    for name, rulesets in rulesets_of(MARC, AeonRecord, CSL).items():
+        line = f"{name:<36}"
+        for old, new in processors.values():
+            old_us = per_call_ms(lambda: before(old, rulesets), 500) * 1000
+            new_us = per_call_ms(lambda: after(new, rulesets), 500) * 1000
+            line += f"{old_us:>18.1f}us{new_us:>8.1f}us"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
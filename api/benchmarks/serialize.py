@@ -0,0 +1,51 @@
+"""
+Time to turn an already built Record into the JSON of a full response.
+
+"pydantic" validates the record with schemas.Record and serializes the
+model, which is what serialize_record used to do and what strict mode still
+does. "dump+orjson" and "dump+core" build the JSON data straight from the
+record and encode it with orjson or with pydantic_core.to_json. The
+record's fields are read once before timing, so only the serialization is
+timed. orjson is only timed if it's installed.
+
+    poetry run python -m benchmarks.serialize
+"""
+
+from catalog_api import encoder, schemas
+from catalog_api.encoder import dump, encode, validated
+from catalog_api.record import Record
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+
+def dump_and_encode(record, orjson) -> bytes:
+    encoder.orjson = orjson
+    return encode(dump(record, schemas.Record))
+
+
+def main():
+    orjson = encoder.orjson
+    ways = {"pydantic": lambda record: validated(record, schemas.Record)}
+    if orjson is not None:
+        ways["dump+orjson"] = lambda record: dump_and_encode(record, orjson)
+    ways["dump+core"] = lambda record: dump_and_encode(record, None)
+    docs = {
+        "land_birds": (corpus.land_birds(), 200),
+        "cjk": (corpus.vernacular("cjk"), 50),
+        "large_serial": (corpus.large_serial(), 5),
+    }
+    print(f"{'document':<14}" + "".join(f"{name:>14}" for name in ways))
+    try:
+        for name, (doc, number) in docs.items():
+            record = Record(doc)
+            validated(record, schemas.Record)
+            line = f"{name:<14}"
+            for serialize in ways.values():
+                line += f"{per_call_ms(lambda: serialize(record), number):>12.2f}ms"
+            print(line)
+    finally:
+        encoder.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-request cost of the MARC display fields of records where 880s dominate.
+
+"before" walks the record for every ruleset and regex-splits the $6 of
+every 880 each time, which is what Processor used to do. "after" is the
+current Processor, which indexes fields by tag and 880s by linkage once.
+
+    poetry run python -m benchmarks.vernacular
+"""
+
+from functools import cached_property
+from catalog_api import schemas
+from catalog_api.marc import Linkage, Processor, parse_marcxml
+from catalog_api.record import MARC, Record
+from benchmarks import corpus
+from benchmarks.record_parse import per_call_ms
+
+
+class WalkingProcessor(Processor):
+    def get_fields(self, tags) -> list:
+        return self.record.get_fields(*tags)
+
+    def _get_original_for_tags(self, tags) -> list:
+        return [f for f in self.record.get_fields("880") if Linkage(f).tag in tags]
+
+    def _get_paired_fields_for(self, ruleset) -> list:
+        mapping = {}
+        for field in self._get_original_for_tags(ruleset.tags):
+            mapping[str(Linkage(field))] = field
+
+        results = []
+        for field in self.record.get_fields(*ruleset.tags):
+            if ruleset.has_any_subfields(field):
+                original = mapping.pop(
+                    f"{field.tag}-{Linkage(field).occurence_number}", None
+                )
+                if original:
+                    results.append({"transliterated": field, "original": original})
+                else:
+                    results.append({"original": field})
+        return results + [
+            {"original": f} for f in mapping.values() if ruleset.has_any_subfields(f)
+        ]
+
+
+# The response fields that MARC provides
+MARC_FIELDS = frozenset(
+    name
+    for name in schemas.Record.model_fields
+    if isinstance(getattr(MARC, name, None), cached_property)
+) | {"id"}
+
+
+def display_fields(doc: dict, record, processor_class):
+    subject = Record(doc, record=record)
+    subject.processor = processor_class(record)
+    return schemas.partial_record(MARC_FIELDS).model_validate(
+        subject, from_attributes=True
+    )
+
+
+def main():
+    print(f"{'document':<14}{'880s':>6}{'before':>10}{'after':>10}")
+    docs = {"land_birds": corpus.land_birds()}
+    docs.update({script: corpus.vernacular(script) for script in corpus.SCRIPTS})
+    for name, doc in docs.items():
+        record = parse_marcxml(doc["fullrecord"])
+        linked = len(record.get_fields("880"))
+        before = per_call_ms(lambda: display_fields(doc, record, WalkingProcessor), 20)
+        after = per_call_ms(lambda: display_fields(doc, record, Processor), 20)
+        print(f"{name:<14}{linked:>6}{before:>8.2f}ms{after:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,736 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from functools import cached_property
+import anyio
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from catalog_api.compression import CODINGS, decompress, gzip_compress
+from catalog_api.services import Services
+
+# What a shared cache's backend raises when it can't be reached or used
+BACKEND_ERRORS = (OSError, TimeoutError, RedisError, sqlite3.Error)
+
+
+@dataclass(frozen=True)
+class CachedRecord:
+    """
+    A serialized record response and the solr date_of_index and _version_ of
+    the document it was built from. compressed holds the body already
+    compressed, keyed by content coding, so a response in one of them is
+    sent without compressing it again.
+
+    uncompressed is the body as it is, if the entry keeps it. The shared
+    cache's entries only keep it compressed; body decompresses it the first
+    time it's read, and body_size is stored along with it so an encoding
+    can be picked without decompressing it.
+    """
+
+    date_of_index: str | None
+    stored_at: float
+    body_size: int
+    version: int | None = None
+    compressed: dict[str, bytes] = field(default_factory=dict)
+    uncompressed: bytes | None = None
+
+    @cached_property
+    def body(self) -> bytes:
+        if self.uncompressed is not None:
+            return self.uncompressed
+        encoding, data = next(iter(self.compressed.items()))
+        return decompress(data, encoding)
+
+    @property
+    def size(self) -> int:
+        return len(self.uncompressed or b"") + sum(map(len, self.compressed.values()))
+
+
+class RecordCache:
+    """
+    An in-process LRU cache of serialized record responses. It is bounded by
+    the number of entries and by the total size of the bodies, and entries
+    expire ttl seconds after they were stored.
+
+    Keys are (id, variant) tuples, where variant tells apart responses for the
+    same record (e.g. different field selections). Entries are only served for
+    the latest date_of_index seen for their id: storing a response built from
+    a newer index of a record drops every cached response for the old one.
+
+    The compressed bodies stored with an entry count towards max_bytes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: OrderedDict[tuple, CachedRecord] = OrderedDict()
+        self.keys_by_id: dict[str, set[tuple]] = {}
+        self.date_of_index_by_id: dict[str, str | None] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    async def get(self, id: str, variant: Hashable = None) -> CachedRecord | None:
+        if not self.enabled:
+            return None
+        key = (id, variant)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.clock() - entry.stored_at >= self.ttl:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    async def get_many(
+        self, ids: list[str], variant: Hashable = None
+    ) -> dict[str, CachedRecord]:
+        """
+        The entries of those of ids that are cached, by id.
+        """
+        entries = {}
+        for id in ids:
+            entry = await self.get(id, variant)
+            if entry is not None:
+                entries[id] = entry
+        return entries
+
+    async def set(
+        self,
+        id: str,
+        body: bytes,
+        date_of_index: str | None,
+        variant: Hashable = None,
+        version: int | None = None,
+        compressed: dict[str, bytes] | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        entry = CachedRecord(
+            date_of_index=date_of_index,
+            stored_at=self.clock(),
+            body_size=len(body),
+            version=version,
+            compressed=compressed or {},
+            uncompressed=body,
+        )
+        if entry.size > self.max_bytes:
+            return
+        if (
+            id in self.date_of_index_by_id
+            and self.date_of_index_by_id[id] != date_of_index
+        ):
+            await self.delete(id)
+        key = (id, variant)
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = entry
+        self.keys_by_id.setdefault(id, set()).add(key)
+        self.date_of_index_by_id[id] = date_of_index
+        self.bytes += entry.size
+
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def set_many(
+        self,
+        records: dict[str, tuple[bytes, str | None, int | None]],
+        variant: Hashable = None,
+    ) -> None:
+        """
+        Stores several responses. records maps each id to its body,
+        date_of_index and version.
+        """
+        for id, (body, date_of_index, version) in records.items():
+            await self.set(id, body, date_of_index, variant, version=version)
+
+    async def delete(self, id: str) -> None:
+        for key in list(self.keys_by_id.get(id, ())):
+            self._remove(key)
+
+    async def clear(self) -> None:
+        self.entries.clear()
+        self.keys_by_id.clear()
+        self.date_of_index_by_id.clear()
+        self.bytes = 0
+
+    async def close(self) -> None:
+        pass
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+
+    def _remove(self, key: tuple) -> None:
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+        id = key[0]
+        keys = self.keys_by_id[id]
+        keys.discard(key)
+        if not keys:
+            del self.keys_by_id[id]
+            del self.date_of_index_by_id[id]
+
+
+class MissingRecordCache:
+    """
+    Remembers ids that aren't records so requests for them skip solr. An id
+    is malformed when it doesn't match id_pattern (a regular expression the
+    whole id must match; an empty one accepts every id). An id is missing for
+    ttl seconds after solr reported it wasn't found. At most max_entries
+    missing ids are kept, dropping the oldest first.
+    """
+
+    def __init__(
+        self,
+        id_pattern: str,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.id_pattern = re.compile(id_pattern) if id_pattern else None
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.ids: OrderedDict[str, float] = OrderedDict()
+        self.malformed = 0
+        self.hits = 0
+
+    def is_malformed(self, id: str) -> bool:
+        if self.id_pattern is None or self.id_pattern.fullmatch(id):
+            return False
+        self.malformed += 1
+        return True
+
+    def is_missing(self, id: str) -> bool:
+        stored_at = self.ids.get(id)
+        if stored_at is None:
+            return False
+        if self.clock() - stored_at >= self.ttl:
+            del self.ids[id]
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, id: str) -> None:
+        if self.max_entries <= 0:
+            return
+        self.ids.pop(id, None)
+        self.ids[id] = self.clock()
+        while len(self.ids) > self.max_entries:
+            self.ids.popitem(last=False)
+
+    def discard(self, id: str) -> None:
+        self.ids.pop(id, None)
+
+    def clear(self) -> None:
+        self.ids.clear()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.ids),
+            "hits": self.hits,
+            "malformed": self.malformed,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+class SharedRecordCache:
+    """
+    A record cache kept outside the worker process, so every worker shares
+    one copy of each cached response. It has the same interface as
+    RecordCache; where entries live is up to the backend.
+
+    Bodies are stored compressed, with the date_of_index they were built
+    from. The body is compressed with the first encoding it's stored with
+    already compressed, or with gzip if there is none, and a hit in that
+    encoding is sent as stored.
+    Each record also has a version entry holding its latest date_of_index;
+    storing a response for a newer one drops the record's other entries.
+    Entries are built in a worker thread, since one stored without a
+    compressed body is gzipped. get_many and set_many make one request to
+    the backend for all of their records, however many there are.
+
+    The cache is an optimization, so a backend that can't be reached counts
+    as a miss rather than failing the request. delete and clear raise the
+    backend's errors, since the entries may still be there.
+    """
+
+    def __init__(self, backend, ttl: float, max_entry_bytes: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    async def get(self, id: str, variant: Hashable = None) -> CachedRecord | None:
+        return (await self.get_many([id], variant)).get(id)
+
+    async def get_many(
+        self, ids: list[str], variant: Hashable = None
+    ) -> dict[str, CachedRecord]:
+        if not ids:
+            return {}
+        try:
+            values = await self.backend.get_many([entry_key(id, variant) for id in ids])
+        except BACKEND_ERRORS:
+            self.errors += 1
+            values = [None] * len(ids)
+        entries = {}
+        for id, value in zip(ids, values):
+            entry = None if value is None else decode_entry(value)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                entries[id] = entry
+        return entries
+
+    async def set(
+        self,
+        id: str,
+        body: bytes,
+        date_of_index: str | None,
+        variant: Hashable = None,
+        version: int | None = None,
+        compressed: dict[str, bytes] | None = None,
+    ) -> None:
+        value = await anyio.to_thread.run_sync(
+            encode_entry, body, date_of_index, version, compressed
+        )
+        await self._store({id: (date_of_index, value)}, variant)
+
+    async def set_many(
+        self,
+        records: dict[str, tuple[bytes, str | None, int | None]],
+        variant: Hashable = None,
+    ) -> None:
+        values = await anyio.to_thread.run_sync(
+            lambda: {
+                id: (date_of_index, encode_entry(body, date_of_index, version))
+                for id, (body, date_of_index, version) in records.items()
+            }
+        )
+        await self._store(values, variant)
+
+    async def _store(
+        self, values: dict[str, tuple[str | None, bytes]], variant: Hashable
+    ) -> None:
+        # values maps ids to the date_of_index and the encoded entry
+        storable = {
+            id: value
+            for id, (_, value) in values.items()
+            if len(value) <= self.max_entry_bytes
+        }
+        if not storable:
+            return
+        indexed = {id: (values[id][0] or "").encode("utf-8") for id in storable}
+        try:
+            current = await self.backend.get_many([version_key(id) for id in storable])
+            for id, stored in zip(storable, current):
+                if stored is not None and stored != indexed[id]:
+                    await self.backend.delete(id)
+            await self.backend.set_many(
+                {
+                    id: {version_key(id): indexed[id], entry_key(id, variant): value}
+                    for id, value in storable.items()
+                },
+                self.ttl,
+            )
+        except BACKEND_ERRORS:
+            self.errors += 1
+
+    async def delete(self, id: str) -> None:
+        await self.backend.delete(id)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "max_entry_bytes": self.max_entry_bytes,
+            "ttl": self.ttl,
+        }
+
+
+def entry_key(id: str, variant: Hashable = None) -> str:
+    if variant is None:
+        return f"record:{id}:all"
+    fields = ",".join(sorted(variant)).encode("utf-8")
+    return f"record:{id}:{hashlib.sha1(fields).hexdigest()}"
+
+
+def version_key(id: str) -> str:
+    return f"record:{id}:version"
+
+
+def encode_entry(
+    body: bytes,
+    date_of_index: str | None,
+    version: int | None = None,
+    compressed: dict[str, bytes] | None = None,
+) -> bytes:
+    """
+    date_of_index, _version_, the content coding and the length of body
+    separated by spaces, a newline, then the compressed body. The body is
+    the first one of compressed, or body gzipped.
+    """
+    if compressed:
+        encoding, data = next(iter(compressed.items()))
+    else:
+        encoding, data = "gzip", gzip_compress(body)
+    header = " ".join(
+        [
+            date_of_index or "",
+            "" if version is None else str(version),
+            encoding,
+            str(len(body)),
+        ]
+    )
+    return header.encode("utf-8") + b"\n" + data
+
+
+def decode_entry(value: bytes) -> CachedRecord | None:
+    """
+    The entry in value, with its body left compressed, or None if value
+    isn't one encode_entry made, or is in a coding this worker can't
+    decompress.
+    """
+    try:
+        header, data = value.split(b"\n", 1)
+        date_of_index, version, encoding, length = header.decode("utf-8").split(" ")
+        if encoding not in CODINGS:
+            return None
+        return CachedRecord(
+            date_of_index=date_of_index or None,
+            stored_at=0.0,
+            body_size=int(length),
+            version=int(version) if version else None,
+            compressed={encoding: data},
+        )
+    except ValueError:
+        return None
+
+
+class SQLiteBackend:
+    """
+    Keeps entries in a SQLite database file, which every worker on the host
+    opens. The total size of the entries is kept under max_bytes by dropping
+    the least recently read ones.
+
+    SQLite calls block, so they're made in a worker thread, one at a time
+    per backend. Reads are timestamped in memory and written in batches of
+    read_batch, and always before the cache is trimmed, rather than with an
+    UPDATE on every hit. Triggers keep the total size in a one row table,
+    so storing an entry doesn't sum the whole cache.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        clock: Callable[[], float] = time.time,
+        read_batch: int = 100,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.read_batch = read_batch
+        self.reads: dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, timeout=1.0, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            """
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS record_cache (
+                key TEXT PRIMARY KEY,
+                id TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                read_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS record_cache_id ON record_cache (id);
+            CREATE INDEX IF NOT EXISTS record_cache_read_at
+                ON record_cache (read_at);
+            CREATE TABLE IF NOT EXISTS record_cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO record_cache_size
+                SELECT 0, COALESCE(SUM(size), 0) FROM record_cache;
+            CREATE TRIGGER IF NOT EXISTS record_cache_inserted
+                AFTER INSERT ON record_cache BEGIN
+                    UPDATE record_cache_size SET bytes = bytes + new.size;
+                END;
+            CREATE TRIGGER IF NOT EXISTS record_cache_updated
+                AFTER UPDATE OF size ON record_cache BEGIN
+                    UPDATE record_cache_size
+                        SET bytes = bytes + new.size - old.size;
+                END;
+            CREATE TRIGGER IF NOT EXISTS record_cache_deleted
+                AFTER DELETE ON record_cache BEGIN
+                    UPDATE record_cache_size SET bytes = bytes - old.size;
+                END;
+            COMMIT;
+            """
+        )
+
+    async def get(self, key: str) -> bytes | None:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return await anyio.to_thread.run_sync(self._get_many, keys)
+
+    async def set(self, id: str, values: dict[str, bytes], ttl: float) -> None:
+        await self.set_many({id: values}, ttl)
+
+    async def set_many(
+        self, values_by_id: dict[str, dict[str, bytes]], ttl: float
+    ) -> None:
+        await anyio.to_thread.run_sync(self._set_many, values_by_id, ttl)
+
+    async def delete(self, id: str) -> None:
+        await anyio.to_thread.run_sync(
+            self._execute, "DELETE FROM record_cache WHERE id = ?", (id,)
+        )
+
+    async def clear(self) -> None:
+        await anyio.to_thread.run_sync(self._execute, "DELETE FROM record_cache", ())
+
+    async def close(self) -> None:
+        await anyio.to_thread.run_sync(self._close)
+
+    @property
+    def total_bytes(self) -> int:
+        with self.lock:
+            return self._total()
+
+    def _get_many(self, keys: list[str]) -> list[bytes | None]:
+        now = self.clock()
+        with self.lock:
+            found = dict(
+                self.connection.execute(
+                    f"""
+                    SELECT key, value FROM record_cache
+                    WHERE key IN ({", ".join("?" * len(keys))}) AND expires_at > ?
+                    """,
+                    (*keys, now),
+                )
+            )
+            for key in found:
+                self.reads[key] = now
+            if len(self.reads) >= self.read_batch:
+                self._write_reads()
+        return [found.get(key) for key in keys]
+
+    def _set_many(self, values_by_id: dict[str, dict[str, bytes]], ttl: float) -> None:
+        now = self.clock()
+        with self.lock:
+            for values in values_by_id.values():
+                for key in values:
+                    self.reads.pop(key, None)
+            self.connection.executemany(
+                """
+                INSERT INTO record_cache VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET id = excluded.id,
+                    value = excluded.value, size = excluded.size,
+                    expires_at = excluded.expires_at, read_at = excluded.read_at
+                """,
+                [
+                    (key, id, value, len(value), now + ttl, now)
+                    for id, values in values_by_id.items()
+                    for key, value in values.items()
+                ],
+            )
+            self._trim(now)
+
+    def _execute(self, sql: str, parameters: tuple) -> None:
+        with self.lock:
+            self.connection.execute(sql, parameters)
+
+    def _close(self) -> None:
+        with self.lock:
+            self._write_reads()
+            self.connection.close()
+
+    def _write_reads(self) -> None:
+        if not self.reads:
+            return
+        reads = [(read_at, key) for key, read_at in self.reads.items()]
+        self.reads.clear()
+        self.connection.executemany(
+            "UPDATE record_cache SET read_at = ? WHERE key = ?", reads
+        )
+
+    def _total(self) -> int:
+        (total,) = self.connection.execute(
+            "SELECT bytes FROM record_cache_size"
+        ).fetchone()
+        return total
+
+    def _trim(self, now: float) -> None:
+        if self._total() <= self.max_bytes:
+            return
+        self._write_reads()
+        self.connection.execute(
+            "DELETE FROM record_cache WHERE expires_at <= ?", (now,)
+        )
+        total = self._total()
+        drop = []
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM record_cache ORDER BY read_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM record_cache WHERE key = ?", drop)
+
+
+class RedisBackend:
+    """
+    Keeps entries in Redis with a TTL on each. The keys of a record's entries
+    are kept in a set so they can be dropped together. The total size is up to
+    the server's maxmemory and eviction policy.
+
+    client is a redis-py asyncio client, whose connection pool lets requests
+    use Redis concurrently. The entries stored together, and their key
+    sets, are written in one MULTI, so a store is one round trip, and
+    get_many is one MGET.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Redis, prefix: str = "catalog-api:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(self.prefix + key)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return await self.client.mget([self.prefix + key for key in keys])
+
+    async def set(self, id: str, values: dict[str, bytes], ttl: float) -> None:
+        await self.set_many({id: values}, ttl)
+
+    async def set_many(
+        self, values_by_id: dict[str, dict[str, bytes]], ttl: float
+    ) -> None:
+        milliseconds = int(ttl * 1000)
+        async with self.client.pipeline(transaction=True) as pipeline:
+            for id, values in values_by_id.items():
+                keys = [self.prefix + key for key in values]
+                for key, value in zip(keys, values.values()):
+                    pipeline.set(key, value, px=milliseconds)
+                pipeline.sadd(self._keys_of(id), *keys)
+                pipeline.pexpire(self._keys_of(id), milliseconds)
+            await pipeline.execute()
+
+    async def delete(self, id: str) -> None:
+        keys = await self.client.smembers(self._keys_of(id))
+        await self.client.delete(self._keys_of(id), *keys)
+
+    async def clear(self) -> None:
+        keys = []
+        async for key in self.client.scan_iter(match=f"{self.prefix}*", count=1000):
+            keys.append(key)
+            if len(keys) == 1000:
+                await self.client.delete(*keys)
+                keys = []
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def _keys_of(self, id: str) -> str:
+        return f"{self.prefix}keys:{id}"
+
+
+def record_cache_for(settings: Services) -> RecordCache | SharedRecordCache:
+    """
+    The record cache the settings ask for: an in-process one by default, or
+    a shared one with a sqlite or redis backend.
+    """
+    match settings.record_cache_backend:
+        case "sqlite":
+            backend = SQLiteBackend(
+                settings.record_cache_sqlite_path,
+                max_bytes=settings.record_cache_max_bytes,
+            )
+        case "redis":
+            backend = RedisBackend(
+                Redis.from_url(
+                    settings.redis_url, socket_timeout=1.0, socket_connect_timeout=1.0
+                )
+            )
+        case _:
+            return RecordCache(
+                max_entries=settings.record_cache_max_entries,
+                max_bytes=settings.record_cache_max_bytes,
+                ttl=settings.record_cache_ttl,
+            )
+    return SharedRecordCache(
+        backend,
+        ttl=settings.record_cache_ttl,
+        max_entry_bytes=settings.record_cache_max_entry_bytes,
+    )
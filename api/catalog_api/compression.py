@@ -0,0 +1,190 @@
+import gzip
+import threading
+import time
+from collections.abc import Callable, Mapping
+from catalog_api.services import Services
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is a dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is a dependency
+    zstandard = None
+
+
+def gzip_compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+# The content codings that can be used here, each with how it compresses and
+# decompresses a body. brotli and zstandard are dependencies of the API, but
+# br and zstd are left out rather than failing if one isn't installed.
+CODINGS: dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "gzip": (gzip_compress, gzip.decompress),
+}
+if brotli is not None:
+    CODINGS["br"] = (lambda body: brotli.compress(body, quality=5), brotli.decompress)
+if zstandard is not None:
+    CODINGS["zstd"] = (
+        lambda body: zstandard.compress(body, 3),
+        zstandard.decompress,
+    )
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    return CODINGS[encoding][1](body)
+
+
+class Compression:
+    """
+    Picks the Content-Encoding of a response from the request's
+    Accept-Encoding, and compresses bodies with it. encodings are the ones
+    the API offers, most preferred first; one the client gives a higher q
+    wins, and on a tie the API's preference does. Bodies shorter than
+    min_bytes are sent as they are, since compressing them saves less than
+    it costs.
+
+    Counts, for each encoding, the responses sent with it, their bytes
+    before and after compression, and the CPU seconds spent compressing. A
+    body sent from a precompressed cache entry adds to the bytes but not the
+    seconds. Bodies are compressed in worker threads, so the counts are
+    updated under a lock, and the seconds are those of the compressing
+    thread.
+    """
+
+    def __init__(
+        self,
+        encodings: tuple[str, ...],
+        min_bytes: int,
+        clock: Callable[[], float] = time.thread_time,
+    ):
+        self.encodings = encodings
+        self.min_bytes = min_bytes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.counts = {
+            encoding: {
+                "responses": 0,
+                "precompressed": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "seconds": 0.0,
+            }
+            for encoding in encodings
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.encodings)
+
+    def encoding_for(self, request_headers: Mapping[str, str], size: int) -> str | None:
+        """
+        The encoding for a body of size bytes, or None to send it as it is.
+        """
+        if size < self.min_bytes or not self.encodings:
+            return None
+        accepted = _accepted(request_headers.get("accept-encoding"))
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        started = self.clock()
+        compressed = CODINGS[encoding][0](body)
+        seconds = self.clock() - started
+        with self.lock:
+            self.counts[encoding]["seconds"] += seconds
+        return compressed
+
+    def encode(self, body: bytes, encoding: str | None) -> bytes:
+        """
+        body compressed with encoding, or as it is without one.
+        """
+        if encoding is None:
+            return body
+        compressed = self.compress(body, encoding)
+        self._count(encoding, len(body), compressed)
+        return compressed
+
+    def send_precompressed(self, compressed: bytes, encoding: str, size: int) -> bytes:
+        """
+        Counts compressed, a body of size bytes compressed with encoding
+        before, as sent, and returns it.
+        """
+        self._count(encoding, size, compressed, precompressed=1)
+        return compressed
+
+    def _count(
+        self, encoding: str, size: int, compressed: bytes, precompressed: int = 0
+    ) -> None:
+        with self.lock:
+            counts = self.counts[encoding]
+            counts["responses"] += 1
+            counts["precompressed"] += precompressed
+            counts["bytes_in"] += size
+            counts["bytes_out"] += len(compressed)
+
+    @property
+    def stats(self) -> dict:
+        with self.lock:
+            counts_by_encoding = {
+                encoding: dict(counts) for encoding, counts in self.counts.items()
+            }
+        return {
+            "encodings": list(self.encodings),
+            "min_bytes": self.min_bytes,
+            **{
+                encoding: {
+                    **counts,
+                    "ratio": round(counts["bytes_out"] / counts["bytes_in"], 3)
+                    if counts["bytes_in"]
+                    else None,
+                }
+                for encoding, counts in counts_by_encoding.items()
+            },
+        }
+
+
+def _accepted(accept_encoding: str | None) -> dict[str, float]:
+    """
+    The q of each coding in an Accept-Encoding header. A malformed q counts
+    as 0.
+    """
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def compression_for(settings: Services) -> Compression:
+    """
+    The compression the settings ask for. Encodings whose library isn't
+    installed are left out.
+    """
+    encodings = [
+        encoding.strip()
+        for encoding in settings.compression_encodings.split(",")
+        if encoding.strip()
+    ]
+    return Compression(
+        tuple(encoding for encoding in encodings if encoding in CODINGS),
+        min_bytes=settings.compression_min_bytes,
+    )
@@ -0,0 +1,82 @@
+import hashlib
+from collections.abc import Hashable, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+
+@dataclass(frozen=True)
+class Validators:
+    """
+    The ETag and Last-Modified of a record response. The ETag changes with
+    the solr _version_ and date_of_index of the record, and with the fields
+    the response has. It's weak: the same record in another content coding
+    has other bytes but the same ETag, since a 304 is decided before the
+    body, or its coding, is known.
+    """
+
+    etag: str
+    last_modified: datetime | None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def not_modified(self, request_headers: Mapping[str, str]) -> bool:
+        """
+        Whether the request's If-None-Match or, without one, its
+        If-Modified-Since says the client already has this response.
+        """
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, self.etag)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return self.last_modified.replace(microsecond=0) <= since
+
+
+def is_conditional(request_headers: Mapping[str, str]) -> bool:
+    return "if-none-match" in request_headers or "if-modified-since" in request_headers
+
+
+def validators_for(
+    id: str,
+    version: int | None,
+    date_of_index: str | None,
+    variant: Hashable = None,
+) -> Validators:
+    fields = "" if variant is None else ",".join(sorted(variant))
+    digest = hashlib.sha1(
+        f"{id}\n{version}\n{date_of_index}\n{fields}".encode("utf-8")
+    ).hexdigest()
+    return Validators(
+        etag=f'W/"{digest[:20]}"', last_modified=_parse_date(date_of_index)
+    )
+
+
+def _parse_date(date_of_index: str | None) -> datetime | None:
+    if not date_of_index:
+        return None
+    try:
+        return datetime.fromisoformat(date_of_index)
+    except ValueError:
+        return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, which ignores the W/ of both
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
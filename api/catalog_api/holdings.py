@@ -1,8 +1,13 @@
 import pymarc
+from collections.abc import Callable
 from urllib.parse import urlencode
 from dataclasses import dataclass
+from functools import cached_property
 from catalog_api.marc import Processor, FieldRuleset
 
+# Most items a page of /records/{id}/holdings can have
+MAX_PAGE_SIZE = 1000
+
 
 class AlmaDigitalItem:
     def __init__(self, alma_digital_item_data: dict):
@@ -106,10 +111,20 @@ class PhysicalLocation:
 
 
 class PhysicalItem:
-    def __init__(self, physical_item_data: dict, bib_id: str, record=None):
+    def __init__(
+        self,
+        physical_item_data: dict,
+        bib_id: str,
+        record=None,
+        aeon_record=None,
+    ):
         self.data = physical_item_data
         self.bib_id = bib_id
-        self.record = record
+        self.aeon_record = aeon_record or AeonRecord(record)
+
+    @property
+    def record(self):
+        return self.aeon_record.record
 
     @property
     def item_id(self):
@@ -155,7 +170,9 @@ class PhysicalItem:
     def url(self):
         if self.reservable:
             return ReservableItem.given(
-                physical_item_data=self.data, record=self.record
+                physical_item_data=self.data,
+                record=self.record,
+                aeon_record=self.aeon_record,
             ).url
             # send over the marc record to some classes that can parse the Reserve This item
         return f"https://search.lib.umich.edu/catalog/record/{self.bib_id}/get-this/{self.barcode}"
@@ -172,9 +189,157 @@ class PhysicalItem:
         )
 
 
+class AeonRecord:
+    """
+    The bib level fields of an Aeon request form. They are the same for every
+    reservable item of a record, so each is worked out from the MARC record
+    once, the first time an item needs it, and shared by all the items.
+
+    The rules come a spreadsheet in the issue SEARCH-1421
+
+    The MARC record can be given, or loaded by load_record the first time a
+    field needs it. load_processor gives the Processor of the record the
+    fields are read with, so they share its results with the record's other
+    rulesets; otherwise the AeonRecord makes its own.
+    """
+
+    def __init__(
+        self,
+        record: pymarc.Record | None = None,
+        load_record: Callable[[], pymarc.Record] | None = None,
+        load_processor: Callable[[], Processor] | None = None,
+    ):
+        if load_record is None:
+            self.record = record
+        self.load_record = load_record
+        self.load_processor = load_processor
+
+    @cached_property
+    def record(self):
+        return self.load_record()
+
+    @cached_property
+    def processor(self):
+        if self.load_processor is not None:
+            return self.load_processor()
+        return Processor(self.record)
+
+    TITLE_RULESETS = (FieldRuleset(tags=["245"], text_sfs="abk"),)
+
+    @cached_property
+    def title(self):
+        return self._format_paired_fields(self.TITLE_RULESETS)
+
+    AUTHOR_RULESETS = (
+        FieldRuleset(tags=["100", "110"], text_sfs="abcd"),
+        FieldRuleset(tags=["111"], text_sfs="anbc"),
+        FieldRuleset(tags=["130"], text_sfs="aplskf"),
+    )
+
+    @cached_property
+    def author(self):
+        return self._format_paired_fields(self.AUTHOR_RULESETS)
+
+    CLEMENTS_AUTHOR_RULESETS = (
+        FieldRuleset(tags=["100"], text_sfs="abcd"),
+        FieldRuleset(tags=["110"], text_sfs="ab"),
+        FieldRuleset(tags=["111"], text_sfs="acd"),
+        FieldRuleset(tags=["130"], text_sfs="aplskf"),
+    )
+
+    @cached_property
+    def clements_author(self):
+        return self._format_paired_fields(self.CLEMENTS_AUTHOR_RULESETS)
+
+    DATE_RULESETS = (
+        FieldRuleset(tags=["260", "264"], text_sfs="c"),
+        FieldRuleset(tags=["245"], text_sfs="f"),
+    )
+
+    @cached_property
+    def date(self):
+        fields = self.processor.generate_unpaired_fields(self.DATE_RULESETS)
+        if fields:
+            return "; ".join([str(f) for f in fields])
+
+    EDITION_RULESETS = (FieldRuleset(tags=["250"], text_sfs="a"),)
+
+    @cached_property
+    def edition(self):
+        return self._format_paired_fields(self.EDITION_RULESETS)
+
+    PUBLISHER_RULESETS = (FieldRuleset(tags=["260", "264"], text_sfs="b"),)
+
+    @cached_property
+    def publisher(self):
+        return self._format_paired_fields(self.PUBLISHER_RULESETS)
+
+    PLACE_RULESETS = (FieldRuleset(tags=["260", "264"], text_sfs="a"),)
+
+    @cached_property
+    def place(self):
+        return self._format_paired_fields(self.PLACE_RULESETS)
+
+    EXTENT_RULESETS = (FieldRuleset(tags=["300"], text_sfs="abcf"),)
+
+    @cached_property
+    def extent(self):
+        return self._format_paired_fields(self.EXTENT_RULESETS)
+
+    ISBN_RULESETS = (
+        FieldRuleset(tags=["020"], text_sfs=["a"]),
+        FieldRuleset(tags=["020"], text_sfs=["z"]),
+    )
+
+    @cached_property
+    def isbn(self):
+        """
+        This is from the Metadata Component spreadsheet
+        """
+        fields = self.processor.generate_unpaired_fields(self.ISBN_RULESETS)
+        if fields:
+            return str(fields[0])
+
+    ISSN_RULESETS = (
+        FieldRuleset(tags=["022"], text_sfs=["a"]),
+        FieldRuleset(tags=["022"], text_sfs=["y"]),
+        FieldRuleset(tags=["022"], text_sfs=["z"]),
+        FieldRuleset(tags=["776"], text_sfs=["x"]),
+    )
+
+    @cached_property
+    def issn(self):
+        """
+        This is from the Metadata Component spreadsheet
+        """
+        fields = self.processor.generate_unpaired_fields(self.ISSN_RULESETS)
+        if fields:
+            return str(fields[0])
+
+    @cached_property
+    def sysnum(self):
+        return self.record["001"].value()
+
+    def _format_paired_fields(self, rulesets, separator="; "):
+        paired_fields = self.processor.generate_paired_fields(rulesets)
+        return self._join_paired_fields(paired_fields, separator)
+
+    def _join_paired_fields(self, paired_fields, separator="; "):
+        if paired_fields:
+            return separator.join(
+                [self._join_paired_field(pf, separator) for pf in paired_fields]
+            )
+
+    def _join_paired_field(self, paired_field, separator="; "):
+        pf = [paired_field.original.text]
+        if paired_field.transliterated:
+            pf.append(paired_field.transliterated.text)
+        return separator.join(pf)
+
+
 class ReservableItem:
     @staticmethod
-    def given(physical_item_data, record):
+    def given(physical_item_data, record, aeon_record=None):
         match physical_item_data["library"]:
             case "BENT":
                 cls = BentleyItem
@@ -183,92 +348,57 @@ class ReservableItem:
             case _:
                 cls = ReservableItem
 
-        return cls(physical_item_data, record)
+        return cls(physical_item_data, record, aeon_record=aeon_record)
 
     """
-    The rules come a spreadsheet in the issue SEARCH-1421
+    The bib level fields come from aeon_record, which should be shared by the
+    items of a record. One is made for the item if it isn't given.
     """
 
-    def __init__(self, physical_item_data, record):
+    def __init__(self, physical_item_data, record, aeon_record=None):
         self.data = physical_item_data
         self.record = record
-        self.processor = Processor(record)
+        self.aeon_record = aeon_record or AeonRecord(record)
 
     @property
     def title(self):
-        rulesets = [FieldRuleset(tags=["245"], text_sfs="abk")]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.title
 
     @property
     def author(self):
-        rulesets = [
-            FieldRuleset(tags=["100", "110"], text_sfs="abcd"),
-            FieldRuleset(tags=["111"], text_sfs="anbc"),
-            FieldRuleset(tags=["130"], text_sfs="aplskf"),
-        ]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.author
 
     @property
     def date(self):
-        rulesets = [
-            FieldRuleset(tags=["260", "264"], text_sfs="c"),
-            FieldRuleset(tags=["245"], text_sfs="f"),
-        ]
-        fields = self.processor.generate_unpaired_fields(rulesets)
-        if fields:
-            return "; ".join([str(f) for f in fields])
+        return self.aeon_record.date
 
     @property
     def edition(self):
-        rulesets = [FieldRuleset(tags=["250"], text_sfs="a")]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.edition
 
     @property
     def publisher(self):
-        rulesets = [FieldRuleset(tags=["260", "264"], text_sfs="b")]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.publisher
 
     @property
     def place(self):
-        rulesets = [FieldRuleset(tags=["260", "264"], text_sfs="a")]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.place
 
     @property
     def extent(self):
-        rulesets = [FieldRuleset(tags=["300"], text_sfs="abcf")]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.extent
 
     @property
     def isbn(self):
-        """
-        This is from the Metadata Component spreadsheet
-        """
-        rulesets = [
-            FieldRuleset(tags=["020"], text_sfs=["a"]),
-            FieldRuleset(tags=["020"], text_sfs=["z"]),
-        ]
-        fields = self.processor.generate_unpaired_fields(rulesets)
-        if fields:
-            return str(fields[0])
+        return self.aeon_record.isbn
 
     @property
     def issn(self):
-        """
-        This is from the Metadata Component spreadsheet
-        """
-        rulesets = [
-            FieldRuleset(tags=["022"], text_sfs=["a"]),
-            FieldRuleset(tags=["022"], text_sfs=["y"]),
-            FieldRuleset(tags=["022"], text_sfs=["z"]),
-            FieldRuleset(tags=["776"], text_sfs=["x"]),
-        ]
-        fields = self.processor.generate_unpaired_fields(rulesets)
-        if fields:
-            return str(fields[0])
+        return self.aeon_record.issn
 
     @property
     def sysnum(self):
-        return self.record["001"].value()
+        return self.aeon_record.sysnum
 
     @property
     def genre(self):
@@ -331,22 +461,6 @@ class ReservableItem:
     def base_url(self):
         return "https://aeon.lib.umich.edu/logon?"
 
-    def _format_paired_fields(self, rulesets, separator="; "):
-        paired_fields = self.processor.generate_paired_fields(rulesets)
-        return self._join_paired_fields(paired_fields, separator)
-
-    def _join_paired_fields(self, paired_fields, separator="; "):
-        if paired_fields:
-            return separator.join(
-                [self._join_paired_field(pf, separator) for pf in paired_fields]
-            )
-
-    def _join_paired_field(self, paired_field, separator="; "):
-        pf = [paired_field.original.text]
-        if paired_field.transliterated:
-            pf.append(paired_field.transliterated.text)
-        return separator.join(pf)
-
 
 class BentleyItem(ReservableItem):
     def base_url(self):
@@ -359,13 +473,7 @@ class ClementsItem(ReservableItem):
 
     @property
     def author(self):
-        rulesets = [
-            FieldRuleset(tags=["100"], text_sfs="abcd"),
-            FieldRuleset(tags=["110"], text_sfs="ab"),
-            FieldRuleset(tags=["111"], text_sfs="acd"),
-            FieldRuleset(tags=["130"], text_sfs="aplskf"),
-        ]
-        return self._format_paired_fields(rulesets)
+        return self.aeon_record.clements_author
 
     @property
     def genre(self):
@@ -383,11 +491,78 @@ class ClementsItem(ReservableItem):
         return mapping.get(value)
 
 
+@dataclass(frozen=True)
+class HoldingsView:
+    """
+    The part of a record's holdings a response shows. With a limit, the items
+    of each physical holding and the HathiTrust items are paged: only the
+    limit items from offset on are built, and the response also has the
+    item counts and a link to the next page. library, location and
+    holding_id narrow the physical holdings; the other kinds aren't
+    affected.
+    """
+
+    offset: int = 0
+    limit: int | None = None
+    library: str | None = None
+    location: str | None = None
+    holding_id: str | None = None
+
+    @property
+    def paged(self) -> bool:
+        return self.limit is not None
+
+    def page(self, items: list) -> list:
+        if self.limit is None:
+            return items[self.offset :]
+        return items[self.offset : self.offset + self.limit]
+
+    def next_page_link(self, bib_id: str, count: int, holding_id=None) -> str | None:
+        """
+        The holdings endpoint's link to the items after this page. Its limit
+        is kept within what the endpoint accepts.
+        """
+        if self.limit is None or self.offset + self.limit >= count:
+            return None
+        params = {
+            "offset": self.offset + self.limit,
+            "limit": min(max(self.limit, 1), MAX_PAGE_SIZE),
+        }
+        if holding_id is not None:
+            params = {"holding_id": holding_id, **params}
+        return f"/records/{bib_id}/holdings?{urlencode(params)}"
+
+    def shows(self, physical_holding: dict) -> bool:
+        return (
+            (self.library is None or physical_holding.get("library") == self.library)
+            and (
+                self.location is None
+                or physical_holding.get("location") == self.location
+            )
+            and (
+                self.holding_id is None
+                or physical_holding.get("hol_mmsid") == self.holding_id
+            )
+        )
+
+
 class PhysicalHolding:
-    def __init__(self, physical_holding_data: list, bib_id: str, record: pymarc.Record):
+    def __init__(
+        self,
+        physical_holding_data: list,
+        bib_id: str,
+        record: pymarc.Record,
+        aeon_record: AeonRecord | None = None,
+        view: HoldingsView = HoldingsView(),
+    ):
         self.data = physical_holding_data
         self.bib_id = bib_id
-        self.record = record
+        self.aeon_record = aeon_record or AeonRecord(record)
+        self.view = view
+
+    @property
+    def record(self):
+        return self.aeon_record.record
 
     @property
     def holding_id(self):
@@ -416,13 +591,24 @@ class PhysicalHolding:
             ),
         )
 
-    @property
+    @cached_property
     def items(self):
         return [
-            PhysicalItem(item, bib_id=self.bib_id, record=self.record)
-            for item in self.data.get("items", [])
+            PhysicalItem(item, bib_id=self.bib_id, aeon_record=self.aeon_record)
+            for item in self.view.page(self.data.get("items", []))
         ]
 
+    @property
+    def item_count(self) -> int | None:
+        if self.view.paged:
+            return len(self.data.get("items", []))
+
+    @property
+    def items_link(self) -> str | None:
+        return self.view.next_page_link(
+            self.bib_id, len(self.data.get("items", [])), self.holding_id
+        )
+
 
 class FindingAids:
     def __init__(self, items: list, physical_holding: dict):
@@ -486,81 +672,153 @@ def kind_of_holding(holding_item: dict):
             return "physical"
 
 
+HOLDING_KINDS = ("physical", "electronic", "finding_aid", "alma_digital", "hathi_trust")
+
+
+def holdings_by_kind(holdings_data: list) -> dict[str, list[dict]]:
+    """
+    The holdings sorted into a list per kind_of_holding, in one pass and in
+    their original order.
+    """
+    kinds = {kind: [] for kind in HOLDING_KINDS}
+    for holding_item in holdings_data:
+        kinds[kind_of_holding(holding_item)].append(holding_item)
+    return kinds
+
+
 def physical_holdings(
-    holdings_data: list, bib_id: str, record
+    holdings_data: list,
+    bib_id: str,
+    record,
+    aeon_record: AeonRecord | None = None,
+    view: HoldingsView = HoldingsView(),
 ) -> list[PhysicalHolding]:
+    """
+    holdings_data is the physical holdings of holdings_by_kind; the same goes
+    for the other functions below and their kind.
+    """
+    aeon_record = aeon_record or AeonRecord(record)
     return [
-        PhysicalHolding(holding_item, bib_id=bib_id, record=record)
+        PhysicalHolding(
+            holding_item,
+            bib_id=bib_id,
+            record=record,
+            aeon_record=aeon_record,
+            view=view,
+        )
         for holding_item in holdings_data
-        if kind_of_holding(holding_item) == "physical"
+        if view.shows(holding_item)
     ]
 
 
 def electronic_items(holdings_data: list) -> list[ElectronicItem]:
-    return [
-        ElectronicItem(holding_item)
-        for holding_item in holdings_data
-        if kind_of_holding(holding_item) == "electronic"
-    ]
-
+    return [ElectronicItem(holding_item) for holding_item in holdings_data]
 
-def finding_aids(holdings_data: list) -> list[FindingAidItem]:
-    physical_holding = None
-    for holding in holdings_data:
-        if holding.get("record_has_finding_aid"):
-            physical_holding = holding
 
-    items = [
-        holding_item
-        for holding_item in holdings_data
-        if kind_of_holding(holding_item) == "finding_aid"
-    ]
+def finding_aids(items: list, physical_holding: dict | None) -> FindingAids | None:
     if items:
         return FindingAids(physical_holding=physical_holding, items=items)
 
 
 def alma_digital_items(holdings_data: list) -> list[AlmaDigitalItem]:
-    return [
-        AlmaDigitalItem(holding_item)
-        for holding_item in holdings_data
-        if kind_of_holding(holding_item) == "alma_digital"
-    ]
+    return [AlmaDigitalItem(holding_item) for holding_item in holdings_data]
 
 
-def hathi_trust_items(holdings_data: list) -> list[HathiTrustItem]:
-    ht_holding = None
-    for holding_item in holdings_data:
-        if kind_of_holding(holding_item) == "hathi_trust":
-            ht_holding = holding_item
-
-    if ht_holding:
-        return [HathiTrustItem(item) for item in ht_holding["items"]]
+def hathi_trust_items(
+    holdings_data: list, view: HoldingsView = HoldingsView()
+) -> list[HathiTrustItem]:
+    if holdings_data:
+        return [HathiTrustItem(item) for item in view.page(holdings_data[-1]["items"])]
     else:
         return []
 
 
 class Holdings:
-    def __init__(self, holdings_data: list, bib_id: str, record: pymarc.Record):
+    """
+    The holdings are sorted by kind once, and each kind is built the first
+    time it's read. view picks the part of them that is built.
+
+    Only the Aeon links of reservable items need the MARC record. It can be
+    given, or loaded by load_record the first time one of them is made.
+    """
+
+    def __init__(
+        self,
+        holdings_data: list,
+        bib_id: str,
+        record: pymarc.Record | None = None,
+        view: HoldingsView = HoldingsView(),
+        load_record: Callable[[], pymarc.Record] | None = None,
+        load_processor: Callable[[], Processor] | None = None,
+    ):
         self.data = holdings_data
         self.bib_id = bib_id
-        self.record = record
+        self.view = view
+        self.aeon_record = AeonRecord(
+            record, load_record=load_record, load_processor=load_processor
+        )
 
     @property
+    def record(self):
+        return self.aeon_record.record
+
+    @property
+    def has_reservable_items(self) -> bool:
+        """
+        Whether any item the view shows can be reserved, which is when the
+        MARC record is needed.
+        """
+        return any(
+            item.get("can_reserve")
+            for holding in self.by_kind["physical"]
+            if self.view.shows(holding)
+            for item in self.view.page(holding.get("items", []))
+        )
+
+    @cached_property
+    def by_kind(self) -> dict[str, list[dict]]:
+        return holdings_by_kind(self.data)
+
+    @cached_property
     def hathi_trust_items(self):
-        return hathi_trust_items(self.data)
+        return hathi_trust_items(self.by_kind["hathi_trust"], self.view)
 
     @property
-    def alma_digital_items(self):
-        return alma_digital_items(self.data)
+    def hathi_trust_item_count(self) -> int | None:
+        if self.view.paged:
+            return len(self._hathi_trust_items_data)
 
     @property
-    def electronic_items(self):
-        return electronic_items(self.data)
+    def hathi_trust_items_link(self) -> str | None:
+        return self.view.next_page_link(self.bib_id, len(self._hathi_trust_items_data))
 
     @property
+    def _hathi_trust_items_data(self) -> list:
+        ht_holdings = self.by_kind["hathi_trust"]
+        return ht_holdings[-1]["items"] if ht_holdings else []
+
+    @cached_property
+    def alma_digital_items(self):
+        return alma_digital_items(self.by_kind["alma_digital"])
+
+    @cached_property
+    def electronic_items(self):
+        return electronic_items(self.by_kind["electronic"])
+
+    @cached_property
     def finding_aids(self):
-        return finding_aids(self.data)
+        # The last holding saying the record has a finding aid, whatever its kind
+        physical_holding = next(
+            (h for h in reversed(self.data) if h.get("record_has_finding_aid")), None
+        )
+        return finding_aids(self.by_kind["finding_aid"], physical_holding)
 
-    @property
+    @cached_property
     def physical(self):
-        return physical_holdings(self.data, self.bib_id, self.record)
+        return physical_holdings(
+            self.by_kind["physical"],
+            self.bib_id,
+            record=None,
+            aeon_record=self.aeon_record,
+            view=self.view,
+        )
@@ -1,31 +1,560 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
+import json
+import logging
+import random
+import secrets
+import anyio
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from pydantic import BaseModel
 from catalog_api import schemas
-from catalog_api.solr_client import NotFoundError
-from catalog_api.record import record_for
+from catalog_api.cache import (
+    BACKEND_ERRORS,
+    CachedRecord,
+    MissingRecordCache,
+    record_cache_for,
+)
+from catalog_api.compression import compression_for
+from catalog_api.conditional import is_conditional, validators_for
+from catalog_api.encoder import dump, encode, validated
+from catalog_api.holdings import MAX_PAGE_SIZE, HoldingsView
+from catalog_api.marc import marc_parser
+from catalog_api.services import S
+from catalog_api.solr_client import NotFoundError, solr_pool
+from catalog_api.record import (
+    holdings_for,
+    record_for,
+    record_version_for,
+    records_for,
+    solr_fields,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fails startup if the record builder and the response schema disagree,
+    # or if MARC_PARSER names a parser that isn't available
+    solr_fields()
+    marc_parser(S.marc_parser)
+    solr_pool.open()
+    yield
+    await solr_pool.close()
+    await record_cache.close()
+
 
 app = FastAPI(
-    title="Catalog Search API", description="REST API for Catalog Search Solr"
+    title="Catalog Search API",
+    description="REST API for Catalog Search Solr",
+    lifespan=lifespan,
+)
+
+record_cache = record_cache_for(S)
+missing_records = MissingRecordCache(
+    id_pattern=S.record_id_pattern,
+    max_entries=S.missing_record_cache_max_entries,
+    ttl=S.missing_record_cache_ttl,
 )
+compression = compression_for(S)
+# Records built for responses, and the rulesets their processors evaluated
+record_builds = {"records": 0, "ruleset_evaluations": 0}
+
+
+def record_schema(
+    fields: str | None, exclude: str | None, marc: str = "json"
+) -> type[BaseModel]:
+    """
+    The Record schema, or a partial one when the request asks for a subset
+    of fields or another form of marc. id is always included.
+    """
+    if fields is None and exclude is None and marc == "json":
+        return schemas.Record
+
+    selected = set(schemas.Record.model_fields)
+    if fields is not None:
+        selected = _field_names(fields)
+    if exclude is not None:
+        selected = selected - _field_names(exclude)
+    if marc == "none":
+        selected = selected - {"marc"}
+    return schemas.partial_record(frozenset(selected | {"id"}), raw_marc=marc == "raw")
+
+
+def _field_names(value: str) -> set[str]:
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(schemas.Record.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return names
+
+
+def cache_variant(
+    schema: type[BaseModel], max_items: int | None = None
+) -> frozenset | None:
+    """
+    Tells apart cached responses for the same record with different fields
+    or a different max_items.
+    """
+    if schema is schemas.Record and max_items is None:
+        return None
+    variant = frozenset(schema.model_fields)
+    if max_items is not None:
+        variant |= {f"max_items={max_items}"}
+    return variant
+
+
+logger = logging.getLogger(__name__)
+
+
+def count_evaluations(record) -> None:
+    """
+    Adds the rulesets record's processor evaluated to record_builds, and
+    logs them at debug level. A record whose response read no MARC fields
+    has no processor, and evaluated none.
+    """
+    processor = record.__dict__.get("processor")
+    evaluations = 0 if processor is None else processor.evaluations
+    record_builds["records"] += 1
+    record_builds["ruleset_evaluations"] += evaluations
+    logger.debug("Record %s took %d ruleset evaluations", record.id, evaluations)
+
+
+def serialize_record(record, schema: type[BaseModel]) -> bytes:
+    """
+    Serializes the record with schema. Only the properties in the schema are
+    evaluated, so fields that weren't asked for cost nothing.
+
+    The JSON is built straight from the record without validating it with
+    schema. STRICT_RESPONSE_RATE of the responses are validated as well; if
+    the two disagree the validated one is sent and the difference logged.
+    """
+    body = encode(dump(record, schema))
+    if S.strict_response_rate and random.random() < S.strict_response_rate:
+        strict_body = validated(record, schema)
+        if strict_body != body:
+            logger.warning(
+                "%s serialized differently without validation", schema.__name__
+            )
+            return strict_body
+    return body
+
+
+def json_response(
+    body: bytes, headers: dict | None = None, encoding: str | None = None
+) -> Response:
+    """
+    A JSON response of body, which is compressed with encoding if there is
+    one. The ETag is the same weak one for every encoding: a 304 is sent
+    without building the body, so without knowing how it would be
+    compressed.
+    """
+    headers = vary(headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=vary(headers))
+
+
+def vary(headers: dict | None) -> dict:
+    """
+    headers with Vary: Accept-Encoding if responses can be compressed. A 304
+    has it too, like the 200 it stands for.
+    """
+    headers = dict(headers or {})
+    if compression.enabled:
+        headers["Vary"] = "Accept-Encoding"
+    return headers
+
+
+async def compressed_response(
+    request: Request, body: bytes, headers: dict | None = None
+) -> Response:
+    """
+    A JSON response of body in the encoding the request accepts. Compressing
+    it is done in a worker thread.
+    """
+    encoding = compression.encoding_for(request.headers, len(body))
+    if encoding is not None:
+        body = await anyio.to_thread.run_sync(compression.encode, body, encoding)
+    return json_response(body, headers, encoding)
+
+
+async def cached_response(
+    request: Request, cached: CachedRecord, headers: dict | None = None
+) -> Response:
+    """
+    A JSON response of a cached record. One stored compressed in the
+    encoding the request accepts is sent as stored, without decompressing
+    it. Otherwise the body is decompressed, if the entry only has it
+    compressed, and compressed again in a worker thread.
+    """
+    encoding = compression.encoding_for(request.headers, cached.body_size)
+    if encoding in cached.compressed:
+        content = compression.send_precompressed(
+            cached.compressed[encoding], encoding, cached.body_size
+        )
+    elif encoding is None and cached.uncompressed is not None:
+        content = cached.uncompressed
+    else:
+        content = await anyio.to_thread.run_sync(
+            lambda: compression.encode(cached.body, encoding)
+        )
+    return json_response(content, headers, encoding)
+
+
+def render_record(
+    record, schema: type[BaseModel], request_headers
+) -> tuple[bytes, str | None, bytes]:
+    """
+    The body of record serialized with schema, the encoding the request
+    accepts, and the body in that encoding. Records are built lazily, so
+    this is where the MARC record is parsed and the fields evaluated; the
+    endpoints run it in a worker thread to keep that CPU work off the event
+    loop.
+    """
+    body = serialize_record(record, schema)
+    encoding = compression.encoding_for(request_headers, len(body))
+    return body, encoding, compression.encode(body, encoding)
+
+
+FieldsQuery = Annotated[
+    str | None,
+    Query(description="Comma separated fields to return. Defaults to all of them."),
+]
+ExcludeQuery = Annotated[
+    str | None, Query(description="Comma separated fields to leave out.")
+]
+MarcQuery = Annotated[
+    Literal["json", "raw", "none"],
+    Query(
+        description="json is the MARC record as MARC-in-JSON, raw is the MARCXML solr has, passed through without parsing, and none leaves it out.",
+    ),
+]
+MaxItemsQuery = Annotated[
+    int | None,
+    Query(
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Most items to embed per physical holding and of the HathiTrust items. Capped lists come with the item count and a link to the rest.",
+    ),
+]
 
 
 @app.get(
     "/records/{id}",
     responses={
+        400: {
+            "description": "Bad request: the id is malformed, or fields or exclude has an unknown field",
+            "model": schemas.Response,
+        },
+        304: {"description": "The record hasn't changed since the client's copy"},
         404: {
             "description": "Bad request: The record was not found",
             "model": schemas.Response404,
-        }
+        },
     },
     response_model_exclude_none=True,
 )
-def get_record(id: str) -> schemas.Record:
+async def get_record(
+    id: str,
+    request: Request,
+    fields: FieldsQuery = None,
+    exclude: ExcludeQuery = None,
+    marc: MarcQuery = "json",
+    max_items: MaxItemsQuery = None,
+) -> schemas.Record:
     """
     Gets a record from catalog solr. The record is fetched by the solr id, which
     is the mms_id for an Alma record or a htid with a 11 prefix for a HathiTrust
     record
+
+    Responses have an ETag and a Last-Modified. A request with a matching
+    If-None-Match or a later If-Modified-Since gets a 304, which only needs
+    the record's _version_ and date_of_index from solr.
     """
+    schema = record_schema(fields, exclude, marc)
+    if missing_records.is_malformed(id):
+        raise HTTPException(status_code=400, detail="Malformed record id")
+    if missing_records.is_missing(id):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    variant = cache_variant(schema, max_items)
+    cached = await record_cache.get(id, variant)
+    if cached is not None:
+        validators = validators_for(id, cached.version, cached.date_of_index, variant)
+        if validators.not_modified(request.headers):
+            return not_modified_response(validators.headers)
+        return await cached_response(request, cached, validators.headers)
+
     try:
-        result = record_for(id)
-        return result
+        if is_conditional(request.headers):
+            doc = await record_version_for(id)
+            validators = validators_for(
+                id, doc.get("_version_"), doc.get("date_of_index"), variant
+            )
+            if validators.not_modified(request.headers):
+                return not_modified_response(validators.headers)
+        result = await record_for(id, schema, HoldingsView(limit=max_items))
     except NotFoundError:
+        missing_records.add(id)
         raise HTTPException(status_code=404, detail="Item not found")
+    # Compressed once, for the response and the cache entry
+    body, encoding, content = await anyio.to_thread.run_sync(
+        render_record, result, schema, request.headers
+    )
+    count_evaluations(result)
+    await record_cache.set(
+        id,
+        body,
+        result.indexing_date,
+        variant,
+        version=result.solr_version,
+        compressed={encoding: content} if encoding is not None else None,
+    )
+    validators = validators_for(id, result.solr_version, result.indexing_date, variant)
+    return json_response(content, validators.headers, encoding)
+
+
+@app.get(
+    "/records/{id}/holdings",
+    responses={
+        400: {
+            "description": "Bad request: the id is malformed",
+            "model": schemas.Response,
+        },
+        404: {
+            "description": "Bad request: The record was not found",
+            "model": schemas.Response404,
+        },
+    },
+    response_model_exclude_none=True,
+)
+async def get_holdings(
+    id: str,
+    request: Request,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 10,
+    library: str | None = None,
+    location: str | None = None,
+    holding_id: str | None = None,
+) -> schemas.Holdings:
+    """
+    Gets the holdings of a record, with a page of the items of each physical
+    holding and of the HathiTrust items. Each paged list comes with its item
+    count and, if there are more, a link to the next page. library, location
+    and holding_id narrow the physical holdings. The MARC record is only
+    fetched if an item on the page can be reserved.
+    """
+    if missing_records.is_malformed(id):
+        raise HTTPException(status_code=400, detail="Malformed record id")
+    if missing_records.is_missing(id):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    view = HoldingsView(
+        offset=offset,
+        limit=limit,
+        library=library,
+        location=location,
+        holding_id=holding_id,
+    )
+    try:
+        result = await holdings_for(id, view)
+    except NotFoundError:
+        missing_records.add(id)
+        raise HTTPException(status_code=404, detail="Item not found")
+    _, encoding, content = await anyio.to_thread.run_sync(
+        render_record, result, schemas.Holdings, request.headers
+    )
+    return json_response(content, encoding=encoding)
+
+
+@app.post(
+    "/records:batch",
+    responses={
+        400: {
+            "description": "Bad request: fields or exclude has an unknown field",
+            "model": schemas.Response,
+        },
+    },
+    response_model_exclude_none=True,
+)
+async def get_records(
+    batch: schemas.RecordsBatchRequest,
+    request: Request,
+    fields: FieldsQuery = None,
+    exclude: ExcludeQuery = None,
+    marc: MarcQuery = "json",
+) -> schemas.RecordsBatch:
+    """
+    Gets up to 100 records with one solr request. Records come back in the
+    order of ids. An id that isn't found gets a 404 status in its place, and
+    a malformed one a 400 status, instead of failing the whole batch.
+    """
+    schema = record_schema(fields, exclude, marc)
+    variant = cache_variant(schema)
+    bodies = {}
+    malformed = set()
+    wanted = []
+    for id in dict.fromkeys(batch.ids):
+        if missing_records.is_malformed(id):
+            malformed.add(id)
+        elif not missing_records.is_missing(id):
+            wanted.append(id)
+    cached = await record_cache.get_many(wanted, variant)
+    uncached = [id for id in wanted if id not in cached]
+    if cached:
+        # Entries of the shared cache are decompressed here
+        bodies = await anyio.to_thread.run_sync(
+            lambda: {id: entry.body for id, entry in cached.items()}
+        )
+
+    if uncached:
+        records = await records_for(uncached, schema)
+        serialized = await anyio.to_thread.run_sync(
+            lambda: {id: serialize_record(records[id], schema) for id in records}
+        )
+        stored = {}
+        for id in uncached:
+            if id not in records:
+                missing_records.add(id)
+                continue
+            count_evaluations(records[id])
+            bodies[id] = serialized[id]
+            stored[id] = (
+                bodies[id],
+                records[id].indexing_date,
+                records[id].solr_version,
+            )
+        await record_cache.set_many(stored, variant)
+
+    results = []
+    for id in batch.ids:
+        if id in bodies:
+            results.append(
+                b'{"id":%s,"status":200,"record":%s}' % (_json_string(id), bodies[id])
+            )
+        elif id in malformed:
+            results.append(
+                b'{"id":%s,"status":400,"detail":"Malformed record id"}'
+                % _json_string(id)
+            )
+        else:
+            results.append(
+                b'{"id":%s,"status":404,"detail":"Item not found"}' % _json_string(id)
+            )
+    return await compressed_response(request, b'{"records":[%s]}' % b",".join(results))
+
+
+def _json_string(value: str) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def require_admin_token(authorization: Annotated[str | None, Header()] = None):
+    """
+    The /admin endpoints need an Authorization header with the ADMIN_TOKEN
+    as a bearer token. Without an ADMIN_TOKEN they're turned off.
+    """
+    if not S.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are turned off")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), S.admin_token.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Not authorized",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+admin = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(require_admin_token)],
+    responses={
+        401: {"description": "Missing or wrong admin token", "model": schemas.Response},
+        403: {"description": "No ADMIN_TOKEN is set", "model": schemas.Response},
+    },
+)
+
+
+async def flushed(flush) -> None:
+    """
+    Awaits flush, a call that drops record cache entries. A shared cache
+    whose backend can't be reached gets a 503, as its entries may still be
+    there.
+    """
+    try:
+        await flush
+    except BACKEND_ERRORS:
+        logger.warning("The record cache could not be flushed", exc_info=True)
+        raise HTTPException(status_code=503, detail="The record cache can't be reached")
+
+
+@admin.get("/cache")
+def get_cache_stats() -> dict:
+    """
+    Hit and miss counts of the record cache. The in-process cache also reports
+    its size, evictions and expirations. missing_records counts the requests
+    for malformed ids and for ids solr recently reported missing.
+    record_builds counts the records built on a miss and the MARC rulesets
+    evaluated for them.
+    """
+    return {
+        **record_cache.stats,
+        "missing_records": missing_records.stats,
+        "record_builds": record_builds,
+    }
+
+
+@admin.delete(
+    "/cache",
+    status_code=204,
+    responses={503: {"description": "The record cache can't be reached"}},
+)
+async def flush_cache() -> None:
+    """
+    Empties the record cache and forgets the ids solr reported missing.
+    """
+    missing_records.clear()
+    await flushed(record_cache.clear())
+
+
+@admin.delete(
+    "/cache/{id}",
+    status_code=204,
+    responses={503: {"description": "The record cache can't be reached"}},
+)
+async def flush_cached_record(id: str) -> None:
+    """
+    Drops every cached response for one record, or forgets that it was
+    missing.
+    """
+    missing_records.discard(id)
+    await flushed(record_cache.delete(id))
+
+
+@admin.get("/compression")
+def get_compression_stats() -> dict:
+    """
+    The encodings responses can be compressed with and the size below which
+    they aren't. For each encoding: the responses sent with it, how many came
+    compressed from the record cache, their bytes before and after
+    compression, and the CPU seconds spent compressing.
+    """
+    return compression.stats
+
+
+app.include_router(admin)
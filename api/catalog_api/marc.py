@@ -1,9 +1,707 @@
 import pymarc
+import io
+import json
+from array import array
 from dataclasses import dataclass
+from functools import cached_property
+from itertools import accumulate
+from operator import itemgetter
 import re
 import string
+import sys
+import xml.etree.ElementTree as ElementTree
 from collections.abc import Callable
 from catalog_api.entities import SearchField, FieldElement, PairedField
+from catalog_api.services import S
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - lxml is a dependency
+    lxml_etree = None
+
+
+def parse_marcxml(xml: str) -> pymarc.Record:
+    """
+    Parses the MARCXML stored in a solr document's fullrecord field. This is
+    the most expensive step in building a record, so it should happen once per
+    solr document and the result shared. The parser is picked with the
+    MARC_PARSER setting; see MARC_PARSERS.
+    """
+    return marc_parser(S.marc_parser)(xml)
+
+
+def parse_marcxml_with_pymarc(xml: str) -> pymarc.Record:
+    """
+    pymarc's own parser: a SAX handler over a copy of the string.
+    """
+    return pymarc.parse_xml_to_array(io.StringIO(xml))[0]
+
+
+def parse_marcxml_with_etree(xml: str) -> pymarc.Record:
+    """
+    Builds the same record pymarc.parse_xml_to_array would from a tree that
+    the C ElementTree parser makes straight from the string.
+    """
+    return _record_from_tree(ElementTree.fromstring(xml))
+
+
+def parse_marcxml_with_lxml(xml: str) -> pymarc.Record:
+    """
+    Like parse_marcxml_with_etree, with lxml's parser. lxml won't parse a
+    str with an encoding declaration, so the string is encoded first.
+    """
+    return _record_from_tree(lxml_etree.fromstring(xml.encode("utf-8")))
+
+
+def parse_marcxml_with_compact(xml: str) -> "CompactRecord":
+    """
+    Parses into a CompactRecord with the C ElementTree parser, without making
+    a tree: the parser's events go straight into the record's arrays, so no
+    object is made per element, field or subfield.
+    """
+    parser = ElementTree.XMLParser(target=_CompactRecordTarget())
+    parser.feed(xml)
+    return parser.close()
+
+
+MARC_PARSERS = {
+    "pymarc": parse_marcxml_with_pymarc,
+    "etree": parse_marcxml_with_etree,
+    "lxml": parse_marcxml_with_lxml,
+    "compact": parse_marcxml_with_compact,
+}
+
+
+def marc_parser(name: str) -> Callable[[str], "pymarc.Record | CompactRecord"]:
+    """
+    The MARCXML parser called name. Raises ValueError for a parser that
+    doesn't exist or, for lxml, isn't installed.
+    """
+    if name not in MARC_PARSERS:
+        raise ValueError(
+            f"Unknown MARC parser {name!r}; expected one of {', '.join(MARC_PARSERS)}"
+        )
+    if name == "lxml" and lxml_etree is None:
+        raise ValueError("The lxml MARC parser needs lxml to be installed")
+    return MARC_PARSERS[name]
+
+
+def _local_name(tag) -> str | None:
+    # lxml gives comments and processing instructions a function for a tag
+    if not isinstance(tag, str):
+        return None
+    return tag.rpartition("}")[2]
+
+
+def _record_from_tree(root) -> pymarc.Record:
+    """
+    The first record element of a parsed MARCXML document, as a
+    pymarc.Record. Like pymarc's (non-strict) handler, elements are matched by
+    local name whatever their namespace.
+    """
+    element = next((e for e in root.iter() if _local_name(e.tag) == "record"), None)
+    if element is None:
+        raise ValueError("The MARCXML has no record")
+    # A document uses a handful of tags, so each is only split once
+    names = {}
+    record = pymarc.Record()
+    for child in element:
+        tag = child.tag
+        name = names.get(tag)
+        if name is None:
+            name = names[tag] = _local_name(tag)
+        if name == "leader":
+            record.leader = pymarc.Leader(child.text or "")
+        else:
+            field = _field_from_element(child, name, names)
+            if field is not None:
+                record.fields.append(field)
+    return record
+
+
+def _field_from_element(element, name: str, names: dict) -> pymarc.Field | None:
+    if name == "datafield":
+        field = pymarc.Field(
+            element.get("tag"),
+            pymarc.Indicators(element.get("ind1", " "), element.get("ind2", " ")),
+        )
+        if not field.control_field:
+            subfields = []
+            for subfield in element:
+                tag = subfield.tag
+                name = names.get(tag)
+                if name is None:
+                    name = names[tag] = _local_name(tag)
+                if name == "subfield":
+                    subfields.append(
+                        pymarc.Subfield(subfield.get("code"), subfield.text or "")
+                    )
+            field.subfields = subfields
+        return field
+    if name == "controlfield":
+        field = pymarc.Field(element.get("tag"))
+        field.data = element.text or ""
+        return field
+    return None
+
+
+_RECORD_ELEMENT = re.compile(r"<((?:[\w.-]+:)?)record\b[^>]*(?<!/)>")
+# The tag attribute of a controlfield's or datafield's start tag. Text can't
+# have a "<" in it, so "tag=" in a subfield's text doesn't match, even with a
+# ">" after it; only CDATA sections, comments and processing instructions
+# can, and records with those aren't indexed.
+_TAG_ATTRIBUTE = re.compile(
+    r"""<(?:[\w.-]+:)?(?:control|data)field\b[^<>]*?\btag\s*=\s*(["'])([^"'<>]*)\1"""
+)
+_HIDDEN_MARKUP = re.compile(r"<[!?]")
+_NAMESPACE_ATTRIBUTE = re.compile(r"""\b(xmlns(?::[\w.-]+)?)\s*=\s*(["'])(.*?)\2""")
+
+
+def _normalized_tag(tag: str) -> str:
+    # The tag pymarc.Field gives a field made with tag
+    try:
+        return f"{int(tag):03}"
+    except ValueError:
+        return tag
+
+
+class LazyRecord:
+    """
+    A MARCXML record that's only parsed as far as it's read. Making one scans
+    the string once, with regular expressions, for where each field starts
+    and ends, by tag. get_fields then parses just the fields with the tags
+    asked for, so a request that reads a few tags of a large record only
+    pays for those. Anything else a pymarc.Record has (fields, leader,
+    as_json ...) parses the whole record with parse_marcxml.
+    """
+
+    def __init__(self, xml: str):
+        self.xml = xml
+        # tag -> [[position, start, end]] of its fields' tag attributes and
+        # the next field's, or the record's end
+        self.offsets: dict[str, list[list[int]]] = {}
+        # tag -> [(position, field)]
+        self._fields: dict[str, list[tuple]] = {}
+        match = _RECORD_ELEMENT.search(xml)
+        end = xml.find(f"</{match.group(1)}record", match.end()) if match else -1
+        if end == -1 or _HIDDEN_MARKUP.search(xml, match.end(), end):
+            # Nothing to index, or CDATA, comments or processing instructions
+            # that could hide markup; everything is read from the parsed record
+            self._namespaces = ""
+            self._indexed = False
+            return
+        self._indexed = True
+        declarations = dict(
+            (m.group(1), m.group(0))
+            for m in _NAMESPACE_ATTRIBUTE.finditer(xml, 0, match.end())
+        )
+        self._namespaces = " ".join(declarations.values())
+        # A field runs until the next one starts, or the record ends. Only
+        # where the tag attributes are is kept here; _parse finds the "<"
+        # before them.
+        self._end = end
+        previous = None
+        for position, tag in enumerate(_TAG_ATTRIBUTE.finditer(xml, match.end(), end)):
+            if previous is not None:
+                previous[2] = tag.start(2)
+            previous = [position, tag.start(2), end]
+            self.offsets.setdefault(_normalized_tag(tag.group(2)), []).append(previous)
+
+    def positioned_fields(self, tag: str) -> list[tuple]:
+        """
+        The fields with tag, each with its position among all of the
+        record's fields.
+        """
+        fields = self._fields.get(tag)
+        if fields is None:
+            if self._indexed and tag in self.offsets:
+                try:
+                    fields = self._parse(self.offsets[tag])
+                except ElementTree.ParseError:
+                    # The scan went wrong somewhere; stop trusting it
+                    self._indexed = False
+                    self._fields.clear()
+            if not self._indexed:
+                fields = [
+                    (position, field)
+                    for position, field in enumerate(self.record.fields)
+                    if field.tag == tag
+                ]
+            elif fields is None:
+                fields = []
+            self._fields[tag] = fields
+        return fields
+
+    def get_fields(self, *tags) -> list:
+        """
+        The fields with any of tags in record order, like
+        pymarc.Record.get_fields. With no tags, every field.
+        """
+        if not tags:
+            return self.record.get_fields()
+        if len(tags) == 1:
+            return [field for _, field in self.positioned_fields(tags[0])]
+        return [
+            field
+            for _, field in sorted(
+                (entry for tag in set(tags) for entry in self.positioned_fields(tag)),
+                key=itemgetter(0),
+            )
+        ]
+
+    def __contains__(self, tag: str) -> bool:
+        if not self._indexed:
+            return tag in self.record
+        return tag in self.offsets
+
+    def __getitem__(self, tag: str) -> pymarc.Field:
+        fields = self.get_fields(tag)
+        if not fields:
+            raise KeyError
+        return fields[0]
+
+    def get(self, tag: str, default: pymarc.Field | None = None):
+        try:
+            return self[tag]
+        except KeyError:
+            return default
+
+    @cached_property
+    def record(self) -> pymarc.Record:
+        """
+        The whole record, parsed.
+        """
+        return parse_marcxml(self.xml)
+
+    def __getattr__(self, name):
+        return getattr(self.record, name)
+
+    def _slice(self, start: int, end: int) -> str:
+        # From the "<" of the field's start tag to the next field's
+        if end != self._end:
+            end = self.xml.rfind("<", 0, end)
+        return self.xml[self.xml.rfind("<", 0, start) : end]
+
+    def _parse(self, offsets: list[list]) -> list[tuple]:
+        # The fields of one tag are parsed together, inside an element that
+        # declares the namespaces they were declared with
+        slices = "".join(self._slice(start, end) for _, start, end in offsets)
+        root = ElementTree.fromstring(f"<fields {self._namespaces}>{slices}</fields>")
+        names = {}
+        elements = []
+        # A slice runs to the next field, so it also holds any other
+        # elements in between (e.g. a misplaced leader); only fields count
+        for element in root:
+            name = names.get(element.tag)
+            if name is None:
+                name = names[element.tag] = _local_name(element.tag)
+            if name in ("controlfield", "datafield"):
+                elements.append((element, name))
+        return [
+            (position, _field_from_element(element, name, names))
+            for (position, _, _), (element, name) in zip(offsets, elements)
+        ]
+
+
+# Codes and indicators that aren't one character are kept aside, with this
+# in their place
+_ODD = "\x00"
+
+
+class CompactRecord:
+    """
+    A MARC record held in a few flat arrays, rather than the object per field,
+    subfield and indicator pair a pymarc.Record has. Fields are numbered in
+    record order:
+
+    - tags[i] is the tag of field i, and indicators[2 * i : 2 * i + 2] its
+      indicators.
+    - The subfields of field i are numbered firsts[i] to firsts[i + 1]. The
+      code of subfield j is codes[j], and its value is
+      buffer[bounds[j] : bounds[j + 1]], so every value shares one string.
+
+    The fields it hands out are CompactFields, views that read the arrays.
+    They have the parts of pymarc.Field's API this repo reads, and
+    FieldRuleset reads their subfields without making a Subfield for each.
+    Make one with parse_marcxml_with_compact or CompactRecord.from_pymarc.
+    """
+
+    def __init__(self, leader: pymarc.Leader | None = None):
+        self.leader = leader if leader is not None else pymarc.Record().leader
+        self.tags: list[str] = []
+        self.indicators = ""
+        self.firsts = array("I", [0])
+        self.codes = ""
+        self.bounds = array("I", [0])
+        self.buffer = ""
+        # field -> data, for the fields that have it (control fields)
+        self.data: dict[int, str | None] = {}
+        # indicator (2 * field + 0 or 1) -> indicator and subfield -> code,
+        # when they aren't one character
+        self.odd_indicators: dict[int, str] = {}
+        self.odd_codes: dict[int, str] = {}
+        # tag -> field numbers
+        self.by_tag: dict[str, list[int]] = {}
+        self._views: dict[int, CompactField] = {}
+        self._positioned: dict[str, list[tuple]] = {}
+
+    @classmethod
+    def from_pymarc(cls, record: pymarc.Record) -> "CompactRecord":
+        """
+        The fields of a pymarc.Record, copied into a CompactRecord.
+        """
+        builder = _CompactRecordBuilder(record.leader)
+        for field in record.fields:
+            if field.control_field:
+                builder.add(field.tag, " ", " ", (), field.data)
+            else:
+                builder.add(field.tag, *field.indicators, field.subfields, field.data)
+        return builder.record()
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def field(self, index: int) -> "CompactField":
+        view = self._views.get(index)
+        if view is None:
+            view = self._views[index] = CompactField(self, index)
+        return view
+
+    @property
+    def fields(self) -> list["CompactField"]:
+        return [self.field(index) for index in range(len(self.tags))]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def positioned_fields(self, tag: str) -> list[tuple]:
+        """
+        The fields with tag, each with its position among all of the
+        record's fields.
+        """
+        fields = self._positioned.get(tag)
+        if fields is None:
+            fields = self._positioned[tag] = [
+                (index, self.field(index)) for index in self.by_tag.get(tag, ())
+            ]
+        return fields
+
+    def get_fields(self, *tags) -> list["CompactField"]:
+        """
+        The fields with any of tags in record order, like
+        pymarc.Record.get_fields. With no tags, every field.
+        """
+        if not tags:
+            return self.fields
+        indexes = [index for tag in set(tags) for index in self.by_tag.get(tag, ())]
+        if len(tags) > 1:
+            indexes.sort()
+        return [self.field(index) for index in indexes]
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.by_tag
+
+    def __getitem__(self, tag: str) -> "CompactField":
+        if tag not in self.by_tag:
+            raise KeyError
+        return self.field(self.by_tag[tag][0])
+
+    def get(self, tag: str, default=None):
+        try:
+            return self[tag]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> dict:
+        """
+        The record as MARC-in-JSON, like pymarc.Record.as_dict.
+        """
+        return {
+            "leader": str(self.leader),
+            "fields": [field.as_dict() for field in self.fields],
+        }
+
+    def as_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+class CompactField:
+    """
+    Field index of a CompactRecord, read like a pymarc.Field. Its tag and the
+    range of its subfields are looked up once, when the view is made.
+    """
+
+    __slots__ = ("record", "index", "tag", "control_field", "first", "last")
+
+    def __init__(self, record: CompactRecord, index: int):
+        self.record = record
+        self.index = index
+        self.tag = record.tags[index]
+        self.control_field = _is_control_tag(self.tag)
+        self.first = record.firsts[index]
+        self.last = record.firsts[index + 1]
+
+    def is_control_field(self) -> bool:
+        return self.control_field
+
+    @property
+    def data(self) -> str | None:
+        return self.record.data.get(self.index)
+
+    @property
+    def indicators(self) -> pymarc.Indicators | None:
+        if self.control_field:
+            return None
+        return pymarc.Indicators(self.indicator1, self.indicator2)
+
+    @property
+    def indicator1(self) -> str | None:
+        return self._indicator(0)
+
+    @property
+    def indicator2(self) -> str | None:
+        return self._indicator(1)
+
+    def _indicator(self, which: int) -> str | None:
+        if self.control_field:
+            return None
+        indicator = self.record.indicators[2 * self.index + which]
+        if indicator == _ODD:
+            return self.record.odd_indicators[2 * self.index + which]
+        return indicator
+
+    def pairs(self):
+        """
+        (code, value) for each subfield, in order.
+        """
+        record = self.record
+        codes, bounds, buffer = record.codes, record.bounds, record.buffer
+        for j in range(self.first, self.last):
+            code = codes[j]
+            if code == _ODD:
+                code = record.odd_codes.get(j, code)
+            yield code, buffer[bounds[j] : bounds[j + 1]]
+
+    def has_any(self, codes: frozenset) -> bool:
+        """
+        Whether the subfields with any of codes join into a non-empty string.
+        Values are only measured, not copied out of the buffer.
+        """
+        record = self.record
+        all_codes, bounds = record.codes, record.bounds
+        found = False
+        for j in range(self.first, self.last):
+            if all_codes[j] in codes:
+                # Two matches always join into a non-empty string
+                if found or bounds[j + 1] > bounds[j]:
+                    return True
+                found = True
+        return False
+
+    @property
+    def subfields(self) -> list[pymarc.Subfield]:
+        return [pymarc.Subfield(code, value) for code, value in self.pairs()]
+
+    def get_subfields(self, *codes) -> list[str]:
+        if self.control_field:
+            return []
+        return [value for code, value in self.pairs() if code in codes]
+
+    def _find(self, code: str) -> int:
+        # The number of the first subfield with code, or -1
+        if _is_one_character(code) and code != _ODD:
+            return self.record.codes.find(code, self.first, self.last)
+        for j in range(self.first, self.last):
+            if self.record.odd_codes.get(j) == code:
+                return j
+        return -1
+
+    def __contains__(self, code: str) -> bool:
+        return self._find(code) != -1
+
+    def __getitem__(self, code: str) -> str:
+        j = -1 if self.control_field else self._find(code)
+        if j == -1:
+            raise KeyError
+        bounds = self.record.bounds
+        return self.record.buffer[bounds[j] : bounds[j + 1]]
+
+    def get(self, code: str, default=None):
+        try:
+            return self[code]
+        except KeyError:
+            return default
+
+    def value(self) -> str:
+        if self.control_field:
+            return self.data or ""
+        return " ".join(value.strip() for _, value in self.pairs())
+
+    def as_dict(self) -> dict:
+        if self.control_field:
+            return {self.tag: self.data}
+        return {
+            self.tag: {
+                "ind1": self.indicator1,
+                "ind2": self.indicator2,
+                "subfields": [{code: value} for code, value in self.pairs()],
+            }
+        }
+
+
+class _CompactRecordBuilder:
+    """
+    Collects fields into lists, and packs them into a CompactRecord's arrays
+    and strings once they're all in.
+    """
+
+    def __init__(self, leader: pymarc.Leader | None = None):
+        self.leader = leader
+        self.tags = []
+        self.indicators = []
+        self.firsts = [0]
+        self.codes = []
+        self.values = []
+        self.data = {}
+
+    def add(self, tag: str, ind1: str, ind2: str, subfields, data=None):
+        index = len(self.tags)
+        tag = _normalized_tag(tag)
+        self.tags.append(tag)
+        if _is_control_tag(tag):
+            # pymarc drops the subfields of a datafield with a control tag
+            subfields = ()
+        self.indicators += (ind1, ind2)
+        for code, value in subfields:
+            self.codes.append(code)
+            self.values.append(value)
+        self.firsts.append(len(self.codes))
+        if data is not None:
+            self.data[index] = data
+
+    def record(self) -> CompactRecord:
+        record = CompactRecord(self.leader)
+        # Interned, so every field with a tag shares the one string
+        record.tags = [sys.intern(tag) for tag in self.tags]
+        record.indicators = _packed(self.indicators, record.odd_indicators)
+        record.firsts = array("I", self.firsts)
+        record.codes = _packed(self.codes, record.odd_codes)
+        record.bounds = array("I", [0])
+        record.bounds.extend(accumulate(map(len, self.values)))
+        record.buffer = "".join(self.values)
+        record.data = self.data
+        for index, tag in enumerate(record.tags):
+            record.by_tag.setdefault(tag, []).append(index)
+        return record
+
+
+def _packed(characters: list, odd: dict) -> str:
+    # characters as one string, with _ODD in place of any that aren't one
+    # character, and those put in odd by their number
+    try:
+        if set(map(len, characters)) <= {1}:
+            packed = "".join(characters)
+            if _ODD not in packed:
+                return packed
+    except TypeError:
+        pass
+    for number, character in enumerate(characters):
+        if not _is_one_character(character) or character == _ODD:
+            odd[number] = character
+    return "".join(
+        _ODD if number in odd else character
+        for number, character in enumerate(characters)
+    )
+
+
+class _CompactRecordTarget:
+    """
+    An XMLParser target that builds a CompactRecord of the first record
+    element, with what _record_from_tree would read from a tree: the text
+    of an element is what comes before its first child, and elements are
+    matched by local name.
+    """
+
+    def __init__(self):
+        self.builder = _CompactRecordBuilder()
+        self.names = {}
+        self.depth = 0
+        # The depth of the record element, once it's found
+        self.record_depth = None
+        self.done = False
+        # The text of each open element, and the one text still being read
+        self.texts = []
+        self.text = None
+        # tag, ind1, ind2 and the subfields of the datafield being read
+        self.field = None
+        self.control_tag = None
+        self.code = None
+
+    def start(self, tag: str, attrib: dict):
+        self.depth += 1
+        self.text = []
+        self.texts.append(self.text)
+        if self.done:
+            return
+        name = self.names.get(tag)
+        if name is None:
+            name = self.names[tag] = _local_name(tag)
+        if self.record_depth is None:
+            if name == "record":
+                self.record_depth = self.depth
+        elif self.depth == self.record_depth + 1:
+            if name == "controlfield":
+                self.control_tag = attrib.get("tag")
+            elif name == "datafield":
+                self.field = (
+                    attrib.get("tag"),
+                    attrib.get("ind1", " "),
+                    attrib.get("ind2", " "),
+                    [],
+                )
+        elif self.depth == self.record_depth + 2 and self.field is not None:
+            self.code = attrib.get("code")
+
+    def data(self, data: str):
+        if self.text is not None:
+            self.text.append(data)
+
+    def end(self, tag: str):
+        depth = self.depth
+        self.depth -= 1
+        text = "".join(self.texts.pop())
+        # Text after an element's end is its tail, not its parent's text
+        self.text = None
+        if self.done or self.record_depth is None:
+            return
+        name = self.names[tag]
+        if depth == self.record_depth:
+            self.done = True
+        elif depth == self.record_depth + 1:
+            if name == "leader":
+                self.builder.leader = pymarc.Leader(text)
+            elif name == "controlfield":
+                self.builder.add(self.control_tag, " ", " ", (), text)
+            elif name == "datafield":
+                self.builder.add(*self.field)
+                self.field = None
+        elif depth == self.record_depth + 2 and self.field is not None:
+            if name == "subfield":
+                self.field[3].append((self.code, text))
+
+    def close(self) -> CompactRecord:
+        if self.record_depth is None:
+            raise ValueError("The MARCXML has no record")
+        return self.builder.record()
+
+
+def _is_control_tag(tag: str) -> bool:
+    # pymarc's rule, which replicates ruby-marc's
+    return tag < "010" and tag.isdigit()
+
+
+def _is_one_character(value) -> bool:
+    return isinstance(value, str) and len(value) == 1
 
 
 class Linkage:
@@ -25,86 +723,297 @@ class Linkage:
         return f"{self.tag}-{self.occurence_number}"
 
 
+# Field filters by name; see register_filter
+FIELD_FILTERS: dict[str, Callable[..., bool]] = {"any": lambda field: True}
+
+
+def register_filter(name: str):
+    """
+    Registers the decorated function as the field filter called name, so a
+    FieldRuleset can name it in filter.
+    """
+
+    def register(function: Callable[..., bool]) -> Callable[..., bool]:
+        if FIELD_FILTERS.get(name, function) is not function:
+            raise ValueError(f"There's already a field filter called {name!r}")
+        FIELD_FILTERS[name] = function
+        return function
+
+    return register
+
+
+def field_filter(name: str) -> Callable[..., bool]:
+    """
+    The field filter called name. Raises ValueError for one that isn't
+    registered.
+    """
+    if name not in FIELD_FILTERS:
+        raise ValueError(f"Unknown field filter {name!r}")
+    return FIELD_FILTERS[name]
+
+
 @dataclass(frozen=True)
 class FieldRuleset:
+    """
+    How to turn the fields with any of tags into FieldElements. The subfield
+    codes are compiled into frozensets when the ruleset is made, and a field's
+    text, search and browse values are collected in one walk of its
+    subfields, so rulesets are best made once, at import.
+
+    filter is the name of a registered field filter (see register_filter),
+    or a function. Rulesets with the same key give the same fields, so a
+    Processor only evaluates one of them. A named filter is part of the key,
+    so rulesets declared apart can share their results; a function only
+    matches itself.
+    """
+
     tags: list
     text_sfs: str = string.ascii_lowercase
     search: list | None = None
     browse_sfs: str | None = None
-    filter: Callable[..., bool] = lambda field: True
+    filter: str | Callable[..., bool] = "any"
 
-    def has_any_subfields(self, field: pymarc.Field) -> bool:
-        return bool(self._get_subfields(field, self.text_sfs))
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "accepts",
+            field_filter(self.filter) if isinstance(self.filter, str) else self.filter,
+        )
+        object.__setattr__(self, "_text_codes", frozenset(self.text_sfs))
+        object.__setattr__(
+            self,
+            "_search_codes",
+            tuple((s["field"], frozenset(s["subfields"])) for s in self.search or ()),
+        )
+        object.__setattr__(
+            self,
+            "_browse_codes",
+            frozenset(self.browse_sfs) if self.browse_sfs else None,
+        )
+        object.__setattr__(
+            self,
+            "key",
+            (
+                frozenset(self.tags),
+                self._text_codes,
+                self._search_codes,
+                self._browse_codes,
+                self.filter,
+            ),
+        )
 
-    def value_for(self, field: pymarc.Field):
-        result = {
-            "text": self._get_subfields(field, self.text_sfs).strip(),
-            "tag": field.tag,
-        }
+    def has_any_subfields(self, field: "pymarc.Field | CompactField") -> bool:
+        if type(field) is CompactField:
+            return field.has_any(self._text_codes)
+        text_codes = self._text_codes
+        found = 0
+        for subfield in field.subfields:
+            if subfield.code in text_codes:
+                # Two matches always join into a non-empty string
+                if subfield.value or found:
+                    return True
+                found += 1
+        return False
+
+    def value_for(self, field: "pymarc.Field | CompactField") -> FieldElement:
+        text_codes = self._text_codes
+        search_codes = self._search_codes
+        browse_codes = self._browse_codes
+        text = []
+        search = [[] for _ in search_codes]
+        browse = []
+        # A CompactField's subfields are read straight from its record
+        subfields = field.pairs() if type(field) is CompactField else field.subfields
+        for code, value in subfields:
+            if code in text_codes:
+                text.append(value)
+            for values, (_, codes) in zip(search, search_codes):
+                if code in codes:
+                    values.append(value)
+            if browse_codes is not None and code in browse_codes:
+                browse.append(value)
 
-        if self.search:
+        result = {"text": " ".join(text).strip(), "tag": field.tag}
+        if search_codes:
             result["search"] = []
-            for s in self.search:
-                value = self._get_subfields(field, s["subfields"])
+            for values, (search_field, _) in zip(search, search_codes):
+                value = " ".join(values)
                 if value:
                     result["search"].append(
-                        SearchField(
-                            field=s["field"],
-                            value=self._get_subfields(field, s["subfields"]),
-                        )
+                        SearchField(field=search_field, value=value)
                     )
-
-        if self.browse_sfs:
-            result["browse"] = self._get_subfields(field, self.browse_sfs)
+        if browse_codes is not None:
+            result["browse"] = " ".join(browse)
 
         return FieldElement(**result)
 
-    def _get_subfields(self, field: pymarc.Field, subfields: str):
-        return " ".join(field.get_subfields(*tuple(subfields)))
+
+def _paired_field(ruleset: FieldRuleset, fields: dict) -> PairedField:
+    return PairedField(**{key: ruleset.value_for(f) for key, f in fields.items()})
+
+
+def _deduped(results) -> list:
+    # The FieldElements of results in order, each once. FieldElement holds a
+    # list, so it's keyed by its parts
+    values = {}
+    for result in results:
+        for value in result:
+            key = (
+                value.text,
+                value.tag,
+                tuple(value.search) if value.search is not None else None,
+                value.browse,
+            )
+            values.setdefault(key, value)
+    return list(values.values())
 
 
 class Processor:
-    def __init__(self, record: pymarc.record.Record):
+    """
+    Evaluates rulesets against a record. The fields of a tag are indexed the
+    first time a ruleset asks for the tag, and the 880s by the tag and
+    occurrence they link to the first time a ruleset pairs fields. Every
+    ruleset is then served from those indexes instead of walking the record
+    again. A LazyRecord only has the tags rulesets ask for parsed.
+
+    The fields a ruleset gives, paired or unpaired, are kept by its key, so
+    equivalent rulesets, wherever they're declared, are evaluated once per
+    record. evaluations counts the rulesets that have been.
+    """
+
+    def __init__(self, record: "pymarc.record.Record | LazyRecord | CompactRecord"):
         self.record = record
+        # tag -> [(position, field, occurrence)] in record order
+        self.fields_by_tag: dict[str, list[tuple]] = {}
+        self._linked_by_tag: dict[str, list[tuple]] | None = None
+        self._entries_cache: dict[tuple, list] = {}
+        # (paired, ruleset key) -> the ruleset's fields
+        self.results: dict[tuple, list] = {}
+        # How many times a ruleset has been run against the record
+        self.evaluations = 0
+        if record is None:
+            self._positioned_fields = lambda tag: []
+        elif isinstance(record, (LazyRecord, CompactRecord)):
+            self._positioned_fields = record.positioned_fields
+        else:
+            positioned = {}
+            for position, field in enumerate(record.fields):
+                positioned.setdefault(field.tag, []).append((position, field))
+            self._positioned_fields = lambda tag: positioned.get(tag, [])
+
+    def fields_for(self, tag: str) -> list[tuple]:
+        """
+        The fields with tag as [(position, field, occurrence)], in record
+        order.
+        """
+        entries = self.fields_by_tag.get(tag)
+        if entries is None:
+            entries = []
+            for position, field in self._positioned_fields(tag):
+                linkage = Linkage(field)
+                occurrence = linkage.parts[1] if len(linkage.parts) > 1 else None
+                entries.append((position, field, occurrence))
+            self.fields_by_tag[tag] = entries
+        return entries
+
+    @property
+    def linked_by_tag(self) -> dict[str, list[tuple]]:
+        """
+        The 880s by the tag they link to, as [(position, "tag-occurrence",
+        880 field)] in record order.
+        """
+        if self._linked_by_tag is None:
+            self._linked_by_tag = {}
+            for position, field, occurrence in self.fields_for("880"):
+                tag = Linkage(field).tag
+                self._linked_by_tag.setdefault(tag, []).append(
+                    (position, f"{tag}-{occurrence}", field)
+                )
+        return self._linked_by_tag
+
+    def _linked_for(self, tag: str) -> list[tuple]:
+        return self.linked_by_tag.get(tag, [])
 
     def generate_unpaired_fields(self, rulesets: tuple) -> list:
-        result = []
-        for ruleset in rulesets:
-            for field in self.record.get_fields(*ruleset.tags):
-                if ruleset.filter(field) and ruleset.has_any_subfields(field):
-                    value = ruleset.value_for(field)
-                    if value not in result:
-                        result.append(value)
-        return result
+        return _deduped(self.results_for(ruleset, paired=False) for ruleset in rulesets)
 
     def generate_paired_fields(self, rulesets: tuple) -> list:
-        result = []
-        for ruleset in rulesets:
-            for fields in self._get_paired_fields_for(ruleset):
-                if ruleset.filter(fields["original"]):
-                    r = {}
-                    for key in fields.keys():
-                        r[key] = ruleset.value_for(fields[key])
-                    result.append(PairedField(**r))
+        return [
+            value
+            for ruleset in rulesets
+            for value in self.results_for(ruleset, paired=True)
+        ]
+
+    def results_for(self, ruleset: FieldRuleset, paired: bool) -> list:
+        """
+        The fields ruleset gives, as PairedFields if paired, or FieldElements,
+        deduped, if not. They're worked out once per ruleset key.
+        """
+        key = (paired, ruleset.key)
+        result = self.results.get(key)
+        if result is None:
+            self.evaluations += 1
+            if paired:
+                result = [
+                    _paired_field(ruleset, fields)
+                    for fields in self._get_paired_fields_for(ruleset)
+                    if ruleset.accepts(fields["original"])
+                ]
+            else:
+                result = _deduped(
+                    [
+                        [
+                            ruleset.value_for(field)
+                            for field in self.get_fields(ruleset.tags)
+                            if ruleset.accepts(field)
+                            and ruleset.has_any_subfields(field)
+                        ]
+                    ]
+                )
+            self.results[key] = result
         return result
 
-    def _get_original_for_tags(self, tags: tuple) -> list:
-        def linkage_has_tag(field):
-            return Linkage(field).tag in tags
+    def get_fields(self, tags) -> list:
+        """
+        The fields with any of tags, in record order, like
+        pymarc.Record.get_fields.
+        """
+        return [entry[1] for entry in self._entries("fields", tags)]
+
+    def _get_original_for_tags(self, tags) -> list:
+        return [entry[2] for entry in self._entries("linked", tags)]
 
-        return list(filter(linkage_has_tag, self.record.get_fields("880")))
+    def _entries(self, index_name: str, tags) -> list:
+        """
+        The entries of the fields_by_tag ("fields") or linked_by_tag
+        ("linked") index for tags, merged back into record order.
+        """
+        key = (index_name, tuple(tags))
+        entries = self._entries_cache.get(key)
+        if entries is None:
+            entries_for = (
+                self.fields_for if index_name == "fields" else self._linked_for
+            )
+            unique_tags = set(tags)
+            if len(unique_tags) == 1:
+                entries = entries_for(next(iter(unique_tags)))
+            else:
+                entries = sorted(
+                    (entry for tag in unique_tags for entry in entries_for(tag)),
+                    key=itemgetter(0),
+                )
+            self._entries_cache[key] = entries
+        return entries
 
     def _get_paired_fields_for(self, ruleset: FieldRuleset) -> list:
         mapping = {}
-        for field in self._get_original_for_tags(ruleset.tags):
-            mapping[Linkage(field).__str__()] = field
+        for _, linkage, field in self._entries("linked", ruleset.tags):
+            mapping[linkage] = field
 
         results = []
-        for field in self.record.get_fields(*ruleset.tags):
+        for _, field, occurrence in self._entries("fields", ruleset.tags):
             if ruleset.has_any_subfields(field):
-                original = mapping.pop(
-                    f"{field.tag}-{Linkage(field).occurence_number}", None
-                )
+                original = mapping.pop(f"{field.tag}-{occurrence}", None)
                 if original:
                     results.append({"transliterated": field, "original": original})
                 else:
@@ -1,103 +1,232 @@
 from __future__ import annotations
+from functools import cached_property, lru_cache
+from pydantic import BaseModel, ValidationError
+from catalog_api import schemas
 from catalog_api.solr_client import SolrClient
-from catalog_api.solr import SolrDocProcessor
-from catalog_api.marc import Processor, FieldRuleset
+from catalog_api.solr import SolrDocProcessor, FieldRecorder
+from catalog_api.marc import (
+    FieldRuleset,
+    LazyRecord,
+    Processor,
+    parse_marcxml,
+    register_filter,
+)
 import re
+import anyio
 import pymarc
-import io
 import string
 import json
 
 # from dataclasses import dataclass
 # from collections.abc import Callable
-from catalog_api.holdings import Holdings
+from catalog_api.holdings import Holdings, HoldingsView
 from datetime import datetime
 
 
-def record_for(id: str) -> Record:
-    data = SolrClient().get_record(id)
-    return Record(data)
+async def record_for(
+    id: str,
+    schema: type[BaseModel] = schemas.Record,
+    holdings_view: HoldingsView = HoldingsView(),
+) -> Record:
+    """
+    schema is the response the record is for. Only the solr fields that
+    response needs are fetched.
+    """
+    client = SolrClient()
+    fields = solr_fields(schema)
+    data = await client.get_record(id, fl=fields)
+    record = Record(
+        data, holdings_view=holdings_view, sections=frozenset(schema.model_fields)
+    )
+    await add_fullrecords(client, [record], fields)
+    return record
+
+
+async def records_for(
+    ids: list[str], schema: type[BaseModel] = schemas.Record
+) -> dict[str, Record]:
+    """
+    Records for many ids from a single solr request, keyed by id. Ids that
+    aren't in solr are left out.
+    """
+    client = SolrClient()
+    fields = solr_fields(schema)
+    docs = await client.get_records(ids, fl=fields)
+    sections = frozenset(schema.model_fields)
+    records = {id: Record(data, sections=sections) for id, data in docs.items()}
+    await add_fullrecords(client, list(records.values()), fields)
+    return records
+
+
+async def holdings_for(id: str, view: HoldingsView = HoldingsView()) -> Holdings:
+    """
+    The holdings of a record. Only id and hol are fetched, plus fullrecord if
+    an item in view can be reserved.
+    """
+    return (await record_for(id, HOLDINGS_SCHEMA, view)).holdings
+
+
+HOLDINGS_SCHEMA = schemas.partial_record(frozenset(["id", "holdings"]))
+
+
+async def add_fullrecords(
+    client: SolrClient, records: list[Record], fields: tuple[str, ...]
+) -> None:
+    """
+    Holdings only need the MARC record for the Aeon links of reservable
+    items, so a response with holdings and no MARC based fields is fetched
+    without fullrecord. This fetches it afterwards, in one request, for the
+    records with reservable items in view. It's parsed when the first Aeon
+    link is made. The holdings are built in a worker thread to tell which
+    records those are.
+    """
+    if "fullrecord" in fields or "hol" not in fields:
+        return
+    ids = await anyio.to_thread.run_sync(
+        lambda: [r.data["id"] for r in records if r.holdings.has_reservable_items]
+    )
+    if not ids:
+        return
+    docs = await client.get_records(ids, fl=("id", "fullrecord"))
+    for record in records:
+        if record.data["id"] in docs:
+            record.data["fullrecord"] = docs[record.data["id"]]["fullrecord"]
+
+
+async def record_version_for(id: str) -> dict:
+    """
+    Only the id, _version_ and date_of_index of a record: enough to tell if
+    a copy of it is current without fetching or building the record.
+    """
+    return await SolrClient().get_record(id, fl=METADATA_FIELDS)
+
+
+# Fetched for every record whatever the response is, because the API itself
+# needs them. _version_ and date_of_index tell copies of a record apart.
+METADATA_FIELDS = ("id", "_version_", "date_of_index")
+
+
+@lru_cache(maxsize=512)
+def solr_fields(schema: type[BaseModel] = schemas.Record) -> tuple[str, ...]:
+    """
+    The stored solr fields needed to build a response matching schema. They
+    are found by building a Record from an empty solr document that records
+    which fields are read from it, and validating that Record against the
+    schema so that every property the schema asks for gets evaluated.
+
+    Raises a RuntimeError if the schema has a field that Record doesn't
+    provide, so a mismatch shows up when the app starts.
+
+    METADATA_FIELDS are always included.
+    """
+    probe = FieldRecorder(
+        fullrecord=pymarc.record_to_xml(pymarc.Record()).decode("utf-8"),
+        hol="[]",
+    )
+    try:
+        schema.model_validate(Record(probe), from_attributes=True)
+    except ValidationError as error:
+        # The empty document is expected to fail validation; a missing
+        # attribute is not.
+        missing = [
+            ".".join(str(loc) for loc in e["loc"])
+            for e in error.errors()
+            if e["type"] == "missing"
+        ]
+        if missing:
+            raise RuntimeError(f"Record does not provide {', '.join(missing)}")
+    return tuple(sorted(probe.fields_read | set(METADATA_FIELDS)))
 
 
 class SolrDoc:
+    """
+    The fields read from the solr document. Each is worked out the first
+    time it's read and kept, so the citations can reuse what the response
+    already read.
+    """
+
     def __init__(self, data: dict):
         self.data = data
         # can't just be processor because of multiple inheritance
         self.solr_processor = SolrDocProcessor(data)
 
-    @property
+    @cached_property
     def id(self):
         return self.solr_processor.get("id")
 
-    @property
+    @cached_property
     def title(self):
         return self.solr_processor.get_paired_field("title_display")
 
-    @property
+    @cached_property
     def published(self) -> list:
         return self.solr_processor.get_paired_field("publisher_display")
 
-    @property
+    @cached_property
     def edition(self) -> list:
         return self.solr_processor.get_paired_field("edition")
 
-    @property
+    @cached_property
     def lc_subjects(self):
         return self.solr_processor.get_text_field("lc_subject_display")
 
-    @property
+    @cached_property
     def language(self):
         return self.solr_processor.get_text_field("language")
 
-    @property
+    @cached_property
     def isbn(self):
         return self.solr_processor.get_text_field("isbn")
 
-    @property
+    @cached_property
     def issn(self):
         return self.solr_processor.get_text_field("issn")
 
-    @property
+    @cached_property
     def gov_doc_number(self):
         return self.solr_processor.get_text_field("sudoc")
 
-    @property
+    @cached_property
     def report_number(self):
         return self.solr_processor.get_text_field("rptnum")
 
-    @property
+    @cached_property
     def call_number(self):
         return self.solr_processor.get_text_field("callnumber_browse")
 
-    @property
+    @cached_property
     def oclc(self):
         return self.solr_processor.get_text_field("oclc")
 
-    @property
+    @cached_property
     def remediated_lc_subjects(self):
         return self.solr_processor.get_text_field("remediated_lc_subject_display")
 
-    @property
+    @cached_property
     def other_subjects(self):
         return self.solr_processor.get_text_field("non_lc_subject_display")
 
-    @property
+    @cached_property
     def bookplate(self):
         return self.solr_processor.get_text_field("bookplate")
 
-    @property
+    @cached_property
     def indexing_date(self):
         return self.data.get("date_of_index")
 
-    @property
+    @cached_property
+    def solr_version(self) -> int | None:
+        return self.data.get("_version_")
+
+    @cached_property
     def availability(self) -> list:
         return self.solr_processor.get_list("availability")
 
-    @property
+    @cached_property
     def format(self):
         return self.solr_processor.get_list("format")
 
-    @property
+    @cached_property
     def main_author(self):
         main = self.data.get("main_author_display") or []
         search = self.data.get("main_author") or []
@@ -131,7 +260,7 @@ class SolrDoc:
                     }
                 ]
 
-    @property
+    @cached_property
     def academic_discipline(self):
         return [
             {"list": discipline.split(" | ")}
@@ -139,314 +268,482 @@ class SolrDoc:
         ]
 
 
+NO_I = string.ascii_lowercase.replace("i", "")
+NO_L = string.ascii_lowercase.replace("l", "")
+TITLE_DISPLAY_SFS = "abcdefgjklmnopqrst"
+CONTRIBUTOR_SEARCH_SFS = "abcdgjkqu"
+
+
+EDITOR_ROLES = ("ed", "ed.", "editor", "editor.")
+# $e values of 100 and 700 fields that aren't authors
+NOT_AUTHOR_ROLES = EDITOR_ROLES + ("trans.", "translator", "translator.")
+
+
+# The field filters the rulesets below name. Each is registered once, so
+# equivalent rulesets in different classes share their results; see
+# FieldRuleset.
+@register_filter("second_indicator_0")
+def _has_second_indicator_0(field: pymarc.Field) -> bool:
+    return field.indicator2 == "0"
+
+
+@register_filter("second_indicator_1")
+def _has_second_indicator_1(field: pymarc.Field) -> bool:
+    return field.indicator2 == "1"
+
+
+@register_filter("second_indicator_2")
+def _has_second_indicator_2(field: pymarc.Field) -> bool:
+    return field.indicator2 == "2"
+
+
+@register_filter("second_indicator_3")
+def _has_second_indicator_3(field: pymarc.Field) -> bool:
+    return field.indicator2 == "3"
+
+
+@register_filter("second_indicator_4")
+def _has_second_indicator_4(field: pymarc.Field) -> bool:
+    return field.indicator2 == "4"
+
+
+@register_filter("no_second_indicator")
+def _has_no_second_indicator(field: pymarc.Field) -> bool:
+    return not field.indicator2
+
+
+@register_filter("first_indicator_4")
+def _has_first_indicator_4(field: pymarc.Field) -> bool:
+    return field.indicator1 == "4"
+
+
+@register_filter("first_indicator_not_4")
+def _has_no_first_indicator_4(field: pymarc.Field) -> bool:
+    return field.indicator1 != "4"
+
+
+@register_filter("has_t")
+def _has_t(field: pymarc.Field) -> bool:
+    return bool(field.get("t"))
+
+
+@register_filter("has_no_t")
+def _has_no_t(field: pymarc.Field) -> bool:
+    return not field.get("t")
+
+
+@register_filter("has_no_u")
+def _has_no_u(field: pymarc.Field) -> bool:
+    return not field.get("u")
+
+
+@register_filter("related_title")
+def _is_a_related_title(field: pymarc.Field) -> bool:
+    return bool(field.get_subfields("t")) and field.indicator2 != "2"
+
+
+@register_filter("other_title")
+def _is_an_other_title(field: pymarc.Field) -> bool:
+    return bool(field.get_subfields("t")) and field.indicator2 == "2"
+
+
+@register_filter("contributor")
+def _is_a_contributor(field: pymarc.Field) -> bool:
+    return not field.get_subfields("t") and field.indicator2 != "2"
+
+
+@register_filter("author")
+def _is_an_author(field: pymarc.Field) -> bool:
+    return field.get("e") not in NOT_AUTHOR_ROLES
+
+
+@register_filter("surname_author")
+def _is_a_surname_author(field: pymarc.Field) -> bool:
+    return field.indicator1 == "1" and field.get("e") not in NOT_AUTHOR_ROLES
+
+
+@register_filter("forename_author")
+def _is_a_forename_author(field: pymarc.Field) -> bool:
+    return field.indicator1 == "0" and field.get("e") not in NOT_AUTHOR_ROLES
+
+
+@register_filter("surname_editor")
+def _is_a_surname_editor(field: pymarc.Field) -> bool:
+    return field.indicator1 == "1" and field.get("e") in EDITOR_ROLES
+
+
+@register_filter("forename_editor")
+def _is_a_forename_editor(field: pymarc.Field) -> bool:
+    return field.indicator1 == "0" and field.get("e") in EDITOR_ROLES
+
+
+@register_filter("forename_ed_role")
+def _has_a_forename_and_an_ed_role(field: pymarc.Field) -> bool:
+    return field.indicator1 == "0" and bool(re.match("ed", field.get("e", "")))
+
+
 class MARC:
+    """
+    The fields built from the MARC record. Their rulesets are class
+    attributes, so they're made once, at import, rather than on every access.
+    Like SolrDoc's, each field is kept once it's read, for the life of the
+    record (one request).
+    """
+
     def __init__(self, record: pymarc.record.Record):
         self.record = record
-        self.processor = Processor(record)
 
-    @property
+    @cached_property
+    def processor(self):
+        return Processor(self.record)
+
+    PREFERRED_TITLE_RULESETS = (
+        FieldRuleset(
+            tags=["130", "240", "243"],
+            search=[{"subfields": NO_L, "field": "title"}],
+        ),
+        FieldRuleset(
+            tags=["730"],
+            text_sfs=NO_I,
+            search=[{"subfields": NO_I, "field": "title"}],
+            filter="second_indicator_2",
+        ),
+    )
+
+    @cached_property
     def preferred_title(self) -> list:
-        no_l = string.ascii_lowercase.replace("l", "")
-        no_i = string.ascii_lowercase.replace("i", "")
-        rulesets = [
-            FieldRuleset(
-                tags=["130", "240", "243"],
-                search=[{"subfields": no_l, "field": "title"}],
-            ),
-            FieldRuleset(
-                tags=["730"],
-                text_sfs=no_i,
-                search=[{"subfields": no_i, "field": "title"}],
-                filter=lambda field: (field.indicator2 == "2"),
-            ),
-        ]
-        return self.processor.generate_paired_fields(rulesets)
-
-    @property
+        return self.processor.generate_paired_fields(self.PREFERRED_TITLE_RULESETS)
+
+    RELATED_TITLE_RULESETS = (
+        FieldRuleset(
+            tags=["730"],
+            text_sfs=NO_I,
+            search=[{"subfields": NO_I, "field": "title"}],
+            filter="no_second_indicator",
+        ),
+        FieldRuleset(
+            tags=["700", "710"],
+            text_sfs=TITLE_DISPLAY_SFS,
+            search=[{"subfields": "fjklmnoprst", "field": "title"}],
+            filter="related_title",
+        ),
+        FieldRuleset(
+            tags=["711"],
+            text_sfs=TITLE_DISPLAY_SFS,
+            search=[{"subfields": "fklmnoprst", "field": "title"}],
+            filter="related_title",
+        ),
+    )
+
+    @cached_property
     def related_title(self) -> list:
-        no_i = string.ascii_lowercase.replace("i", "")
-        display_sfs = "abcdefgjklmnopqrst"
-
-        def is_a_title(field: pymarc.Field) -> bool:
-            return field.get_subfields("t") and field.indicator2 != "2"
-
-        rulesets = [
-            FieldRuleset(
-                tags=["730"],
-                text_sfs=no_i,
-                search=[{"subfields": no_i, "field": "title"}],
-                filter=lambda field: (not field.indicator2),
-            ),
-            FieldRuleset(
-                tags=["700", "710"],
-                text_sfs=display_sfs,
-                search=[{"subfields": "fjklmnoprst", "field": "title"}],
-                filter=is_a_title,
-            ),
-            FieldRuleset(
-                tags=["711"],
-                text_sfs=display_sfs,
-                search=[{"subfields": "fklmnoprst", "field": "title"}],
-                filter=is_a_title,
-            ),
-        ]
-        return self.processor.generate_paired_fields(rulesets)
-
-    @property
+        return self.processor.generate_paired_fields(self.RELATED_TITLE_RULESETS)
+
+    OTHER_TITLES_RULESETS = (
+        FieldRuleset(
+            tags=["246", "247", "740"],
+            search=[{"subfields": string.ascii_lowercase, "field": "title"}],
+        ),
+        FieldRuleset(
+            tags=["700", "710"],
+            text_sfs=TITLE_DISPLAY_SFS,
+            search=[{"subfields": "fkjlmnoprst", "field": "title"}],
+            filter="other_title",
+        ),
+        FieldRuleset(
+            tags=["711"],
+            text_sfs=TITLE_DISPLAY_SFS,
+            search=[{"subfields": "fklmnoprst", "field": "title"}],
+            filter="other_title",
+        ),
+    )
+
+    @cached_property
     def other_titles(self) -> list:
         """
         Could add "tag" and "linkage" to the output to enable matching up parallel fields
         I wouldn't want to fetch any paired fields from solr then though
         """
+        return self.processor.generate_paired_fields(self.OTHER_TITLES_RULESETS)
 
-        def is_a_title(field: pymarc.Field) -> bool:
-            return field.get_subfields("t") and field.indicator2 == "2"
-
-        rulesets = (
-            FieldRuleset(
-                tags=["246", "247", "740"],
-                search=[{"subfields": string.ascii_lowercase, "field": "title"}],
-            ),
-            FieldRuleset(
-                tags=["700", "710"],
-                text_sfs="abcdefgjklmnopqrst",
-                search=[{"subfields": "fkjlmnoprst", "field": "title"}],
-                filter=is_a_title,
-            ),
-            FieldRuleset(
-                tags=["711"],
-                text_sfs="abcdefgjklmnopqrst",
-                search=[{"subfields": "fklmnoprst", "field": "title"}],
-                filter=is_a_title,
-            ),
-        )
-
-        return self.processor.generate_paired_fields(rulesets)
-
-    @property
-    def new_title(self):
-        ruleset = FieldRuleset(
+    NEW_TITLE_RULESETS = (
+        FieldRuleset(
             tags=["785"],
             text_sfs="ast",
             search=[
                 {"subfields": "a", "field": "author"},
                 {"subfields": "st", "field": "title"},
             ],
-        )
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        ),
+    )
 
-    @property
-    def new_title_issn(self):
-        ruleset = FieldRuleset(
+    @cached_property
+    def new_title(self):
+        return self.processor.generate_paired_fields(self.NEW_TITLE_RULESETS)
+
+    NEW_TITLE_ISSN_RULESETS = (
+        FieldRuleset(
             tags=["785"],
             text_sfs="x",
-        )
-        return self.processor.generate_unpaired_fields(tuple([ruleset]))
+        ),
+    )
 
-    @property
-    def previous_title(self):
-        ruleset = FieldRuleset(
+    @cached_property
+    def new_title_issn(self):
+        return self.processor.generate_unpaired_fields(self.NEW_TITLE_ISSN_RULESETS)
+
+    PREVIOUS_TITLE_RULESETS = (
+        FieldRuleset(
             tags=["780"],
             text_sfs="ast",
             search=[
                 {"subfields": "a", "field": "author"},
                 {"subfields": "st", "field": "title"},
             ],
-        )
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        ),
+    )
 
-    @property
-    def previous_title_issn(self):
-        ruleset = FieldRuleset(
+    @cached_property
+    def previous_title(self):
+        return self.processor.generate_paired_fields(self.PREVIOUS_TITLE_RULESETS)
+
+    PREVIOUS_TITLE_ISSN_RULESETS = (
+        FieldRuleset(
             tags=["780"],
             text_sfs="x",
+        ),
+    )
+
+    @cached_property
+    def previous_title_issn(self):
+        return self.processor.generate_unpaired_fields(
+            self.PREVIOUS_TITLE_ISSN_RULESETS
         )
-        return self.processor.generate_unpaired_fields(tuple([ruleset]))
 
-    @property
-    def contributors(self):
-        search_sfs = "abcdgjkqu"
-        ruleset = FieldRuleset(
+    CONTRIBUTORS_RULESETS = (
+        FieldRuleset(
             tags=["700", "710", "711"],
-            search=[{"subfields": search_sfs, "field": "author"}],
+            search=[{"subfields": CONTRIBUTOR_SEARCH_SFS, "field": "author"}],
             text_sfs="abcdefgjklnpqu4",
-            browse_sfs=search_sfs,
-            filter=lambda field: (
-                not field.get_subfields("t") and field.indicator2 != "2"
-            ),
-        )
+            browse_sfs=CONTRIBUTOR_SEARCH_SFS,
+            filter="contributor",
+        ),
+    )
 
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+    @cached_property
+    def contributors(self):
+        return self.processor.generate_paired_fields(self.CONTRIBUTORS_RULESETS)
 
-    @property
+    CREATED_RULESETS = (FieldRuleset(tags=["264"], filter="second_indicator_0"),)
+
+    @cached_property
     def created(self):
-        rulesets = (
-            FieldRuleset(tags=["264"], filter=lambda field: (field.indicator2 == "0")),
-        )
+        return self.processor.generate_paired_fields(self.CREATED_RULESETS)
 
-        return self.processor.generate_paired_fields(rulesets)
+    DISTRIBUTED_RULESETS = (FieldRuleset(tags=["264"], filter="second_indicator_2"),)
 
-    @property
+    @cached_property
     def distributed(self):
-        rulesets = (
-            FieldRuleset(tags=["264"], filter=lambda field: (field.indicator2 == "2")),
-        )
+        return self.processor.generate_paired_fields(self.DISTRIBUTED_RULESETS)
 
-        return self.processor.generate_paired_fields(rulesets)
+    MANUFACTURED_RULESETS = (
+        FieldRuleset(tags=["260"], text_sfs="efg"),
+        FieldRuleset(tags=["264"], filter="second_indicator_3"),
+    )
 
-    @property
+    @cached_property
     def manufactured(self):
-        rulesets = (
-            FieldRuleset(tags=["260"], text_sfs="efg"),
-            FieldRuleset(tags=["264"], filter=lambda field: (field.indicator2 == "3")),
-        )
+        return self.processor.generate_paired_fields(self.MANUFACTURED_RULESETS)
 
-        return self.processor.generate_paired_fields(rulesets)
+    SERIES_RULESETS = (FieldRuleset(tags=["400", "410", "411", "440", "490"]),)
 
-    @property
+    @cached_property
     def series(self):
-        ruleset = FieldRuleset(tags=["400", "410", "411", "440", "490"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.SERIES_RULESETS)
 
-    @property
+    SERIES_STATEMENT_RULESETS = (
+        FieldRuleset(tags=["440", "800", "810", "811", "830"]),
+    )
+
+    @cached_property
     def series_statement(self):
-        ruleset = FieldRuleset(tags=["440", "800", "810", "811", "830"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.SERIES_STATEMENT_RULESETS)
 
-    @property
+    BIOGRAPHY_HISTORY_RULESETS = (FieldRuleset(tags=["545"], text_sfs="a"),)
+
+    @cached_property
     def biography_history(self):
-        ruleset = FieldRuleset(tags=["545"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.BIOGRAPHY_HISTORY_RULESETS)
 
-    @property
-    def summary(self):
-        ruleset = FieldRuleset(
+    SUMMARY_RULESETS = (
+        FieldRuleset(
             tags=["520"],
             text_sfs="abc3",
-            filter=lambda field: (field.indicator1 != "4"),
-        )
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+            filter="first_indicator_not_4",
+        ),
+    )
 
-    @property
+    @cached_property
+    def summary(self):
+        return self.processor.generate_paired_fields(self.SUMMARY_RULESETS)
+
+    IN_COLLECTION_RULESETS = (
+        FieldRuleset(
+            tags=["773"],
+            text_sfs="t",
+            search=[{"subfields": "w", "field": "isn"}],
+            filter="has_t",
+        ),
+        FieldRuleset(
+            tags=["773"],
+            text_sfs="w",
+            search=[{"subfields": "w", "field": "isn"}],
+            filter="has_no_t",
+        ),
+    )
+
+    @cached_property
     def in_collection(self):
-        rulesets = (
-            FieldRuleset(
-                tags=["773"],
-                text_sfs="t",
-                search=[{"subfields": "w", "field": "isn"}],
-                filter=lambda field: (field.get("t")),
-            ),
-            FieldRuleset(
-                tags=["773"],
-                text_sfs="w",
-                search=[{"subfields": "w", "field": "isn"}],
-                filter=lambda field: (not field.get("t")),
-            ),
-        )
-        return self.processor.generate_paired_fields(rulesets)
+        return self.processor.generate_paired_fields(self.IN_COLLECTION_RULESETS)
 
-    @property
+    ACCESS_RULESETS = (FieldRuleset(tags=["506"], text_sfs="abc"),)
+
+    @cached_property
     def access(self):
-        ruleset = FieldRuleset(tags=["506"], text_sfs="abc")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.ACCESS_RULESETS)
 
-    @property
-    def finding_aids(self):
-        ruleset = FieldRuleset(
+    FINDING_AIDS_RULESETS = (
+        FieldRuleset(
             tags=["555"],
             text_sfs="abcd3",
-            filter=lambda field: (not field.get("u")),
-        )
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+            filter="has_no_u",
+        ),
+    )
 
-    @property
+    @cached_property
+    def finding_aids(self):
+        return self.processor.generate_paired_fields(self.FINDING_AIDS_RULESETS)
+
+    TERMS_OF_USE_RULESETS = (FieldRuleset(tags=["540"]),)
+
+    @cached_property
     def terms_of_use(self):
-        ruleset = FieldRuleset(tags=["540"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.TERMS_OF_USE_RULESETS)
 
-    @property
+    LANGUAGE_NOTE_RULESETS = (FieldRuleset(tags=["546"]),)
+
+    @cached_property
     def language_note(self):
-        ruleset = FieldRuleset(tags=["546"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.LANGUAGE_NOTE_RULESETS)
 
-    @property
+    PERFORMERS_RULESETS = (FieldRuleset(tags=["511"], text_sfs="a"),)
+
+    @cached_property
     def performers(self):
-        ruleset = FieldRuleset(tags=["511"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.PERFORMERS_RULESETS)
 
-    @property
+    DATE_PLACE_OF_EVENT_RULESETS = (FieldRuleset(tags=["518"], text_sfs="adop23"),)
+
+    @cached_property
     def date_place_of_event(self):
-        ruleset = FieldRuleset(tags=["518"], text_sfs="adop23")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.DATE_PLACE_OF_EVENT_RULESETS)
 
-    @property
+    PREFERRED_CITATION_RULESETS = (FieldRuleset(tags=["524"], text_sfs="a"),)
+
+    @cached_property
     def preferred_citation(self):
-        ruleset = FieldRuleset(tags=["524"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.PREFERRED_CITATION_RULESETS)
 
-    @property
+    LOCATION_OF_ORIGINALS_RULESETS = (
+        FieldRuleset(tags=["535"], text_sfs=f"{string.ascii_lowercase}3"),
+    )
+
+    @cached_property
     def location_of_originals(self):
-        ruleset = FieldRuleset(tags=["535"], text_sfs=f"{string.ascii_lowercase}3")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.LOCATION_OF_ORIGINALS_RULESETS
+        )
 
-    @property
+    FUNDING_INFORMATION_RULESETS = (FieldRuleset(tags=["536"], text_sfs="a"),)
+
+    @cached_property
     def funding_information(self):
-        ruleset = FieldRuleset(tags=["536"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.FUNDING_INFORMATION_RULESETS)
 
-    @property
+    SOURCE_OF_ACQUISITION_RULESETS = (FieldRuleset(tags=["541"], text_sfs="a"),)
+
+    @cached_property
     def source_of_acquisition(self):
-        ruleset = FieldRuleset(tags=["541"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.SOURCE_OF_ACQUISITION_RULESETS
+        )
 
-    @property
+    RELATED_ITEMS_RULESETS = (FieldRuleset(tags=["580"], text_sfs="a"),)
+
+    @cached_property
     def related_items(self):
-        ruleset = FieldRuleset(tags=["580"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.RELATED_ITEMS_RULESETS)
 
-    @property
+    NUMBERING_RULESETS = (FieldRuleset(tags=["362"], text_sfs="a"),)
+
+    @cached_property
     def numbering(self):
-        ruleset = FieldRuleset(tags=["362"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.NUMBERING_RULESETS)
 
-    @property
+    CURRENT_PUBLICATION_FREQUENCY_RULESETS = (
+        FieldRuleset(tags=["310"], text_sfs="ab"),
+    )
+
+    @cached_property
     def current_publication_frequency(self):
-        ruleset = FieldRuleset(tags=["310"], text_sfs="ab")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.CURRENT_PUBLICATION_FREQUENCY_RULESETS
+        )
 
-    @property
+    FORMER_PUBLICATION_FREQUENCY_RULESETS = (FieldRuleset(tags=["321"], text_sfs="ab"),)
+
+    @cached_property
     def former_publication_frequency(self):
-        ruleset = FieldRuleset(tags=["321"], text_sfs="ab")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.FORMER_PUBLICATION_FREQUENCY_RULESETS
+        )
 
-    @property
+    NUMBERING_NOTES_RULESETS = (FieldRuleset(tags=["515"], text_sfs="a"),)
+
+    @cached_property
     def numbering_notes(self):
-        ruleset = FieldRuleset(tags=["515"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.NUMBERING_NOTES_RULESETS)
 
-    @property
+    SOURCE_OF_DESCRIPTION_NOTE_RULESETS = (FieldRuleset(tags=["588"], text_sfs="a"),)
+
+    @cached_property
     def source_of_description_note(self):
-        ruleset = FieldRuleset(tags=["588"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.SOURCE_OF_DESCRIPTION_NOTE_RULESETS
+        )
 
-    @property
+    COPY_SPECIFIC_NOTE_RULESETS = (FieldRuleset(tags=["590"], text_sfs="a"),)
+
+    @cached_property
     def copy_specific_note(self):
-        ruleset = FieldRuleset(tags=["590"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.COPY_SPECIFIC_NOTE_RULESETS)
 
-    @property
+    REFERENCES_RULESETS = (FieldRuleset(tags=["510"]),)
+
+    @cached_property
     def references(self):
-        ruleset = FieldRuleset(tags=["510"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.REFERENCES_RULESETS)
 
-    @property
+    COPYRIGHT_STATUS_INFORMATION_RULESETS = (FieldRuleset(tags=["542"]),)
+
+    @cached_property
     def copyright_status_information(self):
-        ruleset = FieldRuleset(tags=["542"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.COPYRIGHT_STATUS_INFORMATION_RULESETS
+        )
 
-    @property
-    def note(self):
-        ruleset = FieldRuleset(
+    NOTE_RULESETS = (
+        FieldRuleset(
             tags=[
                 "500",
                 "501",
@@ -463,107 +760,170 @@ class MARC:
                 "585",
             ],
             text_sfs="a",
-        )
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        ),
+    )
 
-    @property
+    @cached_property
+    def note(self):
+        return self.processor.generate_paired_fields(self.NOTE_RULESETS)
+
+    ARRANGEMENT_RULESETS = (FieldRuleset(tags=["351"], text_sfs="ab3"),)
+
+    @cached_property
     def arrangement(self):
-        ruleset = FieldRuleset(tags=["351"], text_sfs="ab3")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.ARRANGEMENT_RULESETS)
 
-    @property
+    COPYRIGHT_RULESETS = (FieldRuleset(tags=["264"], filter="second_indicator_4"),)
+
+    @cached_property
     def copyright(self):
-        ruleset = FieldRuleset(
-            tags=["264"], filter=lambda field: (field.indicator2 == "4")
-        )
+        return self.processor.generate_paired_fields(self.COPYRIGHT_RULESETS)
 
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+    PHYSICAL_DESCRIPTION_RULESETS = (FieldRuleset(tags=["300"]),)
 
-    @property
+    @cached_property
     def physical_description(self):
-        ruleset = FieldRuleset(tags=["300"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.PHYSICAL_DESCRIPTION_RULESETS)
 
-    @property
+    MAP_SCALE_RULESETS = (FieldRuleset(tags=["255"], text_sfs="a"),)
+
+    @cached_property
     def map_scale(self):
-        ruleset = FieldRuleset(tags=["255"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.MAP_SCALE_RULESETS)
 
-    @property
+    REPRODUCTION_NOTE_RULESETS = (
+        FieldRuleset(tags=["533"], text_sfs=f"{string.ascii_lowercase}35"),
+    )
+
+    @cached_property
     def reproduction_note(self):
-        ruleset = FieldRuleset(tags=["533"], text_sfs=f"{string.ascii_lowercase}35")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.REPRODUCTION_NOTE_RULESETS)
 
-    @property
+    ORIGINAL_VERSION_NOTE_RULESETS = (
+        FieldRuleset(tags=["534"], text_sfs=f"{string.ascii_lowercase}35"),
+    )
+
+    @cached_property
     def original_version_note(self):
-        ruleset = FieldRuleset(tags=["534"], text_sfs=f"{string.ascii_lowercase}35")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(
+            self.ORIGINAL_VERSION_NOTE_RULESETS
+        )
 
-    @property
+    PLAYING_TIME_RULESETS = (FieldRuleset(tags=["306"], text_sfs="a"),)
+
+    @cached_property
     def playing_time(self):
-        ruleset = FieldRuleset(tags=["306"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.PLAYING_TIME_RULESETS)
 
-    @property
+    MEDIA_FORMAT_RULESETS = (FieldRuleset(tags=["538"], text_sfs="a"),)
+
+    @cached_property
     def media_format(self):
-        ruleset = FieldRuleset(tags=["538"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.MEDIA_FORMAT_RULESETS)
 
-    @property
+    AUDIENCE_RULESETS = (FieldRuleset(tags=["521"], text_sfs="a"),)
+
+    @cached_property
     def audience(self):
-        ruleset = FieldRuleset(tags=["521"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.AUDIENCE_RULESETS)
 
-    @property
-    def content_advice(self):
-        ruleset = FieldRuleset(
+    CONTENT_ADVICE_RULESETS = (
+        FieldRuleset(
             tags=["520"],
             text_sfs="abc3",
-            filter=lambda field: (field.indicator1 == "4"),
-        )
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+            filter="first_indicator_4",
+        ),
+    )
 
-    @property
+    @cached_property
+    def content_advice(self):
+        return self.processor.generate_paired_fields(self.CONTENT_ADVICE_RULESETS)
+
+    AWARDS_RULESETS = (FieldRuleset(tags=["586"], text_sfs="a"),)
+
+    @cached_property
     def awards(self):
-        ruleset = FieldRuleset(tags=["586"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.AWARDS_RULESETS)
 
-    @property
+    PRODUCTION_CREDITS_RULESETS = (FieldRuleset(tags=["508"], text_sfs="a"),)
+
+    @cached_property
     def production_credits(self):
-        ruleset = FieldRuleset(tags=["508"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.PRODUCTION_CREDITS_RULESETS)
 
-    @property
+    BIBLIOGRAPHY_RULESETS = (FieldRuleset(tags=["504"], text_sfs="a"),)
+
+    @cached_property
     def bibliography(self):
-        ruleset = FieldRuleset(tags=["504"], text_sfs="a")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.BIBLIOGRAPHY_RULESETS)
 
-    @property
+    PUBLISHER_NUMBER_RULESETS = (FieldRuleset(tags=["028"], text_sfs="ab"),)
+
+    @cached_property
     def publisher_number(self):
-        ruleset = FieldRuleset(tags=["028"], text_sfs="ab")
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.PUBLISHER_NUMBER_RULESETS)
 
-    @property
+    CONTENTS_RULESETS = (FieldRuleset(tags=["505"]),)
+
+    @cached_property
     def contents(self):
-        ruleset = FieldRuleset(tags=["505"])
-        return self.processor.generate_paired_fields(tuple([ruleset]))
+        return self.processor.generate_paired_fields(self.CONTENTS_RULESETS)
 
 
 class BaseRecord(SolrDoc, MARC):
-    def __init__(self, data: dict):
-        self.data = data
-        self.record = pymarc.parse_xml_to_array(io.StringIO(data["fullrecord"]))[0]
+    def __init__(
+        self,
+        data: dict,
+        record: pymarc.Record | None = None,
+        holdings_view: HoldingsView = HoldingsView(),
+        sections: frozenset | None = None,
+    ):
+        """
+        The parsed MARC record is shared by everything built from this record
+        (MARC display fields, holdings, reservable items, citations). It can
+        be passed in if the caller has already parsed the fullrecord.
+        Otherwise fullrecord is parsed the first time something needs it, so
+        a response made only of solr fields never parses it.
+
+        holdings_view picks the part of the holdings that is built. sections
+        are the fields the response needs, so one without marc only parses
+        the MARC tags its fields read.
+        """
         SolrDoc.__init__(self, data)
-        MARC.__init__(self, self.record)
+        self.holdings_view = holdings_view
+        self.sections = sections
+        if record is not None:
+            MARC.__init__(self, record)
+
+    @cached_property
+    def record(self):
+        """
+        A response with the marc field needs the whole record, so it's parsed
+        up front. Otherwise it's a LazyRecord, and only the tags the
+        response's fields read are parsed.
+        """
+        if self.sections is None or "marc" in self.sections:
+            return parse_marcxml(self.data["fullrecord"])
+        return LazyRecord(self.data["fullrecord"])
 
     @property
     def marc(self):
-        return json.loads(self.record.as_json())
+        return self.record.as_dict()
 
     @property
+    def marcxml(self):
+        return self.data["fullrecord"]
+
+    @cached_property
     def holdings(self):
         holdings_data = json.loads(self.data.get("hol"))
-        return Holdings(holdings_data, bib_id=self.id, record=self.record)
+        return Holdings(
+            holdings_data,
+            bib_id=self.id,
+            view=self.holdings_view,
+            load_record=lambda: self.record,
+            load_processor=lambda: self.processor,
+        )
 
 
 class TaggedCitation:
@@ -610,9 +970,7 @@ class TaggedCitation:
             "ruleset": FieldRuleset(
                 tags=["700"],
                 text_sfs="ab",
-                filter=lambda field: (
-                    field.indicator1 == "0" and re.match("ed", field.get("e", ""))
-                ),
+                filter="forename_ed_role",
             ),
             "ris": ["ED", "A2"],
             "meta": ["editor"],
@@ -795,10 +1153,15 @@ class TaggedCitation:
     }
 
     def __init__(
-        self, marc_record, base_record, solr_doc={}, type_mapping=TYPE_MAPPING
+        self,
+        marc_record,
+        base_record,
+        solr_doc={},
+        type_mapping=TYPE_MAPPING,
+        processor=None,
     ):
         self.solr_processor = SolrDocProcessor(solr_doc)
-        self.processor = Processor(marc_record)
+        self.processor = processor or Processor(marc_record)
         self.base_record = base_record
         self.type_mapping = type_mapping
 
@@ -1057,9 +1420,9 @@ class CSL:
         "book",
     ]
 
-    def __init__(self, base_record=None, marc_record=None, solr_doc={}):
+    def __init__(self, base_record=None, marc_record=None, solr_doc={}, processor=None):
         self.solr_processor = SolrDocProcessor(solr_doc)
-        self.processor = Processor(marc_record)
+        self.processor = processor or Processor(marc_record)
         self.base_record = base_record
 
     @property
@@ -1075,15 +1438,16 @@ class CSL:
                 if t in types:
                     return t
 
+    TITLE_RULESETS = (
+        FieldRuleset(
+            tags=["245"],
+            text_sfs="abp",
+        ),
+    )
+
     @property
     def title(self):
-        rulesets = (
-            FieldRuleset(
-                tags=["245"],
-                text_sfs="abp",
-            ),
-        )
-        return self._get_marc_content(rulesets)
+        return self._get_marc_content(self.TITLE_RULESETS)
 
     @property
     def edition(self):
@@ -1107,35 +1471,37 @@ class CSL:
         if result:
             return result[0]
 
+    PUBLISHER_PLACE_RULESETS = (
+        FieldRuleset(
+            tags=["260"],
+            text_sfs="a",
+        ),
+        FieldRuleset(
+            tags=["264"],
+            text_sfs="a",
+            filter="second_indicator_1",
+        ),
+    )
+
     @property
     def publisher_place(self):
-        rulesets = (
-            FieldRuleset(
-                tags=["260"],
-                text_sfs="a",
-            ),
-            FieldRuleset(
-                tags=["264"],
-                text_sfs="a",
-                filter=lambda field: (field.indicator2 == "1"),
-            ),
-        )
-        return self._get_marc_content(rulesets)
+        return self._get_marc_content(self.PUBLISHER_PLACE_RULESETS)
+
+    PUBLISHER_RULESETS = (
+        FieldRuleset(
+            tags=["260"],
+            text_sfs="b",
+        ),
+        FieldRuleset(
+            tags=["264"],
+            text_sfs="b",
+            filter="second_indicator_1",
+        ),
+    )
 
     @property
     def publisher(self):
-        rulesets = (
-            FieldRuleset(
-                tags=["260"],
-                text_sfs="b",
-            ),
-            FieldRuleset(
-                tags=["264"],
-                text_sfs="b",
-                filter=lambda field: (field.indicator2 == "1"),
-            ),
-        )
-        return self._get_marc_content(rulesets)
+        return self._get_marc_content(self.PUBLISHER_RULESETS)
 
     @property
     def issued(self):
@@ -1143,47 +1509,32 @@ class CSL:
         if date_str:
             return {"literal": date_str}
 
+    # regular main authors
+    MAIN_AUTHOR_RULESETS = (
+        FieldRuleset(
+            tags=["100", "700"],
+            text_sfs="a",
+            filter="surname_author",
+        ),
+        FieldRuleset(
+            tags=["100", "700"],
+            text_sfs="ab",
+            filter="forename_author",
+        ),
+    )
+    CORPORATE_AUTHOR_RULESETS = (
+        FieldRuleset(
+            tags=["110", "111", "710", "711"],
+            text_sfs="ab",
+            filter="author",
+        ),
+    )
+
     @property
     def author(self):
-        result = []
-        field_e_strings = [
-            "ed",
-            "ed.",
-            "editor",
-            "editor.",
-            "trans.",
-            "translator",
-            "translator.",
-        ]
-        # regular main authors
-        main_author_rulesets = (
-            FieldRuleset(
-                tags=["100", "700"],
-                text_sfs="a",
-                filter=lambda field: (
-                    field.indicator1 == "1" and field.get("e") not in field_e_strings
-                ),
-            ),
-            FieldRuleset(
-                tags=["100", "700"],
-                text_sfs="ab",
-                filter=lambda field: (
-                    field.indicator1 == "0" and field.get("e") not in field_e_strings
-                ),
-            ),
-        )
-
-        result = self._to_author(self._get_marc_contents(main_author_rulesets))
-        # corporate authors
-        corporate_author_rulesets = (
-            FieldRuleset(
-                tags=["110", "111", "710", "711"],
-                text_sfs="ab",
-                filter=lambda field: (field.get("e") not in field_e_strings),
-            ),
-        )
+        result = self._to_author(self._get_marc_contents(self.MAIN_AUTHOR_RULESETS))
         corporate_authors = self._to_literal(
-            self._get_marc_contents(corporate_author_rulesets)
+            self._get_marc_contents(self.CORPORATE_AUTHOR_RULESETS)
         )
         if corporate_authors:
             for c in corporate_authors:
@@ -1191,34 +1542,30 @@ class CSL:
         if result:
             return result
 
+    EDITOR_RULESETS = (
+        FieldRuleset(
+            tags=["700"],
+            text_sfs="a",
+            filter="surname_editor",
+        ),
+        FieldRuleset(
+            tags=["700"],
+            text_sfs="ab",
+            filter="forename_editor",
+        ),
+    )
+
     @property
     def editor(self):
-        field_e_strings = ["ed", "ed.", "editor", "editor."]
-        rulesets = (
-            FieldRuleset(
-                tags=["700"],
-                text_sfs="a",
-                filter=lambda field: (
-                    field.indicator1 == "1" and field.get("e") in field_e_strings
-                ),
-            ),
-            FieldRuleset(
-                tags=["700"],
-                text_sfs="ab",
-                filter=lambda field: (
-                    field.indicator1 == "0" and field.get("e") in field_e_strings
-                ),
-            ),
-        )
-        result = self._to_author(self._get_marc_contents(rulesets))
+        result = self._to_author(self._get_marc_contents(self.EDITOR_RULESETS))
         if result:
             return result
 
     @property
     def number(self):
-        if self._get_base_content("report_number"):
-            return self._get_base_content("report_number")
-        return self._get_base_content("numbering")
+        return self._get_base_content("report_number") or self._get_base_content(
+            "numbering"
+        )
 
     def _get_marc_contents(self, rulesets):
         result = self.processor.generate_unpaired_fields(rulesets)
@@ -1257,10 +1604,15 @@ class CSL:
 
 
 class Citation:
-    def __init__(self, marc_record, base_record, solr_doc={}):
+    def __init__(self, marc_record, base_record, solr_doc={}, processor=None):
+        """
+        processor is shared by both citations; it's made from marc_record if
+        it isn't given.
+        """
         self.marc_record = marc_record
         self.base_record = base_record
         self.solr_doc = solr_doc
+        self.processor = processor or Processor(marc_record)
 
     @property
     def tagged(self):
@@ -1268,6 +1620,7 @@ class Citation:
             marc_record=self.marc_record,
             base_record=self.base_record,
             solr_doc=self.solr_doc,
+            processor=self.processor,
         ).to_list()
 
     @property
@@ -1276,15 +1629,16 @@ class Citation:
             marc_record=self.marc_record,
             base_record=self.base_record,
             solr_doc=self.solr_doc,
+            processor=self.processor,
         )
 
 
 class Record(BaseRecord):
-    def __init__(self, data: dict):
-        self.data = data
-        self.record = pymarc.parse_xml_to_array(io.StringIO(data["fullrecord"]))[0]
-        BaseRecord.__init__(self, data)
-
-    @property
+    @cached_property
     def citation(self):
-        return Citation(marc_record=self.record, base_record=self, solr_doc=self.data)
+        return Citation(
+            marc_record=self.record,
+            base_record=self,
+            solr_doc=self.data,
+            processor=self.processor,
+        )
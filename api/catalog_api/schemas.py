@@ -1,4 +1,5 @@
-from pydantic import BaseModel, ConfigDict, Field, AliasGenerator
+from pydantic import BaseModel, ConfigDict, Field, AliasGenerator, create_model
+from functools import lru_cache
 from typing import Optional
 import datetime
 
@@ -84,6 +85,9 @@ class PhysicalHolding(BaseModel):
     # public_note: str | None
     physical_location: PhysicalLocation
     items: list[PhysicalItem]
+    # Only when the items are paged
+    item_count: Optional[int] = None
+    items_link: Optional[str] = None
 
 
 class Holdings(BaseModel):
@@ -92,6 +96,9 @@ class Holdings(BaseModel):
     electronic_items: list[ElectronicItem]
     finding_aids: FindingAids | None
     physical: list[PhysicalHolding]
+    # Only when the items are paged
+    hathi_trust_item_count: Optional[int] = None
+    hathi_trust_items_link: Optional[str] = None
 
 
 ############
@@ -264,6 +271,45 @@ class Record(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+# The marc field of a response that passes fullrecord through as MARCXML. It's
+# read from Record.marcxml, so the record isn't parsed for it.
+RAW_MARC_FIELD = ("marcxml", (str, Field(serialization_alias="marc")))
+
+
+@lru_cache(maxsize=256)
+def partial_record(fields: frozenset[str], raw_marc: bool = False) -> type[BaseModel]:
+    """
+    A Record schema with only the given fields, in the same order as Record.
+    With raw_marc, marc is the MARCXML string instead of MARC-in-JSON.
+    """
+    return create_model(
+        "PartialRecord",
+        __config__=Record.model_config,
+        **dict(
+            RAW_MARC_FIELD
+            if raw_marc and name == "marc"
+            else (name, (info.annotation, info))
+            for name, info in Record.model_fields.items()
+            if name in fields
+        ),
+    )
+
+
+class RecordsBatchRequest(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=100)
+
+
+class RecordsBatchItem(BaseModel):
+    id: str
+    status: int
+    record: Optional[Record] = None
+    detail: Optional[str] = None
+
+
+class RecordsBatch(BaseModel):
+    records: list[RecordsBatchItem]
+
+
 class Response(BaseModel):
     detail: str
 
@@ -10,11 +10,67 @@ class Services:
     solr_cloud_on: bool
     solr_user: str
     solr_password: str
+    solr_max_connections: int
+    solr_max_keepalive_connections: int
+    solr_keepalive_expiry: float
+    solr_timeout: float
+    solr_realtime_get_on: bool
+    record_cache_max_entries: int
+    record_cache_max_bytes: int
+    record_cache_ttl: float
+    record_cache_backend: str
+    record_cache_max_entry_bytes: int
+    record_cache_sqlite_path: str
+    redis_url: str
+    record_id_pattern: str
+    missing_record_cache_max_entries: int
+    missing_record_cache_ttl: float
+    marc_parser: str
+    strict_response_rate: float
+    compression_encodings: str
+    compression_min_bytes: int
+    admin_token: str
 
 
 S = Services(
     solr_url=os.getenv("SOLR_URL") or "http://solr:8983",
     solr_cloud_on=os.getenv("SOLR_CLOUD_ON") == "true",
     solr_user=os.getenv("SOLR_USER") or "solr",
-    solr_password=os.getenv("SOLR_PASSWORD") or "SolrRocks"
-)
\ No newline at end of file
+    solr_password=os.getenv("SOLR_PASSWORD") or "SolrRocks",
+    solr_max_connections=int(os.getenv("SOLR_MAX_CONNECTIONS") or 100),
+    solr_max_keepalive_connections=int(
+        os.getenv("SOLR_MAX_KEEPALIVE_CONNECTIONS") or 20
+    ),
+    solr_keepalive_expiry=float(os.getenv("SOLR_KEEPALIVE_EXPIRY") or 30),
+    solr_timeout=float(os.getenv("SOLR_TIMEOUT") or 10),
+    solr_realtime_get_on=os.getenv("SOLR_REALTIME_GET_ON", "true") == "true",
+    record_cache_max_entries=int(os.getenv("RECORD_CACHE_MAX_ENTRIES") or 1000),
+    record_cache_max_bytes=int(
+        os.getenv("RECORD_CACHE_MAX_BYTES") or 64 * 1024 * 1024
+    ),
+    record_cache_ttl=float(os.getenv("RECORD_CACHE_TTL") or 300),
+    record_cache_backend=os.getenv("RECORD_CACHE_BACKEND") or "memory",
+    record_cache_max_entry_bytes=int(
+        os.getenv("RECORD_CACHE_MAX_ENTRY_BYTES") or 8 * 1024 * 1024
+    ),
+    record_cache_sqlite_path=os.getenv("RECORD_CACHE_SQLITE_PATH")
+    or "/tmp/catalog-api-cache.sqlite3",
+    redis_url=os.getenv("REDIS_URL") or "redis://redis:6379/0",
+    # Alma mms_ids and HathiTrust ids with a 11 prefix
+    record_id_pattern=os.getenv("RECORD_ID_PATTERN", r"99\d+6381|11\d+"),
+    missing_record_cache_max_entries=int(
+        os.getenv("MISSING_RECORD_CACHE_MAX_ENTRIES") or 10000
+    ),
+    missing_record_cache_ttl=float(os.getenv("MISSING_RECORD_CACHE_TTL") or 60),
+    # pymarc, etree, lxml or compact; see catalog_api.marc.MARC_PARSERS
+    marc_parser=os.getenv("MARC_PARSER") or "etree",
+    # Share of responses also validated with their schema; see
+    # catalog_api.main.serialize_record
+    strict_response_rate=float(os.getenv("STRICT_RESPONSE_RATE") or 0),
+    # Content codings offered, most preferred first; see
+    # catalog_api.compression
+    compression_encodings=os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip"),
+    compression_min_bytes=int(os.getenv("COMPRESSION_MIN_BYTES") or 1024),
+    # Bearer token the /admin endpoints require; they're off without one
+    admin_token=os.getenv("ADMIN_TOKEN") or "",
+)
@@ -1,6 +1,25 @@
 from catalog_api.entities import TextField, PairedField
 
 
+class FieldRecorder(dict):
+    """
+    A solr document that keeps track of which fields are read from it. Used to
+    work out which stored fields the record builder needs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields_read = set()
+
+    def get(self, key, default=None):
+        self.fields_read.add(key)
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self.fields_read.add(key)
+        return super().__getitem__(key)
+
+
 class SolrDocProcessor:
     def __init__(self, data: dict):
         self.data = data
@@ -1,5 +1,4 @@
-import requests
-from requests.auth import HTTPBasicAuth
+import httpx
 from catalog_api.services import S
 
 
@@ -7,17 +6,109 @@ class NotFoundError(Exception):
     pass
 
 
-class SolrClient:
-    def __init__(self) -> None:
-        self.session = requests.Session()
-        self.base_url = f"{S.solr_url}/solr/biblio"
+class SolrPool:
+    """
+    The process-wide pool of HTTP connections to Solr. It is opened when the
+    app starts up and closed when it shuts down, so every request reuses the
+    same kept-alive connections.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        self.transport = transport
+        self.client: httpx.AsyncClient | None = None
+
+    def open(self) -> None:
+        auth = None
         if S.solr_cloud_on:
-            self.session.auth = HTTPBasicAuth(S.solr_user, S.solr_password)
+            auth = httpx.BasicAuth(S.solr_user, S.solr_password)
+        self.client = httpx.AsyncClient(
+            base_url=f"{S.solr_url}/solr/biblio",
+            auth=auth,
+            timeout=S.solr_timeout,
+            limits=httpx.Limits(
+                max_connections=S.solr_max_connections,
+                max_keepalive_connections=S.solr_max_keepalive_connections,
+                keepalive_expiry=S.solr_keepalive_expiry,
+            ),
+            transport=self.transport,
+        )
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+solr_pool = SolrPool()
+
 
-    def get_record(self, id: str):
-        params = {"q": f"id:{id}"}
-        url = f"{self.base_url}/select"
-        response = self.session.get(url, params=params)
-        if response.json()["response"]["numFound"] == 0:
+class SolrClient:
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient | None = None,
+        realtime_get: bool = S.solr_realtime_get_on,
+    ) -> None:
+        self.http_client = http_client or solr_pool.client
+        if self.http_client is None:
+            raise RuntimeError("The Solr connection pool has not been opened")
+        self.realtime_get = realtime_get
+
+    async def get_record(self, id: str, fl: tuple[str, ...] | None = None) -> dict:
+        """
+        Looks up a record by id with the real-time get handler. The id is a
+        plain request parameter there, so it never reaches the query parser.
+        Cores with /get disabled fall back to a term query on /select.
+
+        fl limits the stored fields solr sends back.
+        """
+        params = {"fl": ",".join(fl)} if fl else {}
+        if self.realtime_get:
+            doc = (await self._get("/get", {"id": id, **params}))["doc"]
+        else:
+            response = await self._get("/select", {**self._term_query(id), **params})
+            docs = response["response"]["docs"]
+            doc = docs[0] if docs else None
+
+        if doc is None:
             raise NotFoundError()
-        return response.json()["response"]["docs"][0]
+        return doc
+
+    async def get_records(
+        self, ids: list[str], fl: tuple[str, ...] | None = None
+    ) -> dict[str, dict]:
+        """
+        Looks up many records in one request, with a multi-id real-time get
+        or, on cores without /get, a terms query on /select. Returns the docs
+        that were found keyed by id.
+        """
+        params = {"fl": ",".join(fl)} if fl else {}
+        if self.realtime_get:
+            response = await self._get(
+                "/get", [("id", id) for id in ids] + list(params.items())
+            )
+            if "doc" in response:
+                # solr answers a single id the same way as get_record
+                docs = [response["doc"]] if response["doc"] else []
+            else:
+                docs = response["response"]["docs"]
+        else:
+            query = {
+                "q": "{!terms f=id v=$record_ids}",
+                "record_ids": ",".join(ids),
+                "rows": len(ids),
+            }
+            docs = (await self._get("/select", {**query, **params}))["response"]["docs"]
+        return {doc["id"]: doc for doc in docs}
+
+    def _term_query(self, id: str) -> dict:
+        """
+        The term parser matches the id exactly as given, and dereferencing it
+        from its own parameter means it is never parsed as query syntax, so
+        ids like `*` or `a OR b` are just ids that aren't found.
+        """
+        return {"q": "{!term f=id v=$record_id}", "record_id": id, "rows": 1}
+
+    async def _get(self, path: str, params: dict | list) -> dict:
+        response = await self.http_client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
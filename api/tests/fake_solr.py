@@ -0,0 +1,49 @@
+import httpx
+
+
+class FakeSolr:
+    """
+    Stands in for the biblio core. It answers real-time gets and term queries
+    for the docs it was given and keeps the requests it received.
+    """
+
+    def __init__(self, docs: list, realtime_get: bool = True):
+        self.docs = {doc["id"]: doc for doc in docs}
+        self.realtime_get = realtime_get
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        params = request.url.params
+        match request.url.path:
+            case "/solr/biblio/get" if self.realtime_get:
+                ids = params.get_list("id")
+                if len(ids) == 1:
+                    return httpx.Response(
+                        200, json={"doc": self._find(ids[0], params.get("fl"))}
+                    )
+                docs = [self._find(id, params.get("fl")) for id in ids]
+                docs = [doc for doc in docs if doc]
+                return httpx.Response(
+                    200, json={"response": {"numFound": len(docs), "docs": docs}}
+                )
+            case "/solr/biblio/select":
+                if params["q"] == "{!terms f=id v=$record_ids}":
+                    ids = params["record_ids"].split(",")
+                else:
+                    assert params["q"] == "{!term f=id v=$record_id}"
+                    ids = [params["record_id"]]
+                docs = [self._find(id, params.get("fl")) for id in ids]
+                docs = [doc for doc in docs if doc]
+                return httpx.Response(
+                    200, json={"response": {"numFound": len(docs), "docs": docs}}
+                )
+            case _:
+                return httpx.Response(404)
+
+    def _find(self, id: str, fl: str | None) -> dict | None:
+        doc = self.docs.get(id)
+        if doc and fl:
+            fields = fl.split(",")
+            return {key: value for key, value in doc.items() if key in fields}
+        return doc
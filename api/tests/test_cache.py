@@ -0,0 +1,471 @@
+import asyncio
+import gzip
+import fakeredis
+import pytest
+from catalog_api import cache
+from redis.asyncio import Redis
+from catalog_api.cache import (
+    MissingRecordCache,
+    RecordCache,
+    RedisBackend,
+    SharedRecordCache,
+    SQLiteBackend,
+    decode_entry,
+    encode_entry,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    return FakeClock()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def cache_for(clock, max_entries=10, max_bytes=1000, ttl=60):
+    return RecordCache(
+        max_entries=max_entries, max_bytes=max_bytes, ttl=ttl, clock=clock
+    )
+
+
+class TestRecordCache:
+    def test_get_a_stored_record(self, clock):
+        subject = cache_for(clock)
+        run(subject.set("1", b"body", "2025-03-18T00:00:00Z"))
+        assert run(subject.get("1")).body == b"body"
+        assert subject.hits == 1
+
+    def test_get_a_missing_record(self, clock):
+        subject = cache_for(clock)
+        assert run(subject.get("1")) is None
+        assert subject.misses == 1
+
+    def test_variants_are_separate(self, clock):
+        subject = cache_for(clock)
+        run(subject.set("1", b"full", "d1"))
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        assert run(subject.get("1")).body == b"full"
+        assert run(subject.get("1", frozenset(["title"]))).body == b"title"
+
+    def test_get_many_and_set_many(self, clock):
+        subject = cache_for(clock)
+        run(subject.set_many({"1": (b"one", "d1", 1), "2": (b"two", "d1", 2)}))
+        entries = run(subject.get_many(["1", "2", "3"]))
+        assert {id: entry.body for id, entry in entries.items()} == {
+            "1": b"one",
+            "2": b"two",
+        }
+        assert (subject.hits, subject.misses) == (2, 1)
+
+    def test_expires_after_ttl(self, clock):
+        subject = cache_for(clock, ttl=60)
+        run(subject.set("1", b"body", "d1"))
+        clock.now = 60
+        assert run(subject.get("1")) is None
+        assert subject.expirations == 1
+        assert subject.bytes == 0
+
+    def test_evicts_least_recently_used_past_max_entries(self, clock):
+        subject = cache_for(clock, max_entries=2)
+        run(subject.set("1", b"one", "d1"))
+        run(subject.set("2", b"two", "d1"))
+        run(subject.get("1"))
+        run(subject.set("3", b"three", "d1"))
+        assert run(subject.get("2")) is None
+        assert run(subject.get("1")).body == b"one"
+        assert subject.evictions == 1
+
+    def test_evicts_past_max_bytes(self, clock):
+        subject = cache_for(clock, max_bytes=10)
+        run(subject.set("1", b"12345", "d1"))
+        run(subject.set("2", b"123456", "d1"))
+        assert run(subject.get("1")) is None
+        assert subject.bytes == 6
+
+    def test_does_not_store_a_body_bigger_than_max_bytes(self, clock):
+        subject = cache_for(clock, max_bytes=10)
+        run(subject.set("1", b"12345678901", "d1"))
+        assert run(subject.get("1")) is None
+
+    def test_keeps_compressed_bodies_and_counts_their_bytes(self, clock):
+        subject = cache_for(clock, max_bytes=10)
+        run(subject.set("1", b"12345", "d1", compressed={"gzip": b"123"}))
+        assert run(subject.get("1")).compressed == {"gzip": b"123"}
+        assert subject.bytes == 8
+        run(subject.set("2", b"12345", "d1", compressed={"gzip": b"123456"}))
+        assert run(subject.get("2")) is None
+
+    def test_a_reindexed_record_replaces_every_variant(self, clock):
+        subject = cache_for(clock)
+        run(subject.set("1", b"full", "d1"))
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        run(subject.set("1", b"new full", "d2"))
+        assert run(subject.get("1")).body == b"new full"
+        assert run(subject.get("1", frozenset(["title"]))) is None
+
+    def test_delete(self, clock):
+        subject = cache_for(clock)
+        run(subject.set("1", b"full", "d1"))
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        run(subject.set("2", b"two", "d1"))
+        run(subject.delete("1"))
+        assert subject.stats["entries"] == 1
+        assert run(subject.get("2")).body == b"two"
+
+    def test_clear(self, clock):
+        subject = cache_for(clock)
+        run(subject.set("1", b"one", "d1"))
+        run(subject.clear())
+        assert subject.stats["entries"] == 0
+        assert subject.bytes == 0
+
+    def test_disabled(self, clock):
+        subject = cache_for(clock, max_entries=0)
+        run(subject.set("1", b"one", "d1"))
+        assert run(subject.get("1")) is None
+        assert subject.misses == 0
+
+
+class TestMissingRecordCache:
+    def subject(self, clock, id_pattern=r"99\d+6381|11\d+", max_entries=10):
+        return MissingRecordCache(
+            id_pattern=id_pattern, max_entries=max_entries, ttl=60, clock=clock
+        )
+
+    @pytest.mark.parametrize(
+        "id", ["990008019700106381", "11000012345"], ids=["alma", "hathitrust"]
+    )
+    def test_well_formed_ids(self, clock, id):
+        assert not self.subject(clock).is_malformed(id)
+
+    @pytest.mark.parametrize(
+        "id", ["", "abc", "990008019700106380", "12000012345", "11abc", "99 6381"]
+    )
+    def test_malformed_ids(self, clock, id):
+        subject = self.subject(clock)
+        assert subject.is_malformed(id)
+        assert subject.malformed == 1
+
+    def test_an_empty_pattern_accepts_every_id(self, clock):
+        assert not self.subject(clock, id_pattern="").is_malformed("abc")
+
+    def test_remembers_missing_ids_for_ttl(self, clock):
+        subject = self.subject(clock)
+        subject.add("1")
+        assert subject.is_missing("1")
+        assert not subject.is_missing("2")
+        clock.now = 60
+        assert not subject.is_missing("1")
+        assert subject.hits == 1
+        assert subject.stats["entries"] == 0
+
+    def test_drops_the_oldest_past_max_entries(self, clock):
+        subject = self.subject(clock, max_entries=2)
+        subject.add("1")
+        subject.add("2")
+        subject.add("3")
+        assert not subject.is_missing("1")
+        assert subject.is_missing("3")
+
+    def test_discard_and_clear(self, clock):
+        subject = self.subject(clock)
+        subject.add("1")
+        subject.add("2")
+        subject.discard("1")
+        assert not subject.is_missing("1")
+        subject.clear()
+        assert not subject.is_missing("2")
+
+
+def test_entries_are_compressed():
+    body = b'{"title":"Land birds"}' * 100
+    value = encode_entry(body, "2025-03-18T00:00:00Z", 1826938346434199552)
+    assert len(value) < len(body)
+    entry = decode_entry(value)
+    assert entry.body == body
+    assert entry.date_of_index == "2025-03-18T00:00:00Z"
+    assert entry.version == 1826938346434199552
+
+
+def test_entries_without_a_date_of_index_or_version():
+    entry = decode_entry(encode_entry(b"{}", None))
+    assert entry.date_of_index is None
+    assert entry.version is None
+
+
+def test_entries_keep_the_compressed_body_they_are_given():
+    body = b'{"title":"Land birds"}' * 100
+    compressed = gzip.compress(body, compresslevel=1)
+    value = encode_entry(body, "d1", 1, {"gzip": compressed})
+    assert value.endswith(b"\n" + compressed)
+    entry = decode_entry(value)
+    assert entry.body == body
+    assert entry.compressed == {"gzip": compressed}
+
+
+def test_entries_are_decompressed_when_their_body_is_read(monkeypatch):
+    body = b'{"title":"Land birds"}' * 100
+    value = encode_entry(body, "d1", 1)
+    monkeypatch.setattr(cache, "decompress", lambda data, encoding: pytest.fail())
+    entry = decode_entry(value)
+    assert entry.uncompressed is None
+    assert entry.body_size == len(body)
+    assert entry.compressed["gzip"] == value.split(b"\n", 1)[1]
+    monkeypatch.undo()
+    assert entry.body == body
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        b"d1 1 gzip\nbody",
+        b"d1 1\nbody",
+        b"d1 1 gzip many\nbody",
+        b"d1 1 compress 4\nbody",
+        b"body",
+    ],
+)
+def test_values_without_a_full_header_are_not_entries(value):
+    assert decode_entry(value) is None
+
+
+@pytest.fixture()
+def sqlite_backend(tmp_path, clock):
+    return SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1000, clock=clock)
+
+
+@pytest.fixture()
+def redis():
+    return fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+
+@pytest.fixture()
+def redis_backend(redis):
+    return RedisBackend(redis)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request):
+    return request.getfixturevalue(f"{request.param}_backend")
+
+
+class TestSharedRecordCache:
+    def test_get_a_stored_record(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"body", "d1"))
+        entry = run(subject.get("1"))
+        assert entry.body == b"body"
+        assert entry.date_of_index == "d1"
+        assert subject.hits == 1
+
+    def test_get_a_missing_record(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        assert run(subject.get("1")) is None
+        assert subject.misses == 1
+
+    def test_entries_are_built_off_the_event_loop(self, backend, monkeypatch):
+        loops = []
+
+        def encode_entry(*args):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return b"d1 1 gzip 4\n" + gzip.compress(b"body")
+
+        monkeypatch.setattr(cache, "encode_entry", encode_entry)
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"body", "d1"))
+        assert loops == [None]
+        assert run(subject.get("1")).body == b"body"
+
+    def test_workers_share_entries(self, backend):
+        worker_1 = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        worker_2 = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(worker_1.set("1", b"body", "d1"))
+        assert run(worker_2.get("1")).body == b"body"
+
+    def test_variants_are_separate(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"full", "d1"))
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        assert run(subject.get("1")).body == b"full"
+        assert run(subject.get("1", frozenset(["title"]))).body == b"title"
+        assert run(subject.get("1", frozenset(["format"]))) is None
+
+    def test_a_value_that_is_not_an_entry_is_a_miss(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(backend.set("1", {"record:1:all": b"d1 1\nbody"}, 60))
+        assert run(subject.get("1")) is None
+        assert subject.misses == 1
+
+    def test_expires_after_ttl(self, sqlite_backend, clock):
+        subject = SharedRecordCache(sqlite_backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"body", "d1"))
+        clock.now = 60
+        assert run(subject.get("1")) is None
+
+    def test_hits_come_compressed(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"body", "d1"))
+        assert gzip.decompress(run(subject.get("1")).compressed["gzip"]) == b"body"
+
+    def test_does_not_store_an_entry_bigger_than_max_entry_bytes(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=10)
+        run(subject.set("1", b"a body longer than ten bytes", "d1"))
+        assert run(subject.get("1")) is None
+
+    def test_a_reindexed_record_replaces_every_variant(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"full", "d1"))
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        run(subject.set("1", b"new full", "d2"))
+        assert run(subject.get("1")).body == b"new full"
+        assert run(subject.get("1", frozenset(["title"]))) is None
+
+    def test_get_many_and_set_many(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set_many({"1": (b"one", "d1", 1), "2": (b"two", "d1", 2)}))
+        entries = run(subject.get_many(["1", "2", "3"]))
+        assert {id: entry.body for id, entry in entries.items()} == {
+            "1": b"one",
+            "2": b"two",
+        }
+        assert entries["2"].version == 2
+        assert (subject.hits, subject.misses) == (2, 1)
+
+    def test_a_batch_is_one_backend_request_each_way(self, backend, monkeypatch):
+        calls = []
+        for name in ("get", "get_many", "set", "set_many"):
+            method = getattr(backend, name)
+
+            async def counted(*args, name=name, method=method):
+                calls.append(name)
+                return await method(*args)
+
+            monkeypatch.setattr(backend, name, counted)
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        ids = [str(id) for id in range(20)]
+        run(subject.get_many(ids))
+        run(subject.set_many({id: (b"body", "d1", 1) for id in ids}))
+        assert len(run(subject.get_many(ids))) == 20
+        # The versions are read before storing, to drop reindexed records
+        assert calls == ["get_many", "get_many", "set_many", "get_many"]
+
+    def test_set_many_replaces_reindexed_records(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        run(subject.set_many({"1": (b"new full", "d2", 2), "2": (b"two", "d1", 1)}))
+        assert run(subject.get("1", frozenset(["title"]))) is None
+        assert run(subject.get("1")).body == b"new full"
+
+    def test_delete(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"full", "d1"))
+        run(subject.set("1", b"title", "d1", variant=frozenset(["title"])))
+        run(subject.set("2", b"two", "d1"))
+        run(subject.delete("1"))
+        assert run(subject.get("1")) is None
+        assert run(subject.get("1", frozenset(["title"]))) is None
+        assert run(subject.get("2")).body == b"two"
+
+    def test_clear(self, backend):
+        subject = SharedRecordCache(backend, ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"one", "d1"))
+        run(subject.set("2", b"two", "d1"))
+        run(subject.clear())
+        assert run(subject.get("1")) is None
+        assert run(subject.get("2")) is None
+
+
+class TestSQLiteBackend:
+    def test_drops_least_recently_read_entries_past_max_bytes(self, tmp_path, clock):
+        subject = SQLiteBackend(str(tmp_path / "c.sqlite3"), max_bytes=10, clock=clock)
+        run(subject.set("1", {"a": b"12345"}, 60))
+        clock.now = 1
+        run(subject.set("2", {"b": b"12345"}, 60))
+        clock.now = 2
+        run(subject.get("a"))
+        clock.now = 3
+        run(subject.set("3", {"c": b"12345"}, 60))
+        assert run(subject.get("b")) is None
+        assert run(subject.get("a")) == b"12345"
+        assert run(subject.get("c")) == b"12345"
+
+    def test_keeps_the_total_size(self, tmp_path, clock):
+        path = str(tmp_path / "c.sqlite3")
+        subject = SQLiteBackend(path, max_bytes=1000, clock=clock)
+        other_worker = SQLiteBackend(path, max_bytes=1000, clock=clock)
+        run(subject.set("1", {"a": b"12345"}, 60))
+        run(other_worker.set("2", {"b": b"123"}, 60))
+        run(subject.set("1", {"a": b"12"}, 60))
+        assert subject.total_bytes == 5
+        run(other_worker.delete("1"))
+        assert subject.total_bytes == 3
+        run(subject.clear())
+        assert other_worker.total_bytes == 0
+
+    def test_counts_existing_entries_when_opened(self, tmp_path, clock):
+        path = str(tmp_path / "c.sqlite3")
+        run(SQLiteBackend(path, max_bytes=1000, clock=clock).set("1", {"a": b"xy"}, 60))
+        assert SQLiteBackend(path, max_bytes=1000, clock=clock).total_bytes == 2
+
+    def test_writes_reads_in_batches(self, tmp_path, clock):
+        path = str(tmp_path / "c.sqlite3")
+        subject = SQLiteBackend(path, max_bytes=1000, clock=clock, read_batch=2)
+        run(subject.set("1", {"a": b"x"}, 60))
+        run(subject.set("2", {"b": b"x"}, 60))
+        read_at = "SELECT read_at FROM record_cache ORDER BY key"
+        clock.now = 1
+        run(subject.get("a"))
+        assert subject.connection.execute(read_at).fetchall() == [(0,), (0,)]
+        run(subject.get("b"))
+        assert subject.connection.execute(read_at).fetchall() == [(1,), (1,)]
+
+    def test_entries_survive_reopening(self, tmp_path, clock):
+        path = str(tmp_path / "c.sqlite3")
+        run(SQLiteBackend(path, max_bytes=1000, clock=clock).set("1", {"a": b"x"}, 60))
+        assert run(SQLiteBackend(path, max_bytes=1000, clock=clock).get("a")) == b"x"
+
+
+class TestRedisBackend:
+    def test_an_unreachable_server_is_a_miss(self):
+        redis = Redis.from_url("redis://127.0.0.1:1/0", socket_connect_timeout=0.5)
+        subject = SharedRecordCache(RedisBackend(redis), ttl=60, max_entry_bytes=1000)
+        run(subject.set("1", b"body", "d1"))
+        assert run(subject.get("1")) is None
+        assert subject.misses == 1
+        assert subject.errors == 2
+
+    def test_stores_entries_and_their_key_set_with_the_ttl(self, redis):
+        subject = RedisBackend(redis, prefix="test:")
+        run(subject.set("1", {"record:1:version": b"d1", "record:1:all": b"x"}, 60))
+
+        async def stored():
+            return (
+                await redis.get("test:record:1:all"),
+                await redis.smembers("test:keys:1"),
+                [await redis.pttl(key) for key in ("test:record:1:all", "test:keys:1")],
+            )
+
+        value, keys, ttls = run(stored())
+        assert value == b"x"
+        assert keys == {b"test:record:1:version", b"test:record:1:all"}
+        assert all(59000 < ttl <= 60000 for ttl in ttls)
+
+    def test_clear_only_drops_its_own_keys(self, redis):
+        run(redis.set("other:key", b"x"))
+        subject = RedisBackend(redis, prefix="test:")
+        run(subject.set("1", {"record:1:all": b"x"}, 60))
+        run(subject.clear())
+        assert run(redis.keys("*")) == [b"other:key"]
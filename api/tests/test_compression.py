@@ -0,0 +1,117 @@
+import dataclasses
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from catalog_api.compression import (
+    CODINGS,
+    Compression,
+    compression_for,
+    decompress,
+)
+from catalog_api.services import S
+
+
+@pytest.fixture()
+def clock():
+    times = iter([1.0, 1.25, 2.0, 2.5])
+    return lambda: next(times)
+
+
+def compression(encodings=("zstd", "br", "gzip"), min_bytes=100, **kwargs):
+    return Compression(encodings, min_bytes=min_bytes, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("GZIP", "gzip"),
+        ("*", "zstd"),
+        ("br;q=0, *", "zstd"),
+        ("gzip;q=0", None),
+        ("gzip;q=high", None),
+        ("identity", None),
+        ("deflate", None),
+        (None, None),
+    ],
+)
+def test_encoding_for(accept_encoding, expected):
+    headers = {} if accept_encoding is None else {"accept-encoding": accept_encoding}
+    assert compression().encoding_for(headers, 100) == expected
+
+
+def test_small_bodies_are_not_compressed():
+    assert compression().encoding_for({"accept-encoding": "gzip"}, 99) is None
+
+
+def test_without_encodings():
+    subject = compression(encodings=())
+    assert not subject.enabled
+    assert subject.encoding_for({"accept-encoding": "gzip"}, 1000) is None
+
+
+def test_encode_counts_bytes_and_seconds(clock):
+    subject = compression(encodings=("gzip",), clock=clock)
+    body = b'{"title":"Land birds"}' * 100
+    compressed = subject.encode(body, "gzip")
+    assert gzip.decompress(compressed) == body
+    assert subject.stats["gzip"] == {
+        "responses": 1,
+        "precompressed": 0,
+        "bytes_in": len(body),
+        "bytes_out": len(compressed),
+        "seconds": 0.25,
+        "ratio": round(len(compressed) / len(body), 3),
+    }
+
+
+def test_send_precompressed_counts_without_compressing(clock):
+    subject = compression(encodings=("gzip",), clock=clock)
+    assert subject.send_precompressed(b"stored", "gzip", 200) == b"stored"
+    assert subject.stats["gzip"]["precompressed"] == 1
+    assert subject.stats["gzip"]["bytes_in"] == 200
+    assert subject.stats["gzip"]["bytes_out"] == 6
+    assert subject.stats["gzip"]["seconds"] == 0.0
+
+
+def test_counts_bodies_compressed_in_several_threads():
+    subject = compression(encodings=("gzip",))
+    body = b'{"title":"Land birds"}' * 100
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: subject.encode(body, "gzip"), range(400)))
+    assert subject.stats["gzip"]["responses"] == 400
+    assert subject.stats["gzip"]["bytes_in"] == 400 * len(body)
+    assert subject.stats["gzip"]["bytes_out"] == sum(map(len, results))
+
+
+def test_encode_without_an_encoding():
+    subject = compression(encodings=("gzip",))
+    assert subject.encode(b"{}", None) == b"{}"
+    assert subject.stats["gzip"]["responses"] == 0
+
+
+@pytest.mark.parametrize("encoding", sorted(CODINGS))
+def test_codings_round_trip(encoding):
+    body = b'{"title":"Land birds"}' * 100
+    assert decompress(CODINGS[encoding][0](body), encoding) == body
+
+
+def test_compression_for_leaves_out_encodings_that_are_not_installed():
+    settings = dataclasses.replace(
+        S, compression_encodings="zstd, br, gzip, compress", compression_min_bytes=10
+    )
+    result = compression_for(settings)
+    assert result.encodings == tuple(e for e in ("zstd", "br", "gzip") if e in CODINGS)
+    assert result.min_bytes == 10
+
+
+def test_every_default_encoding_is_installed():
+    assert compression_for(S).encodings == ("zstd", "br", "gzip")
+
+
+def test_compression_for_can_be_turned_off():
+    settings = dataclasses.replace(S, compression_encodings="")
+    assert not compression_for(settings).enabled
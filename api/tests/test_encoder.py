@@ -0,0 +1,86 @@
+import json
+import pytest
+from catalog_api import encoder, schemas
+from catalog_api.encoder import dump, encode, validated
+from catalog_api.main import record_schema
+from catalog_api.holdings import HoldingsView
+from catalog_api.record import Record
+
+
+def fixture_doc(name):
+    with open(f"tests/fixtures/{name}.json") as data:
+        doc = json.load(data)
+    if "response" in doc:
+        doc = doc["response"]["docs"][0]
+    return doc
+
+
+@pytest.fixture(params=["orjson", "pydantic_core"])
+def json_module(request, monkeypatch):
+    if request.param == "pydantic_core":
+        monkeypatch.setattr(encoder, "orjson", None)
+    elif encoder.orjson is None:
+        pytest.skip("orjson isn't installed")
+    return request.param
+
+
+@pytest.mark.parametrize("name", ["land_birds_solr", "alma_record"])
+@pytest.mark.parametrize(
+    "fields,exclude,marc",
+    [
+        (None, None, "json"),
+        (None, None, "raw"),
+        ("title,citation,indexing_date", None, "json"),
+        (None, "holdings", "none"),
+    ],
+)
+def test_matches_the_validated_record(json_module, name, fields, exclude, marc):
+    schema = record_schema(fields, exclude, marc)
+    sections = frozenset(schema.model_fields)
+    subject = encode(dump(Record(fixture_doc(name), sections=sections), schema))
+    assert subject == validated(Record(fixture_doc(name), sections=sections), schema)
+
+
+@pytest.mark.parametrize("name", ["land_birds_solr", "alma_record"])
+@pytest.mark.parametrize("view", [HoldingsView(), HoldingsView(limit=1)])
+def test_matches_the_validated_holdings(json_module, name, view):
+    holdings = Record(fixture_doc(name), holdings_view=view).holdings
+    assert encode(dump(holdings, schemas.Holdings)) == validated(
+        holdings, schemas.Holdings
+    )
+
+
+def test_leaves_out_none_and_uses_serialization_aliases():
+    subject = dump(
+        {
+            "id": "1",
+            "type": "book",
+            "title": "Land birds",
+            "edition": None,
+            "collection_title": "Birds of the world",
+            "isbn": ["9780000000000"],
+            "issn": None,
+            "call_number": None,
+            "publisher_place": None,
+            "publisher": None,
+            "issued": {"literal": "1999"},
+            "author": [{"family": "Tanaka", "given": None}, {"literal": "Society"}],
+            "editor": None,
+            "number": None,
+        },
+        schemas.CSL,
+    )
+    assert subject == {
+        "id": "1",
+        "type": "book",
+        "title": "Land birds",
+        "collection-title": "Birds of the world",
+        "ISBN": ["9780000000000"],
+        "issued": {"literal": "1999"},
+        "author": [{"family": "Tanaka"}, {"literal": "Society"}],
+    }
+
+
+def test_missing_required_field():
+    with pytest.raises(ValueError, match="BareTextField is missing text"):
+        dump({}, schemas.BareTextField)
@@ -12,7 +12,12 @@ from catalog_api.holdings import (
     FindingAidItem,
     ReservableItem,
     ClementsItem,
+    BentleyItem,
+    AeonRecord,
+    Holdings,
+    HoldingsView,
 )
+from catalog_api import holdings
 
 
 @pytest.fixture
@@ -152,6 +157,30 @@ class TestPhysicalHolding:
         ]
         assert expected in subject.url
 
+    def test_reservable_items_share_the_bib_fields(
+        self, physical_holding, bib_id, record, monkeypatch
+    ):
+        item = physical_holding["items"][0]
+        item["can_reserve"] = True
+        physical_holding["items"] = [
+            {**item, "library": library, "barcode": str(i)}
+            for i, library in enumerate(["SPEC", "BENT", "CLEM"] * 10)
+        ]
+        calls = []
+        generate_paired_fields = holdings.Processor.generate_paired_fields
+        monkeypatch.setattr(
+            holdings.Processor,
+            "generate_paired_fields",
+            lambda self, rulesets: (
+                calls.append(rulesets) or generate_paired_fields(self, rulesets)
+            ),
+        )
+        subject = PhysicalHolding(physical_holding, bib_id=bib_id, record=record)
+        urls = [item.url for item in subject.items]
+        assert len(set(urls)) == 30
+        # title, author, clements author, edition, publisher, place and extent
+        assert len(calls) == 7
+
     def test_item_has_a_physical_location(
         self, physical_holding, bib_id, record=record
     ):
@@ -375,6 +404,155 @@ class TestAlmaDigitalItem:
         assert getattr(subject, field) == alma_digital_item[solr_field]
 
 
+@pytest.fixture
+def holdings_data(
+    physical_holding,
+    electronic_item,
+    finding_aid_item,
+    finding_aid_physical_holding,
+    ht_item,
+    alma_digital_item,
+):
+    return [
+        {
+            "library": "HathiTrust Digital Library",
+            "items": [ht_item, {**ht_item, "id": "mdp.2"}],
+        },
+        physical_holding,
+        electronic_item,
+        alma_digital_item,
+        {**finding_aid_physical_holding, "record_has_finding_aid": True},
+        finding_aid_item,
+        {**electronic_item, "link": "https://example.com/second"},
+    ]
+
+
+class TestHoldingsView:
+    def test_page(self):
+        assert HoldingsView().page([1, 2, 3]) == [1, 2, 3]
+        assert HoldingsView(offset=1, limit=1).page([1, 2, 3]) == [2]
+        assert HoldingsView(offset=5, limit=1).page([1, 2, 3]) == []
+
+    def test_next_page_link(self):
+        subject = HoldingsView(offset=2, limit=2)
+        assert (
+            subject.next_page_link("99", 5) == "/records/99/holdings?offset=4&limit=2"
+        )
+        assert subject.next_page_link("99", 4) is None
+        assert HoldingsView().next_page_link("99", 5) is None
+
+    def test_next_page_link_limit_is_one_the_holdings_endpoint_takes(self):
+        subject = HoldingsView(limit=2000)
+        assert subject.next_page_link("99", 3000) == (
+            "/records/99/holdings?offset=2000&limit=1000"
+        )
+        assert HoldingsView(limit=0).next_page_link("99", 5) == (
+            "/records/99/holdings?offset=0&limit=1"
+        )
+
+    def test_shows(self, physical_holding):
+        assert HoldingsView().shows(physical_holding)
+        assert HoldingsView(library="MUSM", location="BIR").shows(physical_holding)
+        assert not HoldingsView(library="HATCH").shows(physical_holding)
+        assert not HoldingsView(holding_id="1").shows(physical_holding)
+
+
+class TestHoldings:
+    def test_kinds(self, holdings_data, bib_id, record, ht_item):
+        subject = Holdings(holdings_data, bib_id=bib_id, record=record)
+        assert [h.holding_id for h in subject.physical] == [
+            holdings_data[1]["hol_mmsid"],
+            holdings_data[4]["hol_mmsid"],
+        ]
+        assert [i.url for i in subject.electronic_items] == [
+            holdings_data[2]["link"],
+            "https://example.com/second",
+        ]
+        assert [i.label for i in subject.alma_digital_items] == ["Some Label"]
+        assert [i.id for i in subject.hathi_trust_items] == [ht_item["id"], "mdp.2"]
+        assert subject.finding_aids.items_data == [holdings_data[5]]
+        assert subject.finding_aids.physical_holding == holdings_data[4]
+
+    def test_no_holdings(self, bib_id, record):
+        subject = Holdings([], bib_id=bib_id, record=record)
+        assert subject.physical == []
+        assert subject.electronic_items == []
+        assert subject.alma_digital_items == []
+        assert subject.hathi_trust_items == []
+        assert subject.finding_aids is None
+
+    def test_classifies_each_holding_once(
+        self, holdings_data, bib_id, record, monkeypatch
+    ):
+        kinds = []
+        kind_of_holding = holdings.kind_of_holding
+        monkeypatch.setattr(
+            holdings,
+            "kind_of_holding",
+            lambda h: kinds.append(h) or kind_of_holding(h),
+        )
+        subject = Holdings(holdings_data, bib_id=bib_id, record=record)
+        for _ in range(2):
+            subject.physical
+            subject.electronic_items
+            subject.alma_digital_items
+            subject.hathi_trust_items
+            subject.finding_aids
+        assert len(kinds) == len(holdings_data)
+
+    def test_paged_view_only_builds_the_page(self, holdings_data, bib_id, record):
+        view = HoldingsView(offset=1, limit=1)
+        subject = Holdings(holdings_data, bib_id=bib_id, record=record, view=view)
+        assert [i.id for i in subject.hathi_trust_items] == ["mdp.2"]
+        assert subject.hathi_trust_item_count == 2
+        assert subject.hathi_trust_items_link is None
+        assert subject.physical[0].items == []
+        assert subject.physical[0].item_count == 1
+
+    def test_unpaged_view_has_no_counts(self, holdings_data, bib_id, record):
+        subject = Holdings(holdings_data, bib_id=bib_id, record=record)
+        assert subject.hathi_trust_item_count is None
+        assert subject.physical[0].item_count is None
+        assert subject.physical[0].items_link is None
+
+    def test_has_reservable_items(self, holdings_data, bib_id):
+        subject = Holdings(holdings_data, bib_id=bib_id)
+        assert not subject.has_reservable_items
+        holdings_data[1]["items"][0]["can_reserve"] = True
+        assert Holdings(holdings_data, bib_id=bib_id).has_reservable_items
+        view = HoldingsView(library="CLEM")
+        assert not Holdings(
+            holdings_data, bib_id=bib_id, view=view
+        ).has_reservable_items
+
+    def test_loads_the_record_for_reservable_items_only(
+        self, holdings_data, bib_id, record
+    ):
+        loads = []
+        subject = Holdings(
+            holdings_data,
+            bib_id=bib_id,
+            load_record=lambda: loads.append(record) or record,
+        )
+        [item.url for holding in subject.physical for item in holding.items]
+        assert loads == []
+
+        holdings_data[1]["items"][0]["can_reserve"] = True
+        subject = Holdings(
+            holdings_data,
+            bib_id=bib_id,
+            load_record=lambda: loads.append(record) or record,
+        )
+        [item.url for holding in subject.physical for item in holding.items]
+        assert loads == [record]
+
+    def test_accessors_are_memoized(self, holdings_data, bib_id, record):
+        subject = Holdings(holdings_data, bib_id=bib_id, record=record)
+        assert subject.physical is subject.physical
+        assert subject.physical[0].items is subject.physical[0].items
+        assert subject.electronic_items is subject.electronic_items
+
+
 @pytest.fixture
 def base_reservable_item(record, physical_item):
     record.add_field(
@@ -500,6 +678,22 @@ class TestReservableItem:
         for key in base_reservable_item_fields.keys():
             assert subject[key][0] == base_reservable_item_fields[key]
 
+    def test_given_shares_the_aeon_record(self, record, physical_item):
+        aeon_record = AeonRecord(record)
+        items = [
+            ReservableItem.given(
+                {**physical_item, "library": library}, record, aeon_record
+            )
+            for library in ["SPEC", "BENT", "CLEM"]
+        ]
+        assert [type(item) for item in items] == [
+            ReservableItem,
+            BentleyItem,
+            ClementsItem,
+        ]
+        assert all(item.aeon_record is aeon_record for item in items)
+        assert items[0].title == items[2].title
+
     def test_clements_genre(self, record, physical_item):
         subject = ClementsItem(record=record, physical_item_data=physical_item)
         assert subject.genre == "Book"
@@ -1,9 +1,24 @@
-import responses
+import asyncio
+import dataclasses
+import httpx
 import pytest
 import json
+import logging
 from fastapi.testclient import TestClient
+from catalog_api import cache as cache_module
+from catalog_api import holdings, main, marc
 from catalog_api.main import app
+from catalog_api.compression import Compression
+from catalog_api.cache import (
+    MissingRecordCache,
+    RecordCache,
+    SharedRecordCache,
+    SQLiteBackend,
+)
+from catalog_api.record import solr_fields
+from catalog_api.solr_client import solr_pool
 from catalog_api.services import S
+from tests.fake_solr import FakeSolr
 
 
 @pytest.fixture()
@@ -11,22 +26,68 @@ def solr_bib():
     bib = {}
     with open("tests/fixtures/land_birds_solr.json") as data:
         bib = json.load(data)
-    return bib
+    return bib["response"]["docs"][0]
 
 
 @pytest.fixture()
-def client():
-    yield TestClient(app)
+def alma_record():
+    with open("tests/fixtures/alma_record.json") as data:
+        return json.load(data)
 
 
 @pytest.fixture()
-def valid_mms_id():
-    return "990040063470106381"
+def fake_solr(solr_bib, alma_record):
+    return FakeSolr([solr_bib, alma_record])
 
 
-@responses.activate
-def test_get_record(client, valid_mms_id, solr_bib):
-    responses.get(f"{S.solr_url}/solr/biblio/select", json=solr_bib, status=200)
+@pytest.fixture(autouse=True)
+def record_cache(monkeypatch):
+    cache = RecordCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+    monkeypatch.setattr(main, "record_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def missing_records(monkeypatch):
+    cache = MissingRecordCache(id_pattern=r"99\d+6381|11\d+", max_entries=10, ttl=60)
+    monkeypatch.setattr(main, "missing_records", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def record_builds(monkeypatch):
+    builds = {"records": 0, "ruleset_evaluations": 0}
+    monkeypatch.setattr(main, "record_builds", builds)
+    return builds
+
+
+@pytest.fixture(autouse=True)
+def compression(monkeypatch):
+    compression = Compression(("gzip",), min_bytes=1024)
+    monkeypatch.setattr(main, "compression", compression)
+    return compression
+
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setattr(main, "S", dataclasses.replace(S, admin_token="secret"))
+    return "secret"
+
+
+@pytest.fixture()
+def client(fake_solr, monkeypatch, admin_token):
+    monkeypatch.setattr(solr_pool, "transport", httpx.MockTransport(fake_solr))
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app, headers=headers) as client:
+        yield client
+
+
+@pytest.fixture()
+def valid_mms_id(solr_bib):
+    return solr_bib["id"]
+
+
+def test_get_record(client, valid_mms_id):
     with open("tests/fixtures/land_birds.json") as data:
         expected = json.load(data)
 
@@ -35,3 +96,796 @@ def test_get_record(client, valid_mms_id, solr_bib):
     subject = response.json()
     for field in expected:
         assert subject[field] == expected[field]
+
+
+def test_get_record_only_asks_solr_for_fields_it_uses(client, fake_solr, valid_mms_id):
+    client.get(f"/records/{valid_mms_id}")
+    fl = fake_solr.requests[0].url.params["fl"].split(",")
+    assert "fullrecord" in fl
+    assert "title_a" not in fl
+
+
+def test_get_record_with_fields(client, fake_solr, valid_mms_id, solr_bib):
+    response = client.get(f"/records/{valid_mms_id}?fields=title,availability")
+    assert response.status_code == 200
+    assert list(response.json().keys()) == ["id", "title", "availability"]
+    fl = fake_solr.requests[0].url.params["fl"].split(",")
+    assert sorted(fl) == [
+        "_version_",
+        "availability",
+        "date_of_index",
+        "id",
+        "title_display",
+    ]
+
+
+def test_get_record_with_exclude(client, fake_solr, valid_mms_id):
+    response = client.get(f"/records/{valid_mms_id}?exclude=marc,citation")
+    assert response.status_code == 200
+    subject = response.json()
+    assert "marc" not in subject
+    assert "citation" not in subject
+    assert "holdings" in subject
+
+
+def test_get_record_in_strict_mode_sends_the_validated_record(
+    client, valid_mms_id, monkeypatch, caplog
+):
+    expected = client.get(f"/records/{valid_mms_id}?marc=none").content
+    monkeypatch.setattr(main, "S", dataclasses.replace(main.S, strict_response_rate=1))
+    monkeypatch.setattr(main, "dump", lambda record, schema: {"id": "wrong"})
+    client.delete("/admin/cache")
+    response = client.get(f"/records/{valid_mms_id}?marc=none")
+    assert response.content == expected
+    assert "serialized differently without validation" in caplog.text
+
+
+def test_get_record_serializes_off_the_event_loop(client, valid_mms_id, monkeypatch):
+    loops = []
+
+    def serialize_record(record, schema):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return b"{}"
+
+    monkeypatch.setattr(main, "serialize_record", serialize_record)
+    client.get(f"/records/{valid_mms_id}")
+    client.get(f"/records/{valid_mms_id}/holdings")
+    client.delete("/admin/cache")
+    client.post("/records:batch", json={"ids": [valid_mms_id]})
+    assert loops == [None, None, None]
+
+
+def test_get_record_with_raw_marc(client, valid_mms_id, solr_bib, count_marc_parses):
+    response = client.get(f"/records/{valid_mms_id}?fields=title,marc&marc=raw")
+    assert list(response.json().keys()) == ["id", "title", "marc"]
+    assert response.json()["marc"] == solr_bib["fullrecord"]
+    assert count_marc_parses == []
+
+
+def test_get_record_without_marc(client, valid_mms_id):
+    subject = client.get(f"/records/{valid_mms_id}?marc=none").json()
+    assert "marc" not in subject
+    assert "holdings" in subject
+
+
+def test_get_record_caches_marc_forms_separately(client, fake_solr, valid_mms_id):
+    raw = client.get(f"/records/{valid_mms_id}?marc=raw").json()
+    whole = client.get(f"/records/{valid_mms_id}").json()
+    assert isinstance(raw["marc"], str)
+    assert whole["marc"]["fields"]
+    assert len(fake_solr.requests) == 2
+
+
+def test_get_record_with_fields_and_exclude(client, valid_mms_id):
+    response = client.get(
+        f"/records/{valid_mms_id}?fields=title,format,availability&exclude=format"
+    )
+    assert list(response.json().keys()) == ["id", "title", "availability"]
+
+
+def test_get_record_with_unknown_fields(client, fake_solr, valid_mms_id):
+    response = client.get(f"/records/{valid_mms_id}?fields=title,not_a_field")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: not_a_field"}
+    assert fake_solr.requests == []
+
+
+def test_get_record_not_found(client):
+    response = client.get("/records/990000000000006381")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Item not found"}
+
+
+def test_solr_connection_pool_is_shared_for_the_life_of_the_app(
+    fake_solr, monkeypatch, valid_mms_id, alma_record
+):
+    monkeypatch.setattr(solr_pool, "transport", httpx.MockTransport(fake_solr))
+    assert solr_pool.client is None
+    with TestClient(app) as client:
+        pooled_client = solr_pool.client
+        client.get(f"/records/{valid_mms_id}")
+        client.get(f"/records/{alma_record['id']}")
+        assert solr_pool.client is pooled_client
+        assert len(fake_solr.requests) == 2
+    assert solr_pool.client is None
+
+
+def test_get_records_batch(client, fake_solr, valid_mms_id, alma_record):
+    missing_id = "990000000000006381"
+    ids = [alma_record["id"], missing_id, valid_mms_id]
+    response = client.post("/records:batch", json={"ids": ids})
+    assert response.status_code == 200
+    subject = response.json()["records"]
+    assert [r["id"] for r in subject] == ids
+    assert [r["status"] for r in subject] == [200, 404, 200]
+    assert subject[0]["record"]["id"] == alma_record["id"]
+    assert subject[1] == {"id": missing_id, "status": 404, "detail": "Item not found"}
+    assert subject[2]["record"]["id"] == valid_mms_id
+    assert len(fake_solr.requests) == 1
+
+
+def test_get_records_batch_with_fields(client, valid_mms_id, alma_record):
+    response = client.post(
+        "/records:batch?fields=title",
+        json={"ids": [valid_mms_id, alma_record["id"]]},
+    )
+    for result in response.json()["records"]:
+        assert list(result["record"].keys()) == ["id", "title"]
+
+
+def test_get_records_batch_record_matches_get_record(client, valid_mms_id):
+    single = client.get(f"/records/{valid_mms_id}").json()
+    batch = client.post("/records:batch", json={"ids": [valid_mms_id]}).json()
+    assert batch["records"][0]["record"]["marc"] == single["marc"]
+    assert batch["records"][0]["record"]["holdings"] == single["holdings"]
+
+
+def test_get_records_batch_with_raw_marc(client, valid_mms_id, solr_bib):
+    response = client.post(
+        "/records:batch?fields=marc&marc=raw", json={"ids": [valid_mms_id]}
+    )
+    record = response.json()["records"][0]["record"]
+    assert record == {"id": valid_mms_id, "marc": solr_bib["fullrecord"]}
+
+
+def test_get_records_batch_has_a_size_limit(client, fake_solr):
+    ids = [str(i) for i in range(101)]
+    response = client.post("/records:batch", json={"ids": ids})
+    assert response.status_code == 422
+    assert fake_solr.requests == []
+
+
+def test_get_record_is_cached(client, fake_solr, valid_mms_id, record_cache):
+    first = client.get(f"/records/{valid_mms_id}")
+    second = client.get(f"/records/{valid_mms_id}")
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert len(fake_solr.requests) == 1
+    assert record_cache.hits == 1
+
+
+def test_get_record_caches_field_selections_separately(client, fake_solr, valid_mms_id):
+    client.get(f"/records/{valid_mms_id}?fields=title")
+    response = client.get(f"/records/{valid_mms_id}")
+    assert "marc" in response.json()
+    assert len(fake_solr.requests) == 2
+
+
+def test_get_records_batch_only_fetches_uncached_records(
+    client, fake_solr, valid_mms_id, alma_record
+):
+    client.get(f"/records/{valid_mms_id}")
+    response = client.post(
+        "/records:batch", json={"ids": [valid_mms_id, alma_record["id"]]}
+    )
+    assert [r["status"] for r in response.json()["records"]] == [200, 200]
+    assert fake_solr.requests[1].url.params.get_list("id") == [alma_record["id"]]
+
+
+def test_cache_stats(client, valid_mms_id):
+    client.get(f"/records/{valid_mms_id}")
+    client.get(f"/records/{valid_mms_id}")
+    subject = client.get("/admin/cache").json()
+    assert subject["entries"] == 1
+    assert subject["hits"] == 1
+    assert subject["misses"] == 1
+
+
+def test_get_record_compressed(client, valid_mms_id):
+    identity = client.get(
+        f"/records/{valid_mms_id}?marc=none", headers={"Accept-Encoding": "identity"}
+    )
+    response = client.get(
+        f"/records/{valid_mms_id}?marc=none", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in identity.headers
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == identity.headers["etag"]
+    assert response.content == identity.content
+    assert response.num_bytes_downloaded < len(identity.content) / 2
+
+
+@pytest.mark.parametrize("encoding", ["br", "zstd"])
+def test_get_record_compressed_with_brotli_and_zstandard(
+    client, valid_mms_id, monkeypatch, encoding
+):
+    monkeypatch.setattr(
+        main, "compression", Compression(("zstd", "br", "gzip"), min_bytes=1024)
+    )
+    identity = client.get(
+        f"/records/{valid_mms_id}", headers={"Accept-Encoding": "identity"}
+    )
+    response = client.get(
+        f"/records/{valid_mms_id}",
+        headers={"Accept-Encoding": f"gzip;q=0.5, {encoding}"},
+    )
+    assert response.headers["content-encoding"] == encoding
+    assert response.content == identity.content
+    assert response.num_bytes_downloaded < len(identity.content) / 2
+
+
+def test_get_record_small_responses_are_not_compressed(client, valid_mms_id):
+    response = client.get(
+        f"/records/{valid_mms_id}?fields=title", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "content-encoding" not in response.headers
+
+
+def test_get_record_cache_hits_are_sent_precompressed(
+    client, valid_mms_id, compression
+):
+    headers = {"Accept-Encoding": "gzip"}
+    first = client.get(f"/records/{valid_mms_id}", headers=headers)
+    second = client.get(f"/records/{valid_mms_id}", headers=headers)
+    assert second.content == first.content
+    subject = client.get("/admin/compression").json()["gzip"]
+    assert subject["responses"] == 2
+    assert subject["precompressed"] == 1
+    assert subject["bytes_out"] < subject["bytes_in"]
+
+
+def test_get_holdings_and_batch_compressed(
+    serial_client, serial_bib, valid_mms_id, alma_record
+):
+    headers = {"Accept-Encoding": "gzip"}
+    holdings = serial_client.get(
+        f"/records/{serial_bib['id']}/holdings", headers=headers
+    )
+    batch = serial_client.post(
+        "/records:batch",
+        json={"ids": [valid_mms_id, alma_record["id"]]},
+        headers=headers,
+    )
+    assert holdings.headers["content-encoding"] == "gzip"
+    assert batch.headers["content-encoding"] == "gzip"
+    assert len(batch.json()["records"]) == 2
+
+
+@pytest.mark.parametrize(
+    "method,path",
+    [
+        ("GET", "/admin/cache"),
+        ("DELETE", "/admin/cache"),
+        ("DELETE", "/admin/cache/990000000000006381"),
+        ("GET", "/admin/compression"),
+    ],
+)
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "Basic secret"])
+def test_admin_needs_the_admin_token(client, method, path, authorization):
+    headers = {"Authorization": authorization or ""}
+    response = client.request(method, path, headers=headers)
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+
+
+def test_admin_is_off_without_an_admin_token(client, monkeypatch):
+    monkeypatch.setattr(main, "S", dataclasses.replace(main.S, admin_token=""))
+    response = client.get("/admin/cache")
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Admin endpoints are turned off"}
+
+
+def test_flush_cached_record(client, fake_solr, valid_mms_id, alma_record):
+    client.get(f"/records/{valid_mms_id}")
+    client.get(f"/records/{alma_record['id']}")
+    assert client.delete(f"/admin/cache/{valid_mms_id}").status_code == 204
+    client.get(f"/records/{valid_mms_id}")
+    client.get(f"/records/{alma_record['id']}")
+    assert len(fake_solr.requests) == 3
+
+
+def test_flush_cache(client, fake_solr, valid_mms_id):
+    client.get(f"/records/{valid_mms_id}")
+    assert client.delete("/admin/cache").status_code == 204
+    client.get(f"/records/{valid_mms_id}")
+    assert len(fake_solr.requests) == 2
+
+
+def test_flush_an_unreachable_shared_cache(
+    monkeypatch, tmp_path, valid_mms_id, admin_token
+):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1024)
+    cache = SharedRecordCache(backend, ttl=60, max_entry_bytes=1024)
+    monkeypatch.setattr(main, "record_cache", cache)
+    backend.connection.close()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with TestClient(app, headers=headers) as client:
+        flush_all = client.delete("/admin/cache")
+        flush_one = client.delete(f"/admin/cache/{valid_mms_id}")
+    assert flush_all.status_code == flush_one.status_code == 503
+    assert flush_all.json() == {"detail": "The record cache can't be reached"}
+
+
+def test_get_record_shared_cache_hits_are_sent_as_stored(
+    fake_solr, monkeypatch, tmp_path, valid_mms_id, compression
+):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1024 * 1024)
+    cache = SharedRecordCache(backend, ttl=60, max_entry_bytes=1024 * 1024)
+    monkeypatch.setattr(main, "record_cache", cache)
+    monkeypatch.setattr(solr_pool, "transport", httpx.MockTransport(fake_solr))
+    with TestClient(app) as client:
+        first = client.get(
+            f"/records/{valid_mms_id}", headers={"Accept-Encoding": "gzip"}
+        )
+        with monkeypatch.context() as patch:
+            patch.setattr(cache_module, "decompress", lambda *args: pytest.fail())
+            response = client.get(
+                f"/records/{valid_mms_id}", headers={"Accept-Encoding": "gzip"}
+            )
+        identity = client.get(
+            f"/records/{valid_mms_id}", headers={"Accept-Encoding": "identity"}
+        )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["id"] == valid_mms_id
+    assert compression.counts["gzip"]["precompressed"] == 1
+    assert compression.counts["gzip"]["bytes_in"] == 2 * len(first.content)
+    assert "content-encoding" not in identity.headers
+    assert identity.content == first.content
+
+
+def test_get_record_with_a_shared_cache(fake_solr, monkeypatch, tmp_path, valid_mms_id):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1024 * 1024)
+    cache = SharedRecordCache(backend, ttl=60, max_entry_bytes=1024 * 1024)
+    monkeypatch.setattr(main, "record_cache", cache)
+    monkeypatch.setattr(solr_pool, "transport", httpx.MockTransport(fake_solr))
+    with TestClient(app) as client:
+        first = client.get(f"/records/{valid_mms_id}")
+        second = client.get(f"/records/{valid_mms_id}")
+    assert second.content == first.content
+    assert len(fake_solr.requests) == 1
+    assert cache.stats == {
+        "backend": "sqlite",
+        "hits": 1,
+        "misses": 1,
+        "errors": 0,
+        "max_entry_bytes": 1024 * 1024,
+        "ttl": 60,
+    }
+
+
+def test_get_record_with_a_malformed_id(client, fake_solr, missing_records):
+    response = client.get("/records/not-a-record")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Malformed record id"}
+    assert fake_solr.requests == []
+    assert missing_records.malformed == 1
+
+
+def test_get_record_with_a_hathitrust_id(client, fake_solr):
+    response = client.get("/records/11000012345")
+    assert response.status_code == 404
+    assert len(fake_solr.requests) == 1
+
+
+def test_get_record_remembers_missing_ids(client, fake_solr, missing_records):
+    first = client.get("/records/990000000000006381")
+    second = client.get("/records/990000000000006381")
+    assert first.status_code == second.status_code == 404
+    assert second.json() == {"detail": "Item not found"}
+    assert len(fake_solr.requests) == 1
+    assert missing_records.hits == 1
+
+
+def test_flush_cached_record_forgets_a_missing_id(client, fake_solr):
+    client.get("/records/990000000000006381")
+    client.delete("/admin/cache/990000000000006381")
+    client.get("/records/990000000000006381")
+    assert len(fake_solr.requests) == 2
+
+
+def test_get_records_batch_with_malformed_and_missing_ids(
+    client, fake_solr, valid_mms_id
+):
+    missing_id = "990000000000006381"
+    client.get(f"/records/{missing_id}")
+    response = client.post(
+        "/records:batch", json={"ids": ["not-a-record", missing_id, valid_mms_id]}
+    )
+    subject = response.json()["records"]
+    assert [r["status"] for r in subject] == [400, 404, 200]
+    assert subject[0] == {
+        "id": "not-a-record",
+        "status": 400,
+        "detail": "Malformed record id",
+    }
+    assert fake_solr.requests[1].url.params.get_list("id") == [valid_mms_id]
+
+
+def test_get_records_batch_remembers_missing_ids(client, fake_solr):
+    client.post("/records:batch", json={"ids": ["990000000000006381"]})
+    client.get("/records/990000000000006381")
+    assert len(fake_solr.requests) == 1
+
+
+def test_cache_stats_count_ruleset_evaluations(client, valid_mms_id, caplog):
+    caplog.set_level(logging.DEBUG, logger="catalog_api.main")
+    client.get(f"/records/{valid_mms_id}?fields=title")
+    client.get(f"/records/{valid_mms_id}?fields=title,contributors")
+    client.get(f"/records/{valid_mms_id}?fields=title,contributors")
+    subject = client.get("/admin/cache").json()["record_builds"]
+    assert subject["records"] == 2
+    assert subject["ruleset_evaluations"] > 0
+    assert f"Record {valid_mms_id} took 0 ruleset evaluations" in caplog.text
+
+
+def test_cache_stats_count_malformed_and_missing_ids(client):
+    client.get("/records/not-a-record")
+    client.get("/records/990000000000006381")
+    client.get("/records/990000000000006381")
+    subject = client.get("/admin/cache").json()["missing_records"]
+    assert subject["malformed"] == 1
+    assert subject["hits"] == 1
+    assert subject["entries"] == 1
+
+
+def test_get_record_has_validators(client, valid_mms_id):
+    response = client.get(f"/records/{valid_mms_id}")
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["last-modified"] == "Tue, 18 Mar 2025 00:00:00 GMT"
+
+
+def test_get_record_validators_are_the_same_when_cached(client, valid_mms_id):
+    first = client.get(f"/records/{valid_mms_id}")
+    second = client.get(f"/records/{valid_mms_id}")
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["last-modified"] == first.headers["last-modified"]
+
+
+def test_get_record_etag_depends_on_the_fields(client, valid_mms_id):
+    full = client.get(f"/records/{valid_mms_id}")
+    title = client.get(f"/records/{valid_mms_id}?fields=title")
+    assert full.headers["etag"] != title.headers["etag"]
+
+
+def test_get_record_etag_changes_with_the_solr_version(
+    client, fake_solr, valid_mms_id, record_cache
+):
+    first = client.get(f"/records/{valid_mms_id}")
+    fake_solr.docs[valid_mms_id] = {**fake_solr.docs[valid_mms_id], "_version_": 1}
+    client.delete(f"/admin/cache/{valid_mms_id}")
+    second = client.get(f"/records/{valid_mms_id}")
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_get_record_if_none_match(client, fake_solr, valid_mms_id, monkeypatch):
+    etag = client.get(f"/records/{valid_mms_id}").headers["etag"]
+    uncached = RecordCache(max_entries=0, max_bytes=0, ttl=0)
+    monkeypatch.setattr(main, "record_cache", uncached)
+    response = client.get(f"/records/{valid_mms_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept-Encoding"
+    fl = fake_solr.requests[1].url.params["fl"].split(",")
+    assert sorted(fl) == ["_version_", "date_of_index", "id"]
+    assert len(fake_solr.requests) == 2
+
+
+def test_get_record_if_none_match_with_a_stale_etag(client, valid_mms_id):
+    response = client.get(
+        f"/records/{valid_mms_id}", headers={"If-None-Match": '"stale", W/"other"'}
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == valid_mms_id
+
+
+def test_get_record_if_none_match_from_the_cache(client, fake_solr, valid_mms_id):
+    etag = client.get(f"/records/{valid_mms_id}").headers["etag"]
+    response = client.get(f"/records/{valid_mms_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(fake_solr.requests) == 1
+
+
+def test_get_record_if_none_match_without_the_weak_prefix(client, valid_mms_id):
+    etag = client.get(f"/records/{valid_mms_id}").headers["etag"]
+    response = client.get(
+        f"/records/{valid_mms_id}",
+        headers={"If-None-Match": etag.removeprefix("W/"), "Accept-Encoding": "br"},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize(
+    "since,status",
+    [
+        ("Tue, 18 Mar 2025 00:00:00 GMT", 304),
+        ("Wed, 19 Mar 2025 00:00:00 GMT", 304),
+        ("Mon, 17 Mar 2025 23:59:59 GMT", 200),
+        ("not a date", 200),
+    ],
+)
+def test_get_record_if_modified_since(client, valid_mms_id, since, status):
+    response = client.get(
+        f"/records/{valid_mms_id}", headers={"If-Modified-Since": since}
+    )
+    assert response.status_code == status
+
+
+def test_get_record_if_none_match_wins_over_if_modified_since(client, valid_mms_id):
+    response = client.get(
+        f"/records/{valid_mms_id}",
+        headers={
+            "If-None-Match": '"stale"',
+            "If-Modified-Since": "Wed, 19 Mar 2025 00:00:00 GMT",
+        },
+    )
+    assert response.status_code == 200
+
+
+def test_get_record_conditional_request_for_a_missing_record(client):
+    response = client.get(
+        "/records/990000000000006381", headers={"If-None-Match": '"stale"'}
+    )
+    assert response.status_code == 404
+
+
+@pytest.fixture()
+def serial_bib(solr_bib):
+    holding = json.loads(solr_bib["hol"])[0]
+    item = holding["items"][0]
+    second_holding = {
+        **holding,
+        "hol_mmsid": "22000000000006381",
+        "library": "HATCH",
+        "location": "GRAD",
+        "items": [{**item, "item_id": f"230000000{i}06381"} for i in range(3)],
+    }
+    holding = {
+        **holding,
+        "items": [{**item, "item_id": f"2300000000{i:02d}6381"} for i in range(25)],
+    }
+    ht_items = [
+        {
+            "id": f"mdp.390150000000{i:02d}",
+            "description": f"v.{i}",
+            "source": "University of Michigan",
+            "status": "Full text",
+        }
+        for i in range(12)
+    ]
+    hathi_trust = {"library": "HathiTrust Digital Library", "items": ht_items}
+    return {
+        **solr_bib,
+        "id": "990000000000016381",
+        "hol": json.dumps([holding, second_holding, hathi_trust]),
+    }
+
+
+@pytest.fixture()
+def serial_client(client, fake_solr, serial_bib):
+    fake_solr.docs[serial_bib["id"]] = serial_bib
+    return client
+
+
+def test_get_holdings(serial_client, fake_solr, serial_bib):
+    response = serial_client.get(f"/records/{serial_bib['id']}/holdings")
+    assert response.status_code == 200
+    subject = response.json()
+    first, second = subject["physical"]
+    assert len(first["items"]) == 10
+    assert first["item_count"] == 25
+    assert first["items_link"] == (
+        f"/records/{serial_bib['id']}/holdings"
+        "?holding_id=22857812530006381&offset=10&limit=10"
+    )
+    assert len(second["items"]) == 3
+    assert second["item_count"] == 3
+    assert "items_link" not in second
+    assert len(subject["hathi_trust_items"]) == 10
+    assert subject["hathi_trust_item_count"] == 12
+    assert subject["hathi_trust_items_link"] == (
+        f"/records/{serial_bib['id']}/holdings?offset=10&limit=10"
+    )
+    fl = fake_solr.requests[0].url.params["fl"].split(",")
+    assert "hol" in fl
+    assert "title_display" not in fl
+
+
+def test_get_holdings_page(serial_client, serial_bib):
+    response = serial_client.get(
+        f"/records/{serial_bib['id']}/holdings?offset=20&limit=10"
+    )
+    first = response.json()["physical"][0]
+    assert [item["item_id"] for item in first["items"]] == [
+        f"2300000000{i}6381" for i in range(20, 25)
+    ]
+    assert "items_link" not in first
+    assert len(response.json()["hathi_trust_items"]) == 0
+
+
+def test_get_holdings_follows_the_items_link(serial_client, serial_bib):
+    response = serial_client.get(f"/records/{serial_bib['id']}/holdings?limit=20")
+    link = response.json()["physical"][0]["items_link"]
+    subject = serial_client.get(link).json()
+    assert [h["holding_id"] for h in subject["physical"]] == ["22857812530006381"]
+    assert len(subject["physical"][0]["items"]) == 5
+
+
+@pytest.mark.parametrize(
+    "query,holding_ids",
+    [
+        ("library=HATCH", ["22000000000006381"]),
+        ("library=MUSM&location=BIR", ["22857812530006381"]),
+        ("location=NOPE", []),
+    ],
+)
+def test_get_holdings_filters(serial_client, serial_bib, query, holding_ids):
+    response = serial_client.get(f"/records/{serial_bib['id']}/holdings?{query}")
+    subject = response.json()
+    assert [h["holding_id"] for h in subject["physical"]] == holding_ids
+    assert subject["hathi_trust_item_count"] == 12
+
+
+def test_get_holdings_limit_is_capped(serial_client, serial_bib):
+    response = serial_client.get(f"/records/{serial_bib['id']}/holdings?limit=1001")
+    assert response.status_code == 422
+
+
+def test_get_holdings_not_found(client):
+    response = client.get("/records/990000000000006381/holdings")
+    assert response.status_code == 404
+
+
+def test_get_holdings_malformed_id(client, fake_solr):
+    assert client.get("/records/abc/holdings").status_code == 400
+    assert fake_solr.requests == []
+
+
+def test_get_record_with_max_items(serial_client, serial_bib, monkeypatch):
+    built = []
+    physical_item = holdings.PhysicalItem.__init__
+    monkeypatch.setattr(
+        holdings.PhysicalItem,
+        "__init__",
+        lambda self, *args, **kwargs: (
+            built.append(self) or physical_item(self, *args, **kwargs)
+        ),
+    )
+    response = serial_client.get(f"/records/{serial_bib['id']}?max_items=2")
+    subject = response.json()["holdings"]
+    assert [len(h["items"]) for h in subject["physical"]] == [2, 2]
+    assert [h["item_count"] for h in subject["physical"]] == [25, 3]
+    assert subject["physical"][0]["items_link"].endswith("offset=2&limit=2")
+    assert len(subject["hathi_trust_items"]) == 2
+    assert subject["hathi_trust_item_count"] == 12
+    assert len(built) == 4
+
+
+@pytest.mark.parametrize("max_items", [0, 1001])
+def test_get_record_with_max_items_out_of_range(client, valid_mms_id, max_items):
+    response = client.get(f"/records/{valid_mms_id}?max_items={max_items}")
+    assert response.status_code == 422
+
+
+def test_get_record_without_max_items_embeds_every_item(serial_client, serial_bib):
+    subject = serial_client.get(f"/records/{serial_bib['id']}").json()["holdings"]
+    assert [len(h["items"]) for h in subject["physical"]] == [25, 3]
+    assert "item_count" not in subject["physical"][0]
+    assert "hathi_trust_item_count" not in subject
+
+
+def test_get_record_caches_max_items_separately(serial_client, serial_bib):
+    serial_client.get(f"/records/{serial_bib['id']}?max_items=2")
+    subject = serial_client.get(f"/records/{serial_bib['id']}").json()["holdings"]
+    assert len(subject["physical"][0]["items"]) == 25
+
+
+@pytest.fixture()
+def count_marc_parses(monkeypatch):
+    """
+    "parse" for each time fullrecord is parsed whole, and "scan" for each
+    LazyRecord made of it.
+    """
+    parses = []
+    parse = marc.MARC_PARSERS[S.marc_parser]
+    monkeypatch.setitem(
+        marc.MARC_PARSERS,
+        S.marc_parser,
+        lambda *args: parses.append("parse") or parse(*args),
+    )
+    init = marc.LazyRecord.__init__
+    monkeypatch.setattr(
+        marc.LazyRecord,
+        "__init__",
+        lambda self, xml: parses.append("scan") or init(self, xml),
+    )
+    return parses
+
+
+def reservable(doc: dict, item_index: int = 0) -> dict:
+    hol = json.loads(doc["hol"])
+    hol[0]["items"][item_index]["can_reserve"] = True
+    hol[0]["items"][item_index]["library"] = "SPEC"
+    return {**doc, "hol": json.dumps(hol)}
+
+
+def test_get_holdings_without_reservable_items_skips_marc(
+    client, fake_solr, valid_mms_id, count_marc_parses
+):
+    response = client.get(f"/records/{valid_mms_id}/holdings")
+    assert response.status_code == 200
+    assert len(fake_solr.requests) == 1
+    assert "fullrecord" not in fake_solr.requests[0].url.params["fl"].split(",")
+    assert count_marc_parses == []
+
+
+def test_get_holdings_with_reservable_items_fetches_marc(
+    client, fake_solr, valid_mms_id, count_marc_parses
+):
+    fake_solr.docs[valid_mms_id] = reservable(fake_solr.docs[valid_mms_id])
+    response = client.get(f"/records/{valid_mms_id}/holdings")
+    item = response.json()["physical"][0]["items"][0]
+    assert item["url"].startswith("https://aeon.lib.umich.edu/logon?")
+    assert len(fake_solr.requests) == 2
+    assert fake_solr.requests[1].url.params["fl"] == "id,fullrecord"
+    assert count_marc_parses == ["scan"]
+
+
+def test_get_record_parses_the_whole_record_for_marc(
+    client, valid_mms_id, count_marc_parses
+):
+    client.get(f"/records/{valid_mms_id}")
+    assert count_marc_parses == ["parse"]
+
+
+def test_get_record_only_parses_the_tags_it_needs(
+    client, valid_mms_id, count_marc_parses
+):
+    whole = client.get(f"/records/{valid_mms_id}").json()
+    # Checking the schema the first time it's used builds a record too
+    solr_fields(main.record_schema("contributors,series", None))
+    count_marc_parses.clear()
+    response = client.get(f"/records/{valid_mms_id}?fields=contributors,series")
+    assert response.json()["contributors"] == whole["contributors"]
+    assert response.json()["series"] == whole["series"]
+    assert count_marc_parses == ["scan"]
+
+
+def test_get_holdings_only_fetches_marc_for_reservable_items_on_the_page(
+    serial_client, fake_solr, serial_bib
+):
+    fake_solr.docs[serial_bib["id"]] = reservable(serial_bib, item_index=24)
+    serial_client.get(f"/records/{serial_bib['id']}/holdings?limit=10")
+    assert len(fake_solr.requests) == 1
+    serial_client.get(f"/records/{serial_bib['id']}/holdings?offset=20")
+    assert len(fake_solr.requests) == 3
+
+
+def test_get_record_with_only_holdings_fetches_marc_when_needed(
+    client, fake_solr, valid_mms_id, alma_record
+):
+    fake_solr.docs[valid_mms_id] = reservable(fake_solr.docs[valid_mms_id])
+    response = client.post(
+        "/records:batch?fields=holdings",
+        json={"ids": [valid_mms_id, alma_record["id"]]},
+    )
+    records = response.json()["records"]
+    item = records[0]["record"]["holdings"]["physical"][0]["items"][0]
+    assert item["url"].startswith("https://aeon.lib.umich.edu/logon?")
+    assert len(fake_solr.requests) == 2
+    assert fake_solr.requests[1].url.params.get_list("id") == [valid_mms_id]
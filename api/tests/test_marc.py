@@ -0,0 +1,500 @@
+import dataclasses
+import io
+import json
+from functools import cached_property
+import xml.etree.ElementTree as ElementTree
+import pymarc
+import pytest
+from catalog_api.entities import FieldElement, SearchField
+from catalog_api import marc
+from catalog_api.marc import (
+    MARC_PARSERS,
+    CompactField,
+    CompactRecord,
+    FieldRuleset,
+    LazyRecord,
+    Processor,
+    lxml_etree,
+    marc_parser,
+    parse_marcxml,
+    parse_marcxml_with_compact,
+)
+from catalog_api.record import MARC
+from catalog_api.services import S
+
+
+def datafield(tag, subfields):
+    return pymarc.Field(
+        tag=tag,
+        indicators=pymarc.Indicators(" ", " "),
+        subfields=[
+            pymarc.Subfield(code=code, value=value) for code, value in subfields
+        ],
+    )
+
+
+@pytest.fixture
+def record():
+    record = pymarc.Record()
+    record.add_field(pymarc.Field(tag="001", data="990000000000006381"))
+    record.add_field(datafield("700", [("6", "880-02"), ("a", "Tanaka, Hiroshi")]))
+    record.add_field(datafield("100", [("6", "880-01"), ("a", "Ivanov, Ivan")]))
+    record.add_field(datafield("700", [("a", "Smith, Jane")]))
+    record.add_field(datafield("880", [("6", "100-01/(N"), ("a", "Иванов, Иван")]))
+    record.add_field(datafield("880", [("6", "700-02/$1"), ("a", "田中, 博")]))
+    record.add_field(datafield("880", [("6", "700-03/$1"), ("a", "山田, 太郎")]))
+    record.add_field(datafield("880", [("6", "245-00/$1"), ("a", "鳥類")]))
+    return record
+
+
+def texts(paired_fields):
+    return [
+        (
+            f.original.text,
+            f.transliterated.text if f.transliterated else None,
+        )
+        for f in paired_fields
+    ]
+
+
+class TestFieldRuleset:
+    def test_value_for_collects_text_search_and_browse(self):
+        field = datafield(
+            "700",
+            [("a", "Tanaka, Hiroshi"), ("d", "1950-"), ("t", "Birds"), ("4", "aut")],
+        )
+        subject = FieldRuleset(
+            tags=["700"],
+            text_sfs="adt4",
+            search=[
+                {"subfields": "ad", "field": "author"},
+                {"subfields": "t", "field": "title"},
+                {"subfields": "x", "field": "isn"},
+            ],
+            browse_sfs="a",
+        )
+        assert subject.value_for(field) == FieldElement(
+            text="Tanaka, Hiroshi 1950- Birds aut",
+            tag="700",
+            search=[
+                SearchField(field="author", value="Tanaka, Hiroshi 1950-"),
+                SearchField(field="title", value="Birds"),
+            ],
+            browse="Tanaka, Hiroshi",
+        )
+
+    def test_value_for_keeps_subfield_order(self):
+        field = datafield("245", [("b", "second"), ("a", "first"), ("b", "third")])
+        subject = FieldRuleset(tags=["245"], text_sfs="ab")
+        assert subject.value_for(field).text == "second first third"
+
+    def test_codes_can_be_a_list(self):
+        field = datafield("020", [("a", "9780000000000"), ("z", "9781111111111")])
+        subject = FieldRuleset(tags=["020"], text_sfs=["z"])
+        assert subject.value_for(field).text == "9781111111111"
+
+    @pytest.mark.parametrize(
+        "subfields,expected",
+        [
+            ([("a", "text")], True),
+            ([("b", "text")], False),
+            ([("a", "")], False),
+            # Two empty values still join into " "
+            ([("a", ""), ("a", "")], True),
+        ],
+    )
+    def test_has_any_subfields(self, subfields, expected):
+        subject = FieldRuleset(tags=["500"], text_sfs="a")
+        assert subject.has_any_subfields(datafield("500", subfields)) is expected
+
+    def test_equivalent_rulesets_share_a_key(self):
+        subject = FieldRuleset(tags=["700", "100"], text_sfs=["a", "b"])
+        assert subject.key == FieldRuleset(tags=["100", "700"], text_sfs="ab").key
+        assert subject.key != FieldRuleset(tags=["100", "700"], text_sfs="a").key
+
+    def test_named_filters_are_part_of_the_key(self):
+        subject = FieldRuleset(tags=["700"], filter="has_t")
+        assert subject.key == FieldRuleset(tags=["700"], filter="has_t").key
+        assert subject.key != FieldRuleset(tags=["700"], filter="has_no_t").key
+
+    def test_unknown_filter(self):
+        with pytest.raises(ValueError, match="Unknown field filter"):
+            FieldRuleset(tags=["700"], filter="no_such_filter")
+
+    def test_filter_names_are_registered_once(self):
+        with pytest.raises(ValueError, match="has_t"):
+            marc.register_filter("has_t")(lambda field: True)
+
+
+class TestProcessor:
+    @pytest.mark.parametrize(
+        "tags", [["700"], ["100", "700"], ["700", "100"], ["700", "700"], ["999"]]
+    )
+    def test_get_fields_is_in_record_order(self, record, tags):
+        subject = Processor(record)
+        assert subject.get_fields(tags) == record.get_fields(*tags)
+
+    def test_pairs_fields_with_their_880s(self, record):
+        subject = Processor(record)
+        result = subject.generate_paired_fields(
+            [FieldRuleset(tags=["100", "700"], text_sfs="a")]
+        )
+        assert texts(result) == [
+            ("田中, 博", "Tanaka, Hiroshi"),
+            ("Иванов, Иван", "Ivanov, Ivan"),
+            ("Smith, Jane", None),
+            ("山田, 太郎", None),
+        ]
+
+    def test_880s_for_other_tags_are_left_out(self, record):
+        subject = Processor(record)
+        result = subject.generate_paired_fields([FieldRuleset(tags=["100"])])
+        assert texts(result) == [("Иванов, Иван", "Ivanov, Ivan")]
+
+    def test_unpaired_fields(self, record):
+        subject = Processor(record)
+        result = subject.generate_unpaired_fields(
+            [FieldRuleset(tags=["700"], text_sfs="a"), FieldRuleset(tags=["700"])]
+        )
+        # The second ruleset only repeats values the first one found
+        assert [f.text for f in result] == ["Tanaka, Hiroshi", "Smith, Jane"]
+
+    def test_unpaired_fields_are_deduped_in_order(self, record):
+        record.add_field(datafield("700", [("a", "Tanaka, Hiroshi")]))
+        subject = Processor(record)
+        result = subject.generate_unpaired_fields(
+            [
+                FieldRuleset(
+                    tags=["700"],
+                    text_sfs="a",
+                    search=[{"subfields": "a", "field": "author"}],
+                )
+            ]
+        )
+        assert [f.text for f in result] == ["Tanaka, Hiroshi", "Smith, Jane"]
+
+    def test_walks_the_record_once(self, record, monkeypatch):
+        subject = Processor(record)
+        monkeypatch.setattr(
+            pymarc.Record,
+            "get_fields",
+            lambda *args: pytest.fail("walked the record"),
+        )
+        subject.generate_paired_fields([FieldRuleset(tags=["100", "700"])])
+        subject.generate_unpaired_fields([FieldRuleset(tags=["700"])])
+
+    def test_counts_ruleset_evaluations(self, record):
+        subject = Processor(record)
+        subject.generate_paired_fields(
+            [FieldRuleset(tags=["100"]), FieldRuleset(tags=["700"])]
+        )
+        subject.generate_unpaired_fields([FieldRuleset(tags=["700"])])
+        assert subject.evaluations == 3
+
+    def test_equivalent_rulesets_are_evaluated_once(self, record):
+        subject = Processor(record)
+        first = subject.generate_paired_fields(
+            [FieldRuleset(tags=["100", "700"], text_sfs="a")]
+        )
+        second = subject.generate_paired_fields(
+            [FieldRuleset(tags=["700", "100"], text_sfs=["a"])]
+        )
+        assert first == second
+        assert subject.evaluations == 1
+
+    def test_880_without_an_occurrence(self, record):
+        record.add_field(datafield("880", [("6", "100"), ("a", "Без номера")]))
+        subject = Processor(record)
+        result = subject.generate_paired_fields([FieldRuleset(tags=["100"])])
+        assert ("Без номера", None) in texts(result)
+
+    def test_without_a_record(self):
+        assert (
+            Processor(None).generate_paired_fields([FieldRuleset(tags=["245"])]) == []
+        )
+
+
+def fixture_record(name):
+    with open(f"tests/fixtures/{name}.json") as data:
+        doc = json.load(data)
+    if "response" in doc:
+        doc = doc["response"]["docs"][0]
+    return parse_marcxml(doc["fullrecord"])
+
+
+def marc_fields(record) -> dict:
+    """
+    Every MARC display field built from record.
+    """
+    subject = MARC(record)
+    return {
+        name: getattr(subject, name)
+        for name, value in vars(MARC).items()
+        if isinstance(value, cached_property) and name != "processor"
+    }
+
+
+@pytest.fixture(params=["land_birds_solr", "alma_record", "vernacular"])
+def any_record(request, record):
+    if request.param == "vernacular":
+        return record
+    return fixture_record(request.param)
+
+
+MARCXML = {
+    "namespaced": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<collection xmlns="http://www.loc.gov/MARC21/slim"><record>'
+        "<leader>00000cam a2200000 a 4500</leader>"
+        '<controlfield tag="001">990000000000006381</controlfield>'
+        '<datafield tag="245" ind1="1" ind2="0">'
+        '<subfield code="a">Birds &amp; beasts :</subfield>'
+        '<subfield code="b"><![CDATA[a <guide>]]></subfield>'
+        "</datafield></record></collection>"
+    ),
+    "prefixed": (
+        '<marc:record xmlns:marc="http://www.loc.gov/MARC21/slim">'
+        '<marc:datafield tag="100" ind1="1" ind2=" ">'
+        '<marc:subfield code="a">Иванов, Иван</marc:subfield>'
+        "</marc:datafield></marc:record>"
+    ),
+    "odd": (
+        "<collection><!-- a comment --><record>\n  "
+        '<controlfield tag="008"/>'
+        '<datafield tag="500" ind2="">\n  <subfield code="a"/><subfield code="ab">2</subfield>'
+        '<subfield code="b">  spaced  </subfield>\n'
+        '<subfield code="c">price tag="9" &lt;b&gt;</subfield></datafield>'
+        '<datafield tag="009" ind1="0" ind2="1"><subfield code="a">x</subfield>'
+        "</datafield>"
+        '<controlfield tag="FMT">BK</controlfield>'
+        "</record><record><leader>00000nam a2200000 i 4500</leader></record>"
+        "</collection>"
+    ),
+    "angle_brackets": (
+        "<record>"
+        '<datafield tag="500" ind1=" " ind2=" ">'
+        '<subfield code="a">Uses markup like tag="245" -> here</subfield>'
+        "</datafield>"
+        '<datafield tag="245" ind1="0" ind2="0">'
+        "<subfield code=\"a\">a > b, tag='100' ></subfield>"
+        "</datafield></record>"
+    ),
+    "between_fields": (
+        "<record>"
+        '<datafield tag="500" ind1=" " ind2=" "><subfield code="a">One</subfield>'
+        "</datafield><foo/>"
+        '<datafield tag="500" ind1=" " ind2=" "><subfield code="a">Two</subfield>'
+        "</datafield><leader>00000cam a2200000 a 4500</leader>"
+        '<datafield tag="245" ind1="0" ind2="0"><subfield code="a">Title</subfield>'
+        "</datafield></record>"
+    ),
+}
+
+
+def marcxml_corpus():
+    corpus = dict(MARCXML)
+    for name in ["land_birds_solr", "alma_record"]:
+        with open(f"tests/fixtures/{name}.json") as data:
+            doc = json.load(data)
+        if "response" in doc:
+            doc = doc["response"]["docs"][0]
+        corpus[name] = doc["fullrecord"]
+    return corpus
+
+
+def as_tuples(record):
+    return (
+        str(record.leader),
+        [
+            (
+                field.tag,
+                field.control_field,
+                field.data,
+                None if field.control_field else tuple(field.indicators),
+                field.subfields,
+            )
+            for field in record.fields
+        ],
+    )
+
+
+PARSERS = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            name == "lxml" and lxml_etree is None, reason="lxml isn't installed"
+        ),
+    )
+    for name in MARC_PARSERS
+]
+
+
+class TestMarcParsers:
+    @pytest.mark.parametrize("parser", PARSERS)
+    @pytest.mark.parametrize("document", marcxml_corpus())
+    def test_builds_the_same_record_as_pymarc(self, parser, document):
+        xml = marcxml_corpus()[document]
+        expected = pymarc.parse_xml_to_array(io.StringIO(xml))[0]
+        result = marc_parser(parser)(xml)
+        assert as_tuples(result) == as_tuples(expected)
+        assert result.as_json() == expected.as_json()
+
+    def test_parse_marcxml_uses_the_configured_parser(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(marc, "S", dataclasses.replace(S, marc_parser="pymarc"))
+        monkeypatch.setitem(MARC_PARSERS, "pymarc", lambda xml: calls.append(xml))
+        parse_marcxml(MARCXML["prefixed"])
+        assert calls == [MARCXML["prefixed"]]
+
+    def test_unknown_parser(self):
+        with pytest.raises(ValueError, match="Unknown MARC parser 'sax'"):
+            marc_parser("sax")
+
+
+class TestLazyRecord:
+    @pytest.mark.parametrize("document", marcxml_corpus())
+    def test_fields_match_pymarc(self, document):
+        xml = marcxml_corpus()[document]
+        expected = pymarc.parse_xml_to_array(io.StringIO(xml))[0]
+        subject = LazyRecord(xml)
+        tags = {field.tag for field in expected.fields}
+        for tag in tags:
+            assert as_tuples_of(subject.get_fields(tag)) == as_tuples_of(
+                expected.get_fields(tag)
+            ), tag
+        assert as_tuples_of(subject.get_fields(*tags)) == as_tuples_of(
+            expected.get_fields(*tags)
+        )
+        assert subject.as_json() == expected.as_json()
+
+    @pytest.mark.parametrize("document", marcxml_corpus())
+    def test_processor_matches_pymarc(self, document):
+        xml = marcxml_corpus()[document]
+        assert marc_fields(LazyRecord(xml)) == marc_fields(parse_marcxml(xml))
+
+    def test_only_parses_the_tags_asked_for(self, monkeypatch):
+        xml = marcxml_corpus()["land_birds_solr"]
+        monkeypatch.setitem(
+            MARC_PARSERS, S.marc_parser, lambda xml: pytest.fail("parsed it all")
+        )
+        subject = LazyRecord(xml)
+        assert subject["245"].get("a")
+        assert subject.get_fields("100", "700")
+        assert set(subject._fields) == {"245", "100", "700"}
+
+    def test_text_with_tag_and_angle_brackets_is_still_indexed(self, monkeypatch):
+        xml = MARCXML["angle_brackets"]
+        monkeypatch.setitem(
+            MARC_PARSERS, S.marc_parser, lambda xml: pytest.fail("parsed it all")
+        )
+        subject = LazyRecord(xml)
+        assert set(subject.offsets) == {"500", "245"}
+        assert subject["500"]["a"] == 'Uses markup like tag="245" -> here'
+        assert subject["245"]["a"] == "a > b, tag='100' >"
+
+    def test_elements_between_fields_are_left_out(self):
+        subject = LazyRecord(MARCXML["between_fields"])
+        assert [field["a"] for field in subject.get_fields("500")] == ["One", "Two"]
+        assert subject._indexed
+        assert MARC(subject).note == MARC(parse_marcxml(subject.xml)).note
+
+    def test_markup_the_scan_can_not_see_into_parses_the_whole_record(self):
+        subject = LazyRecord(MARCXML["namespaced"])
+        assert not subject._indexed
+        assert subject["245"]["b"] == "a <guide>"
+
+    def test_falls_back_to_the_whole_record_if_a_slice_does_not_parse(
+        self, monkeypatch
+    ):
+        xml = marcxml_corpus()["land_birds_solr"]
+        subject = LazyRecord(xml)
+
+        def broken(offsets):
+            raise ElementTree.ParseError("mismatched tag")
+
+        monkeypatch.setattr(subject, "_parse", broken)
+        assert as_tuples_of(subject.get_fields("245")) == as_tuples_of(
+            parse_marcxml(xml).get_fields("245")
+        )
+        assert "245" in subject
+
+    def test_everything_else_parses_the_whole_record(self):
+        xml = marcxml_corpus()["alma_record"]
+        subject = LazyRecord(xml)
+        assert str(subject.leader) == str(parse_marcxml(xml).leader)
+        assert len(subject.fields) == len(parse_marcxml(xml).fields)
+
+    def test_missing_tags(self):
+        subject = LazyRecord(MARCXML["prefixed"])
+        assert "245" not in subject
+        assert subject.get_fields("245") == []
+        assert subject.get("245") is None
+        with pytest.raises(KeyError):
+            subject["245"]
+
+    def test_without_a_record_element(self):
+        subject = LazyRecord("<collection/>")
+        with pytest.raises(ValueError, match="no record"):
+            subject.get_fields("245")
+
+
+class TestCompactRecord:
+    @pytest.mark.parametrize("document", marcxml_corpus())
+    def test_from_pymarc(self, document):
+        expected = parse_marcxml(marcxml_corpus()[document])
+        subject = CompactRecord.from_pymarc(expected)
+        assert as_tuples(subject) == as_tuples(expected)
+        assert subject.as_json() == expected.as_json()
+
+    def test_odd_codes_and_indicators(self):
+        expected = pymarc.Record()
+        expected.add_field(
+            pymarc.Field(
+                tag="500",
+                indicators=pymarc.Indicators("", "10"),
+                subfields=[
+                    pymarc.Subfield(code="ab", value="x"),
+                    pymarc.Subfield(code="\x00", value="y"),
+                    pymarc.Subfield(code="a", value="z"),
+                ],
+            )
+        )
+        subject = CompactRecord.from_pymarc(expected)
+        assert as_tuples(subject) == as_tuples(expected)
+        field = subject["500"]
+        assert (field.indicator1, field.indicator2) == ("", "10")
+        assert field["ab"] == "x"
+        assert field.get_subfields("a", "\x00") == ["y", "z"]
+        assert "b" not in field
+
+    def test_reads_like_pymarc(self, record):
+        subject = CompactRecord.from_pymarc(record)
+        assert subject["001"].value() == "990000000000006381"
+        assert subject["001"].get("a") is None
+        assert subject["700"]["6"] == "880-02"
+        assert subject["700"].get("b", "none") == "none"
+        assert subject["100"].value() == "880-01 Ivanov, Ivan"
+        assert as_tuples_of(subject.get_fields("880", "100")) == as_tuples_of(
+            record.get_fields("880", "100")
+        )
+        assert subject.get("245") is None
+        with pytest.raises(KeyError):
+            subject["245"]
+
+    def test_processor_matches_pymarc(self, any_record):
+        subject = CompactRecord.from_pymarc(any_record)
+        assert marc_fields(subject) == marc_fields(any_record)
+
+    def test_rulesets_read_the_arrays(self, monkeypatch):
+        # No Subfield is made for a ruleset
+        monkeypatch.setattr(
+            CompactField, "subfields", property(lambda field: pytest.fail("copied"))
+        )
+        subject = parse_marcxml_with_compact(marcxml_corpus()["land_birds_solr"])
+        assert MARC(subject).contributors
+
+
+def as_tuples_of(fields):
+    record = pymarc.Record()
+    record.fields = fields
+    return as_tuples(record)[1]
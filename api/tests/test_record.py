@@ -4,7 +4,17 @@ import pymarc
 import string
 from datetime import datetime
 from dataclasses import dataclass, field
-from catalog_api.record import Record, MARC, SolrDoc, TaggedCitation, CSL, BaseRecord
+from catalog_api.record import (
+    Record,
+    MARC,
+    SolrDoc,
+    TaggedCitation,
+    CSL,
+    BaseRecord,
+    solr_fields,
+)
+from catalog_api import marc, schemas
+from catalog_api.services import S
 from catalog_api.entities import FieldElement, PairedField
 from catalog_api.marc import (
     FieldRuleset,
@@ -109,14 +119,144 @@ class TestRecord:
         subject = Record(solr_bib)
         assert (subject.marc) == json.loads(record.as_json())
 
+    def test_marcxml_is_fullrecord_unparsed(self, solr_bib):
+        subject = Record(solr_bib, sections=frozenset(["marcxml"]))
+        assert subject.marcxml is solr_bib["fullrecord"]
+        assert "record" not in vars(subject)
+
     def test_holdings_is_not_None(self, solr_bib):
         subject = Record(solr_bib)
         assert subject.holdings is not None
 
+    def test_holdings_decodes_hol_once(self, solr_bib, monkeypatch):
+        decoded = []
+        loads = json.loads
+        monkeypatch.setattr(json, "loads", lambda s: decoded.append(s) or loads(s))
+        subject = Record(solr_bib)
+        assert subject.holdings is subject.holdings
+        assert decoded == [solr_bib["hol"]]
+
     def test_physical_holdings_is_not_None(self, solr_bib):
         subject = Record(solr_bib)
         assert subject.holdings.physical is not None
 
+    def test_fullrecord_is_parsed_once(self, solr_bib, monkeypatch):
+        calls = []
+        parse = marc.MARC_PARSERS[S.marc_parser]
+
+        def counting_parse(*args, **kwargs):
+            calls.append(args)
+            return parse(*args, **kwargs)
+
+        monkeypatch.setitem(marc.MARC_PARSERS, S.marc_parser, counting_parse)
+        subject = Record(solr_bib)
+        subject.marc
+        subject.holdings.physical[0].items[0].url
+        subject.citation.tagged
+        subject.citation.csl.title
+        assert len(calls) == 1
+
+    def test_fullrecord_is_not_parsed_for_solr_fields(self, solr_bib):
+        solr_bib.pop("fullrecord")
+        subject = Record(solr_bib)
+        assert serialize(subject.title)[0]["original"]["text"]
+        assert subject.availability == solr_bib["availability"]
+
+    def test_fields_are_worked_out_once(self, solr_bib):
+        subject = Record(solr_bib)
+        assert subject.edition is subject.edition
+        assert subject.bibliography is subject.bibliography
+        assert subject.citation is subject.citation
+
+    def test_citations_reuse_the_fields_read(self, solr_bib, monkeypatch):
+        subject = Record(solr_bib)
+        subject.report_number, subject.numbering, subject.edition
+        evaluations = subject.processor.evaluations
+        # Working out a solr field again would fail
+        monkeypatch.setattr(subject, "solr_processor", None)
+        csl = subject.citation.csl
+        assert csl.number == csl.number
+        assert csl.edition
+        assert subject.processor.evaluations == evaluations
+
+    def test_citations_share_results_with_the_aeon_fields(self, solr_bib):
+        subject = Record(solr_bib)
+        subject.holdings.aeon_record.publisher
+        evaluations = subject.processor.evaluations
+        # The tagged citation reads the same 260 and 264 $b with its own ruleset
+        subject.citation.processor.generate_paired_fields(
+            [FieldRuleset(tags=["264", "260"], text_sfs="b")]
+        )
+        assert subject.processor.evaluations == evaluations
+
+    def test_aeon_fields_share_the_record_processor(self, solr_bib):
+        subject = Record(solr_bib)
+        assert subject.holdings.aeon_record.processor is subject.processor
+
+    def test_citation_shares_the_parsed_record(self, solr_bib):
+        subject = Record(solr_bib)
+        assert subject.citation.marc_record is subject.record
+        assert subject.holdings.record is subject.record
+
+
+class TestSolrFields:
+    def test_includes_fields_the_record_reads(self):
+        subject = solr_fields()
+        for name in [
+            "id",
+            "title_display",
+            "fullrecord",
+            "hol",
+            "_version_",
+            "date_of_index",
+        ]:
+            assert name in subject
+
+    def test_excludes_search_only_fields(self):
+        subject = solr_fields()
+        for name in ["title_a", "author_browse_terms", "topicStr"]:
+            assert name not in subject
+
+    def test_builds_the_same_record_as_the_full_document(self, solr_bib):
+        projected = {k: v for k, v in solr_bib.items() if k in solr_fields()}
+        expected = schemas.Record.model_validate(Record(solr_bib), from_attributes=True)
+        subject = schemas.Record.model_validate(Record(projected), from_attributes=True)
+        expected.citation.tagged.pop(4)  # Y2 is the time the citation is made
+        subject.citation.tagged.pop(4)
+        assert subject == expected
+
+    def test_only_needs_fields_in_a_partial_schema(self):
+        subject = solr_fields(schemas.partial_record(frozenset(["id", "title"])))
+        assert subject == ("_version_", "date_of_index", "id", "title_display")
+
+    def test_partial_schema_with_marc_fields_needs_fullrecord(self):
+        subject = solr_fields(schemas.partial_record(frozenset(["id", "note"])))
+        assert subject == ("_version_", "date_of_index", "fullrecord", "id")
+
+    def test_schema_field_the_record_does_not_provide(self):
+        class Unknown(schemas.Record):
+            not_a_record_property: str
+
+        with pytest.raises(RuntimeError, match="not_a_record_property"):
+            solr_fields(Unknown)
+
+
+@pytest.mark.parametrize("name", sorted(marc.FIELD_FILTERS))
+def test_field_filters_return_bools(name):
+    fields = [
+        pymarc.Field(
+            tag="700",
+            indicators=pymarc.Indicators(ind1, ind2),
+            subfields=[pymarc.Subfield(code, value) for code, value in subfields],
+        )
+        for ind1, ind2, subfields in [
+            ("0", "2", [("a", "Smith"), ("e", "ed."), ("t", "Title")]),
+            ("1", " ", [("a", "Smith"), ("u", "Place")]),
+            ("4", "0", []),
+        ]
+    ]
+    assert all(type(marc.FIELD_FILTERS[name](field)) is bool for field in fields)
+
 
 class TestSolrDoc:
     def test_title(self, solr_bib):
@@ -0,0 +1,74 @@
+import asyncio
+import httpx
+import pytest
+import json
+from catalog_api.solr_client import SolrClient, NotFoundError
+from tests.fake_solr import FakeSolr
+
+
+@pytest.fixture()
+def solr_bib():
+    bib = {}
+    with open("tests/fixtures/land_birds_solr.json") as data:
+        bib = json.load(data)
+    return bib["response"]["docs"][0]
+
+
+def solr_client_for(fake_solr, **kwargs):
+    http_client = httpx.AsyncClient(
+        base_url="http://solr:8983/solr/biblio",
+        transport=httpx.MockTransport(fake_solr),
+    )
+    return SolrClient(http_client=http_client, **kwargs)
+
+
+class TestSolrClient:
+    def get_record(self, subject, id):
+        return asyncio.run(subject.get_record(id))
+
+    def get_records(self, subject, ids):
+        return asyncio.run(subject.get_records(ids))
+
+    def test_get_record_uses_realtime_get(self, solr_bib):
+        fake_solr = FakeSolr([solr_bib])
+        subject = solr_client_for(fake_solr)
+        assert self.get_record(subject, solr_bib["id"]) == solr_bib
+        assert fake_solr.requests[0].url.path == "/solr/biblio/get"
+        assert fake_solr.requests[0].url.params["id"] == solr_bib["id"]
+
+    def test_get_record_not_found(self, solr_bib):
+        subject = solr_client_for(FakeSolr([solr_bib]))
+        with pytest.raises(NotFoundError):
+            self.get_record(subject, "990000000000006381")
+
+    def test_get_record_falls_back_to_select(self, solr_bib):
+        fake_solr = FakeSolr([solr_bib], realtime_get=False)
+        subject = solr_client_for(fake_solr, realtime_get=False)
+        assert self.get_record(subject, solr_bib["id"]) == solr_bib
+        assert fake_solr.requests[0].url.path == "/solr/biblio/select"
+
+    @pytest.mark.parametrize("id", ["*", "a OR b", "id:*", '"quoted"'])
+    def test_select_does_not_parse_the_id_as_a_query(self, solr_bib, id):
+        fake_solr = FakeSolr([solr_bib], realtime_get=False)
+        subject = solr_client_for(fake_solr, realtime_get=False)
+        with pytest.raises(NotFoundError):
+            self.get_record(subject, id)
+        params = fake_solr.requests[0].url.params
+        assert params["q"] == "{!term f=id v=$record_id}"
+        assert params["record_id"] == id
+
+    @pytest.mark.parametrize("realtime_get", [True, False])
+    def test_get_records_in_one_request(self, solr_bib, realtime_get):
+        other = {**solr_bib, "id": "990000000000016381"}
+        fake_solr = FakeSolr([solr_bib, other], realtime_get=realtime_get)
+        subject = solr_client_for(fake_solr, realtime_get=realtime_get)
+        ids = [other["id"], "missing", solr_bib["id"]]
+        assert self.get_records(subject, ids) == {
+            other["id"]: other,
+            solr_bib["id"]: solr_bib,
+        }
+        assert len(fake_solr.requests) == 1
+
+    def test_get_records_with_one_id(self, solr_bib):
+        subject = solr_client_for(FakeSolr([solr_bib]))
+        assert self.get_records(subject, [solr_bib["id"]]) == {solr_bib["id"]: solr_bib}